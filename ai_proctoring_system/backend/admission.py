@@ -0,0 +1,83 @@
+"""
+Per-session admission for the detect endpoint: latest frame wins.
+
+Each session may have one frame being processed and one frame waiting. A frame
+that arrives while another is waiting takes its place, and the older waiter is
+released straight away as superseded, so it never reaches decode or inference.
+Stale frames from a slow session stop competing with other students' fresh ones.
+"""
+import threading
+import time
+
+
+class _Slot:
+    __slots__ = ('busy', 'waiting', 'tickets', 'cond')
+
+    def __init__(self, lock):
+        self.busy = False       # a frame from this session is being processed
+        self.waiting = None     # ticket of the one frame allowed to wait
+        self.tickets = 0
+        self.cond = threading.Condition(lock)
+
+
+class SessionAdmission:
+    def __init__(self, max_wait=10.0):
+        self.max_wait = max_wait
+        self._slots = {}
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.superseded = 0
+        self.timed_out = 0
+
+    def enter(self, session):
+        """Block until this frame may run. Returns False if a newer frame replaced it."""
+        with self._lock:
+            slot = self._slots.get(session)
+            if slot is None:
+                slot = self._slots[session] = _Slot(self._lock)
+            slot.tickets += 1
+            ticket = slot.tickets
+
+            if not slot.busy and slot.waiting is None:
+                slot.busy = True
+                self.admitted += 1
+                return True
+
+            # Take the waiting place; whoever held it wakes up and sees it lost
+            slot.waiting = ticket
+            slot.cond.notify_all()
+            deadline = time.monotonic() + self.max_wait
+            while True:
+                if slot.waiting != ticket:
+                    self.superseded += 1
+                    return False
+                if not slot.busy:
+                    slot.busy = True
+                    slot.waiting = None
+                    self.admitted += 1
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    slot.waiting = None
+                    self.timed_out += 1
+                    return False
+                slot.cond.wait(remaining)
+
+    def exit(self, session):
+        with self._lock:
+            slot = self._slots[session]
+            slot.busy = False
+            if slot.waiting is None:
+                del self._slots[session]
+            else:
+                slot.cond.notify_all()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": sum(1 for s in self._slots.values() if s.busy),
+                "waiting": sum(1 for s in self._slots.values() if s.waiting is not None),
+                "admitted": self.admitted,
+                "superseded": self.superseded,
+                "timed_out": self.timed_out,
+            }
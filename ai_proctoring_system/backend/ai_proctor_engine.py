@@ -1,14 +1,24 @@
 import cv2
 import base64
+import asyncio
+import json
+import os
+import threading
+import time
 import numpy as np
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from ultralytics import YOLO
 import uvicorn
 import io
 from PIL import Image
 
+import cpu_budget
+from memory_guard import MemoryGuard
+
 app = FastAPI(title="AI Proctoring Engine", version="1.0.0")
 
 # Enable CORS so the React frontend can call this server
@@ -20,11 +30,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Thread budget for torch/OpenCV and the inference thread pool (see cpu_budget.py)
+cpu_plan = cpu_budget.configure('engine')
+
 # Load YOLOv8 nano model (lightweight & fast for real-time CPU inference)
 print("Loading YOLOv8 model...")
 model = YOLO('yolov8n.pt')
 print("YOLOv8 model loaded successfully!")
 
+# One Ultralytics instance is not safe to call from several threads at once, and the
+# request thread pool runs up to request_threads calls in parallel: decode in parallel,
+# predict one frame at a time (torch already spreads a single call over its threads).
+model_lock = threading.Lock()
+
+
+def predict(frame, **kwargs):
+    with model_lock:
+        return model(frame, verbose=False, **kwargs)[0]
+
 # Request model for incoming base64 image data
 class DetectionRequest(BaseModel):
     image: str
@@ -46,79 +69,340 @@ PROHIBITED_CLASSES = {
 async def health_check():
     return {"status": "AI Proctoring Engine is running", "model": "YOLOv8n"}
 
+
+@app.on_event("startup")
+async def limit_worker_threads():
+    # run_in_threadpool defaults to 40 threads; keep decode/inference within the CPU plan
+    import anyio.to_thread
+    anyio.to_thread.current_default_thread_limiter().total_tokens = max(2, cpu_plan["request_threads"])
+
+# ─── Streaming config ────────────────────────────────────────────────────────
+NO_FACE_TIMEOUT     = 10   # seconds without a person before STOP_EXAM is pushed
+STREAM_AUTH_TIMEOUT = 5    # seconds a new socket has to send its auth message
+STREAM_SEND_QUEUE   = 8    # max outgoing messages buffered per connection
+# Optional shared secret; when set, the auth message must carry a matching token
+STREAM_TOKEN = os.environ.get("PROCTOR_STREAM_TOKEN")
+ADMIN_TOKEN  = os.environ.get("ADMIN_TOKEN")   # /admin/memory is disabled unless set
+
+# Open streams, for memory accounting; over MEMORY_LIMIT_MB the longest-idle ones are
+# closed with 1013 (try again later) so the client reconnects (see memory_guard.py)
+streams = {}
+memory = MemoryGuard(
+    limit_bytes=int(os.environ.get('MEMORY_LIMIT_MB', 0)) * 1024 * 1024,
+    min_idle=float(os.environ.get('MEMORY_MIN_IDLE', 60)),
+    interval=float(os.environ.get('MEMORY_CHECK_INTERVAL', 15)),
+    trace_frames=int(os.environ.get('MEMORY_TRACE_FRAMES', 0)),
+)
+
+
+def decode_base64_frame(image_data):
+    """Decode a base64 (optionally data-URL prefixed) image → OpenCV BGR frame."""
+    if "," in image_data:
+        _, encoded = image_data.split(",", 1)
+    else:
+        encoded = image_data
+    return decode_jpeg_bytes(base64.b64decode(encoded))
+
+
+def decode_jpeg_bytes(data):
+    """Decode raw JPEG/PNG bytes → OpenCV BGR frame."""
+    img = Image.open(io.BytesIO(data)).convert("RGB")
+    return cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
+
+
+def analyze_frame(frame):
+    """Run YOLO on one frame and build the detection response."""
+    results_data = {
+        "objects": [],
+        "face_detected": True,
+        "alerts": [],
+        "risk_score": 0
+    }
+
+    # --- Run YOLOv8 inference ---
+    yolo_results = predict(frame)
+
+    person_count = 0
+    detected_objects = []
+    cumulative_risk = 0
+
+    for box in yolo_results.boxes:
+        cls_id = int(box.cls[0])
+        label = yolo_results.names[cls_id]
+        conf = float(box.conf[0])
+        coords = box.xyxy[0].tolist()  # [x1, y1, x2, y2]
+
+        if label == 'person':
+            person_count += 1
+            continue 
+
+        # Check if this is a prohibited object
+        if label in PROHIBITED_CLASSES and conf > 0.35:
+            detected_objects.append({
+                "name": label,
+                "accuracy": f"{conf * 100:.1f}%",
+                "box": [int(c) for c in coords]
+            })
+            risk = PROHIBITED_CLASSES[label]
+            cumulative_risk += risk
+            results_data["alerts"].append(f"PROHIBITED OBJECT DETECTED: {label.upper()} ({conf*100:.0f}%)")
+
+    results_data["objects"] = detected_objects
+
+    # --- Face / Person presence logic ---
+    if person_count == 0:
+        results_data["face_detected"] = False
+        results_data["alerts"].append("NO PERSON DETECTED IN FRAME")
+        cumulative_risk += 50
+    elif person_count > 1:
+        results_data["alerts"].append("MULTIPLE PERSONS DETECTED")
+        cumulative_risk += 100
+
+    results_data["risk_score"] = min(100, cumulative_risk)
+    return results_data
+
+
 @app.post("/proctor/detect")
 async def detect_cheating(request: DetectionRequest):
     try:
-        # --- Decode base64 image from frontend ---
-        image_data = request.image
-        if "," in image_data:
-            _, encoded = image_data.split(",", 1)
-        else:
-            encoded = image_data
-
-        data = base64.b64decode(encoded)
-        img = Image.open(io.BytesIO(data)).convert("RGB")
-        frame = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
+        frame = await run_in_threadpool(decode_base64_frame, request.image)
+        return await run_in_threadpool(analyze_frame, frame)
 
-        # --- Initialize response ---
-        results_data = {
+    except Exception as e:
+        print(f"Error processing frame: {e}")
+        return {
             "objects": [],
             "face_detected": True,
             "alerts": [],
-            "risk_score": 0
+            "error": str(e)
         }
 
-        # --- Run YOLOv8 inference ---
-        yolo_results = model(frame, verbose=False)[0]
-
-        person_count = 0
-        detected_objects = []
-        cumulative_risk = 0
-
-        for box in yolo_results.boxes:
-            cls_id = int(box.cls[0])
-            label = yolo_results.names[cls_id]
-            conf = float(box.conf[0])
-            coords = box.xyxy[0].tolist()  # [x1, y1, x2, y2]
-
-            if label == 'person':
-                person_count += 1
-                continue 
-
-            # Check if this is a prohibited object
-            if label in PROHIBITED_CLASSES and conf > 0.35:
-                detected_objects.append({
-                    "name": label,
-                    "accuracy": f"{conf * 100:.1f}%",
-                    "box": [int(c) for c in coords]
-                })
-                risk = PROHIBITED_CLASSES[label]
-                cumulative_risk += risk
-                results_data["alerts"].append(f"PROHIBITED OBJECT DETECTED: {label.upper()} ({conf*100:.0f}%)")
-
-        results_data["objects"] = detected_objects
-
-        # --- Face / Person presence logic ---
-        if person_count == 0:
-            results_data["face_detected"] = False
-            results_data["alerts"].append("NO PERSON DETECTED IN FRAME")
-            cumulative_risk += 50
-        elif person_count > 1:
-            results_data["alerts"].append("MULTIPLE PERSONS DETECTED")
-            cumulative_risk += 100
-
-        results_data["risk_score"] = min(100, cumulative_risk)
-        return results_data
 
+@app.post("/proctor/infer")
+async def infer_raw(request: Request, conf: float = 0.25):
+    """
+    Raw detections for other backends (e.g. the Django app) that keep their
+    own proctoring rules. Body is the encoded image bytes, not base64 JSON.
+    """
+    data = await request.body()
+    if not data:
+        return {"error": "No image provided", "detections": []}
+    try:
+        frame = await run_in_threadpool(decode_jpeg_bytes, data)
+        results = await run_in_threadpool(predict, frame, conf=conf)
     except Exception as e:
         print(f"Error processing frame: {e}")
+        return {"error": str(e), "detections": []}
+
+    detections = []
+    for box in results.boxes:
+        cls_id = int(box.cls[0])
+        detections.append({
+            "object": results.names[cls_id],
+            "class_id": cls_id,
+            "confidence": float(box.conf[0]),
+            "box": box.xyxy[0].tolist()
+        })
+    return {"detections": detections, "shape": list(frame.shape[:2])}
+
+
+# ─── WebSocket streaming ─────────────────────────────────────────────────────
+class StreamSession:
+    """
+    Per-connection state for /proctor/stream.
+
+    Flow control: incoming frames land in a single "pending" slot, so a new
+    frame replaces one that has not been picked up yet (latest frame wins).
+    Outgoing results go through a bounded queue; when a slow client lets it
+    fill up, the oldest result is dropped. Events (STOP_EXAM) have their own
+    queue that is never trimmed and is drained first, so a burst of results
+    cannot evict them. Only the handful of events can queue without bound.
+    """
+
+    def __init__(self, websocket, session_id):
+        self.websocket = websocket
+        self.session_id = session_id
+        self.pending = None
+        self.frame_ready = asyncio.Event()
+        self.outbox = asyncio.Queue(maxsize=STREAM_SEND_QUEUE)
+        self.events = asyncio.Queue()
+        self.outgoing = asyncio.Event()
+        self.last_face_timestamp = time.time()
+        self.last_frame = time.time()
+        self.closed = False
+        self.seq = 0
+        self.frames_received = 0
+        self.frames_dropped = 0
+        self.results_dropped = 0
+
+    def offer_frame(self, data):
+        self.seq += 1
+        self.frames_received += 1
+        self.last_frame = time.time()
+        if self.pending is not None:
+            self.frames_dropped += 1
+        self.pending = (self.seq, data)
+        self.frame_ready.set()
+
+    def send(self, message):
+        """Queue a message without blocking; evict the oldest result if full. Events are never dropped."""
+        if message.get("type") == "event":
+            self.events.put_nowait(message)
+        else:
+            if self.outbox.full():
+                try:
+                    self.outbox.get_nowait()
+                    self.results_dropped += 1
+                except asyncio.QueueEmpty:
+                    pass
+            self.outbox.put_nowait(message)
+        self.outgoing.set()
+
+    async def next_message(self):
+        """Next message for the client, events before results."""
+        while True:
+            for queue in (self.events, self.outbox):
+                if not queue.empty():
+                    return queue.get_nowait()
+            self.outgoing.clear()
+            await self.outgoing.wait()
+
+    def stats(self):
         return {
-            "objects": [],
-            "face_detected": True,
-            "alerts": [],
-            "error": str(e)
+            "received": self.frames_received,
+            "dropped_frames": self.frames_dropped,
+            "dropped_results": self.results_dropped,
         }
 
+
+async def _stream_inference(session):
+    while not session.closed:
+        await session.frame_ready.wait()
+        session.frame_ready.clear()
+        if session.pending is None:
+            continue
+        seq, data = session.pending
+        session.pending = None
+        try:
+            frame = await run_in_threadpool(decode_jpeg_bytes, data)
+            result = await run_in_threadpool(analyze_frame, frame)
+        except Exception as e:
+            session.send({"type": "error", "seq": seq, "error": str(e)})
+            continue
+
+        if result["face_detected"]:
+            session.last_face_timestamp = time.time()
+        result.update({"type": "result", "seq": seq, "flow": session.stats()})
+        session.send(result)
+
+
+async def _stream_watchdog(session):
+    """Push STOP_EXAM even when the client has stopped sending frames."""
+    while not session.closed:
+        no_face_duration = time.time() - session.last_face_timestamp
+        if no_face_duration > NO_FACE_TIMEOUT:
+            session.send({
+                "type": "event",
+                "action": "STOP_EXAM",
+                "reason": f"No face detected for {int(no_face_duration)} seconds.",
+                "violation": True
+            })
+            return
+        await asyncio.sleep(1)
+
+
+async def _stream_sender(session):
+    while True:
+        message = await session.next_message()
+        await session.websocket.send_text(json.dumps(message))
+        if message.get("action") == "STOP_EXAM":
+            await session.websocket.close(code=1000)
+            return
+
+
+@app.websocket("/proctor/stream")
+async def stream_frames(websocket: WebSocket):
+    """
+    Persistent frame stream for one exam session.
+
+    Protocol:
+      1. client → {"type": "auth", "session_id": "...", "token": "..."}  (text)
+      2. server → {"type": "ready", "session_id": "..."}
+      3. client → raw JPEG bytes (binary), one message per frame
+         server → {"type": "result", "seq": n, ...}  for the newest frame
+         server → {"type": "event", "action": "STOP_EXAM", ...}  on timeout
+    """
+    await websocket.accept()
+    try:
+        hello = await asyncio.wait_for(websocket.receive_json(), STREAM_AUTH_TIMEOUT)
+    except Exception:
+        await websocket.close(code=1008)
+        return
+
+    if not isinstance(hello, dict):
+        hello = {}
+    session_id = hello.get("session_id")
+    if hello.get("type") != "auth" or not session_id or (STREAM_TOKEN and hello.get("token") != STREAM_TOKEN):
+        await websocket.send_text(json.dumps({"type": "error", "error": "authentication failed"}))
+        await websocket.close(code=1008)
+        return
+
+    session = StreamSession(websocket, session_id)
+    streams[id(session)] = session
+    await websocket.send_text(json.dumps({"type": "ready", "session_id": session_id}))
+    print(f"🔌 Stream opened: {session_id}")
+
+    tasks = [
+        asyncio.create_task(_stream_inference(session)),
+        asyncio.create_task(_stream_watchdog(session)),
+        asyncio.create_task(_stream_sender(session)),
+    ]
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                session.offer_frame(message["bytes"])
+            elif message.get("text"):
+                # Text frames after auth are only used for keep-alive pings
+                session.send({"type": "pong", "flow": session.stats()})
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        session.closed = True
+        session.frame_ready.set()
+        streams.pop(id(session), None)
+        for task in tasks:
+            task.cancel()
+        print(f"🔌 Stream closed: {session_id} {session.stats()}")
+
+# ─── Memory accounting ───────────────────────────────────────────────────────
+def memory_sessions():
+    return [(key, s.last_frame, {"pending_frame": len(s.pending[1]) if s.pending else 0})
+            for key, s in list(streams.items())]
+
+
+@app.on_event("startup")
+async def start_memory_guard():
+    loop = asyncio.get_running_loop()
+
+    def evict(keys):
+        for key in keys:
+            session = streams.get(key)
+            if session is not None:
+                asyncio.run_coroutine_threadsafe(session.websocket.close(code=1013), loop)
+
+    memory.start(memory_sessions, evict)
+
+
+@app.get("/admin/memory")
+async def admin_memory(request: Request):
+    if not ADMIN_TOKEN or request.headers.get("X-Admin-Token") != ADMIN_TOKEN:
+        return JSONResponse({"error": "Admin token required"}, status_code=403)
+    return memory.last or {"status": "no check yet"}
+
+
 if __name__ == "__main__":
     print("Starting AI Proctoring Engine on http://0.0.0.0:8001")
     uvicorn.run(app, host="0.0.0.0", port=8001, reload=False)
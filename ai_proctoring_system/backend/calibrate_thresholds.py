@@ -0,0 +1,260 @@
+"""
+Threshold Calibration: cache raw predictions once, sweep thresholds instantly
+Run: python calibrate_thresholds.py collect --corpus eval_corpus/ --cache calib_cache/
+     python calibrate_thresholds.py sweep --cache calib_cache/
+
+collect  runs each model ONCE over an eval_corpus.py corpus at a near-zero
+         confidence and stores every raw detection as columnar .npy files:
+             frame.npy  int32    corpus frame index
+             label.npy  int16    index into meta.json "labels" (raw model label)
+             score.npy  float32  confidence
+             box.npy    float32  x1, y1, x2, y2
+             model.npy  int8     index into meta.json "models"
+         plus meta.json (corpus items with their true labels, label vocabulary).
+
+sweep    memory-maps the cache and scores every combination of
+         CONF_OBJECT x CONF_PERSON x PROHIBITED_CLASSES subset x objects→airpods
+         remap on/off with vectorized numpy, then prints the best configurations
+         next to the current detection_rules.py one.
+
+Scoring is micro F-beta over eval_corpus.EVAL_CLASSES (beta > 1 favours recall).
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+
+import numpy as np
+
+from detection_rules import CONF_OBJECT, CONF_PERSON, LABEL_ALIASES, PROHIBITED_CLASSES
+from eval_corpus import EVAL_CLASSES, load_corpus, normalise
+
+CACHE_VERSION = 1
+COLUMNS = ('frame', 'label', 'score', 'box', 'model')
+
+
+# ─── Collect ──────────────────────────────────────────────────────────────────
+def collect(args):
+    from ultralytics import YOLO
+
+    items = load_corpus(args.corpus)
+    if not items:
+        raise SystemExit("❌ Corpus is empty")
+    os.makedirs(args.cache, exist_ok=True)
+
+    vocab, vocab_index = [], {}
+    cols = {name: [] for name in COLUMNS}
+    t0 = time.time()
+
+    for model_idx, weights in enumerate(args.model):
+        print(f"📦 {weights}: {len(items)} frames at conf={args.conf}")
+        model = YOLO(weights)
+        for start in range(0, len(items), args.batch):
+            chunk = items[start:start + args.batch]
+            results = model([item.load() for item in chunk], verbose=False,
+                            conf=args.conf, imgsz=args.imgsz, device=args.device)
+            for offset, res in enumerate(results):
+                boxes = res.boxes
+                n = len(boxes)
+                if not n:
+                    continue
+                ids = []
+                for c in boxes.cls.tolist():
+                    name = model.names[int(c)]
+                    if name not in vocab_index:
+                        vocab_index[name] = len(vocab)
+                        vocab.append(name)
+                    ids.append(vocab_index[name])
+                cols['frame'].append(np.full(n, start + offset, dtype=np.int32))
+                cols['label'].append(np.asarray(ids, dtype=np.int16))
+                cols['score'].append(boxes.conf.cpu().numpy().astype(np.float32))
+                cols['box'].append(boxes.xyxy.cpu().numpy().astype(np.float32))
+                cols['model'].append(np.full(n, model_idx, dtype=np.int8))
+
+    empty = {'frame': np.int32, 'label': np.int16, 'score': np.float32, 'model': np.int8}
+    for name in COLUMNS:
+        if cols[name]:
+            arr = np.concatenate(cols[name])
+        elif name == 'box':
+            arr = np.zeros((0, 4), dtype=np.float32)
+        else:
+            arr = np.zeros(0, dtype=empty[name])
+        np.save(os.path.join(args.cache, f"{name}.npy"), arr)
+
+    meta = {
+        'version': CACHE_VERSION,
+        'corpus': os.path.abspath(args.corpus),
+        'models': args.model,
+        'conf_floor': args.conf,
+        'imgsz': args.imgsz,
+        'labels': vocab,
+        'items': [{'id': item.id, 'labels': sorted(item.labels)} for item in items],
+    }
+    with open(os.path.join(args.cache, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=1)
+    total = sum(len(c) for c in cols['score'])
+    print(f"💾 {total} detections for {len(items)} frames cached in {args.cache} ({time.time() - t0:.1f}s)")
+
+
+# ─── Sweep ────────────────────────────────────────────────────────────────────
+def load_cache(cache_dir):
+    with open(os.path.join(cache_dir, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('version') != CACHE_VERSION:
+        raise SystemExit(f"❌ {cache_dir} was written by a different version; re-run collect")
+    cols = {name: np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode='r') for name in COLUMNS}
+    return meta, cols
+
+
+def frame_max(frames, scores, mask, n_frames):
+    """Highest score per frame among the masked detections (0 where none)."""
+    out = np.zeros(n_frames, dtype=np.float32)
+    np.maximum.at(out, frames[mask], scores[mask])
+    return out
+
+
+def second_highest(frames, scores, mask, n_frames):
+    """Second-highest score per frame: a frame has 2+ persons above t iff this is >= t."""
+    f, s = frames[mask], scores[mask]
+    order = np.lexsort((-s, f))
+    f, s = f[order], s[order]
+    rank = np.arange(len(f)) - np.searchsorted(f, f)   # position within its frame
+    out = np.zeros(n_frames, dtype=np.float32)
+    out[f[rank == 1]] = s[rank == 1]
+    return out
+
+
+def counts(flagged, truth):
+    """flagged (F, T) bool, truth (F,) bool → tp, fp per threshold."""
+    return (flagged & truth[:, None]).sum(0), (flagged & ~truth[:, None]).sum(0)
+
+
+def sweep(args):
+    meta, cols = load_cache(args.cache)
+    vocab = meta['labels']
+    n_frames = len(meta['items'])
+
+    keep = np.isin(cols['model'], args.use_models) if args.use_models else np.ones(len(cols['score']), bool)
+    frames = np.asarray(cols['frame'])[keep]
+    labels = np.asarray(cols['label'])[keep]
+    scores = np.asarray(cols['score'])[keep]
+
+    floor = meta['conf_floor']
+    obj_grid = np.round(np.arange(max(args.min_conf, floor), args.max_conf + 1e-9, args.step), 4)
+    per_grid = np.round(np.arange(max(args.min_conf, floor), args.max_conf + 1e-9, args.step), 4)
+
+    truth = {cls: np.array([cls in item['labels'] for item in meta['items']]) for cls in EVAL_CLASSES}
+    support = {cls: int(t.sum()) for cls, t in truth.items()}
+
+    # Labels that may appear in PROHIBITED_CLASSES: today's set plus every alias target
+    candidates = sorted(set(PROHIBITED_CLASSES) | set(LABEL_ALIASES.values()))
+    if len(candidates) > args.max_subset_labels:
+        raise SystemExit(f"❌ {len(candidates)} candidate labels → too many subsets; raise --max-subset-labels")
+    subsets = np.array(list(itertools.product([0, 1], repeat=len(candidates))), dtype=np.int64)  # (S, C)
+
+    # multiple_persons: independent of remap and subset
+    person_ids = [i for i, name in enumerate(vocab) if name == 'person']
+    s2 = second_highest(frames, scores, np.isin(labels, person_ids), n_frames)
+    mp_tp, mp_fp = counts(s2[:, None] >= per_grid[None, :], truth['multiple_persons'])    # (Tp,)
+
+    # Per remap state and candidate label: tp / fp over the object threshold grid
+    tp = np.zeros((2, len(candidates), len(obj_grid)), dtype=np.int64)
+    fp = np.zeros_like(tp)
+    cls_of = [normalise(c) for c in candidates]
+    for remap in (0, 1):
+        gate = [LABEL_ALIASES.get(name, name) if remap else name for name in vocab]
+        for ci, cand in enumerate(candidates):
+            ids = [i for i, g in enumerate(gate) if g == cand]
+            if not ids or cls_of[ci] not in truth:
+                continue
+            best = frame_max(frames, scores, np.isin(labels, ids), n_frames)
+            tp[remap, ci], fp[remap, ci] = counts(best[:, None] >= obj_grid[None, :], truth[cls_of[ci]])
+
+    # Micro totals for every (remap, subset, conf_object, conf_person): linear in the subset mask
+    obj_tp = np.einsum('sc,rct->rst', subsets, tp)                      # (2, S, To)
+    obj_fp = np.einsum('sc,rct->rst', subsets, fp)
+    total_support = sum(support[c] for c in EVAL_CLASSES)
+    TP = obj_tp[..., None] + mp_tp[None, None, None, :]                 # (2, S, To, Tp)
+    FP = obj_fp[..., None] + mp_fp[None, None, None, :]
+    FN = np.maximum(total_support - TP, 0)
+    b2 = args.beta ** 2
+    denom = (1 + b2) * TP + b2 * FN + FP
+    fbeta = np.where(denom > 0, (1 + b2) * TP / np.maximum(denom, 1), 0.0)
+    print(f"🔎 {fbeta.size} configurations scored over {n_frames} frames")
+
+    def describe(idx):
+        r, s, to, tpi = idx
+        chosen = [c for c, m in zip(candidates, subsets[s]) if m]
+        return {
+            'remap': bool(r), 'conf_object': float(obj_grid[to]), 'conf_person': float(per_grid[tpi]),
+            'prohibited': chosen, 'fbeta': float(fbeta[idx]),
+            'precision': float(TP[idx] / max(TP[idx] + FP[idx], 1)), 'recall': float(TP[idx] / max(total_support, 1)),
+        }
+
+    top = np.argsort(fbeta, axis=None)[::-1][:args.top]
+    ranked = [describe(np.unravel_index(i, fbeta.shape)) for i in top]
+
+    current_subset = np.array([1 if c in PROHIBITED_CLASSES else 0 for c in candidates])
+    cur_s = int(np.flatnonzero((subsets == current_subset).all(1))[0])
+    cur_to = int(np.abs(obj_grid - CONF_OBJECT).argmin())
+    cur_tp = int(np.abs(per_grid - CONF_PERSON).argmin())
+    current = describe((1, cur_s, cur_to, cur_tp))
+
+    print(f"\n   {'F':>6}{'P':>7}{'R':>7}  {'obj':>5} {'per':>5}  remap  prohibited")
+    for row in [current] + ranked:
+        tag = '  ← current' if row is current else ''
+        print(f"   {row['fbeta']:6.3f}{row['precision']:7.3f}{row['recall']:7.3f}  {row['conf_object']:5.2f} "
+              f"{row['conf_person']:5.2f}  {'on ' if row['remap'] else 'off'}    {', '.join(row['prohibited'])}{tag}")
+
+    best = ranked[0]
+    print("\n✅ Recommended detection_rules.py settings:")
+    print(f"   CONF_OBJECT = {best['conf_object']}")
+    print(f"   CONF_PERSON = {best['conf_person']}")
+    print(f"   PROHIBITED_CLASSES = {set(best['prohibited'])!r}")
+    print(f"   LABEL_ALIASES = {LABEL_ALIASES!r}" if best['remap'] else "   LABEL_ALIASES = {}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'cache': os.path.abspath(args.cache), 'beta': args.beta,
+                       'current': current, 'ranked': ranked}, f, indent=2)
+        print(f"💾 Sweep written to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache raw detections and sweep detection thresholds")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    c = sub.add_parser('collect', help='Run models once over a corpus and cache raw detections')
+    c.add_argument('--corpus', required=True)
+    c.add_argument('--cache', required=True)
+    c.add_argument('--model', action='append', help='Weights (repeat; default: the Flask backend pair)')
+    c.add_argument('--conf', type=float, default=0.01, help='Confidence floor for cached detections')
+    c.add_argument('--imgsz', type=int, default=640)
+    c.add_argument('--batch', type=int, default=8)
+    c.add_argument('--device', default=None)
+
+    s = sub.add_parser('sweep', help='Score threshold combinations against a cache')
+    s.add_argument('--cache', required=True)
+    s.add_argument('--beta', type=float, default=1.0, help='F-beta weight (>1 favours recall)')
+    s.add_argument('--min-conf', type=float, default=0.05)
+    s.add_argument('--max-conf', type=float, default=0.95)
+    s.add_argument('--step', type=float, default=0.02)
+    s.add_argument('--use-models', type=lambda v: [int(x) for x in v.split(',')],
+                   help='Only use detections from these model indexes (e.g. 0 = base only)')
+    s.add_argument('--max-subset-labels', type=int, default=12)
+    s.add_argument('--top', type=int, default=10)
+    s.add_argument('--output', help='Write ranked configurations as JSON')
+
+    args = parser.parse_args()
+    if args.command == 'collect':
+        if not args.model:
+            custom = 'runs/detect/custom_proctor/weights/best.pt'
+            args.model = ['yolo11n.pt'] + ([custom] if os.path.exists(custom) else [])
+        collect(args)
+    else:
+        sweep(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+"""
+Schedule-driven pre-warming of detect workers.
+
+Exams start on the hour and every client arrives within seconds, so capacity
+has to exist before the first frame. The planner reads upcoming exams (start,
+duration, expected students) from a local schedule file or from the Supabase
+`exams` table (`starts_at` / `expected_students`, see
+database/04_exam_schedule.sql). Each tick it predicts how many students will be
+sending frames over the next `lead` seconds, turns that into a worker count,
+and reconciles: it starts local Flask workers early enough to load their
+models, warms each through /admin/warmup (decode and inference without
+creating a session), registers it with session_router.py, and once exams are
+over drains surplus workers through the router and stops them (a worker whose
+drain fails keeps running and is drained again next tick). Every tick is
+appended to a JSON-lines log with the predicted load next to the sessions the
+workers report on /metrics.
+
+Schedule file (JSON list):
+
+    [{"exam_id": "midterm-a", "starts_at": "2026-05-04T09:00:00+00:00",
+      "duration_minutes": 90, "students": 240}]
+
+Run next to a router:
+
+    ADMIN_TOKEN=secret python session_router.py --listen 5001
+    ADMIN_TOKEN=secret python capacity_planner.py --schedule schedule.json --router http://127.0.0.1:5001
+"""
+import argparse
+import json
+import math
+import os
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from session_router import spawn_backend
+
+
+def parse_time(value):
+    """ISO-8601 (a trailing Z is accepted) → unix time; naive times are UTC."""
+    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _exam(exam_id, starts_at, duration_minutes, students):
+    start = parse_time(starts_at)
+    return {"exam_id": str(exam_id), "start": start,
+            "end": start + 60 * float(duration_minutes or 60), "students": int(students)}
+
+
+def load_schedule(path, default_students):
+    with open(path, encoding='utf-8') as f:
+        rows = json.load(f)
+    return [_exam(r['exam_id'], r['starts_at'], r.get('duration_minutes'), r.get('students') or default_students)
+            for r in rows]
+
+
+def load_supabase(url, key, horizon, default_students, now=None):
+    """Exams that are running or start within `horizon` seconds."""
+    from supabase import create_client
+    now = now or time.time()
+    since = datetime.fromtimestamp(now - 86400, timezone.utc).isoformat()
+    until = datetime.fromtimestamp(now + horizon, timezone.utc).isoformat()
+    resp = (create_client(url, key).table("exams")
+            .select("id,starts_at,duration_minutes,expected_students")
+            .gte("starts_at", since).lte("starts_at", until).execute())
+    return [_exam(r['id'], r['starts_at'], r.get('duration_minutes'), r.get('expected_students') or default_students)
+            for r in (resp.data or []) if r.get('starts_at')]
+
+
+class CapacityPlanner:
+    def __init__(self, students_per_worker=40, min_workers=1, max_workers=8, lead=300.0, ramp=120.0,
+                 grace=600.0, first_port=5011, router=None, admin_token=None, log_path='capacity_log.jsonl'):
+        self.students_per_worker = students_per_worker
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.lead = lead              # look this far ahead (must cover worker start + warm-up)
+        self.ramp = ramp              # clients connect this long before the start time
+        self.grace = grace            # and trickle out this long after the end
+        self.first_port = first_port
+        self.router = router.rstrip('/') if router else None
+        self.admin_headers = {'X-Admin-Token': admin_token} if admin_token else {}
+        self.log_path = log_path
+        self.workers = {}             # port → {"proc", "url", "state": starting|ready, "since"}
+        self.client = httpx.Client(timeout=30.0)
+
+    # ─── Prediction ─────────────────────────────────────────────────────────
+    def predicted_students(self, exams, at):
+        return sum(e["students"] for e in exams if e["start"] - self.ramp <= at <= e["end"] + self.grace)
+
+    def target(self, exams, now):
+        """Workers needed for the peak load predicted over [now, now + lead]."""
+        steps = max(1, int(self.lead // 30))
+        peak = max(self.predicted_students(exams, now + self.lead * i / steps) for i in range(steps + 1))
+        need = math.ceil(peak / self.students_per_worker) if peak else 0
+        return min(self.max_workers, max(self.min_workers, need)), peak
+
+    # ─── Workers ────────────────────────────────────────────────────────────
+    def _free_port(self):
+        port = self.first_port
+        while port in self.workers:
+            port += 1
+        return port
+
+    def start_worker(self):
+        port = self._free_port()
+        proc = spawn_backend(port, self.max_workers)
+        self.workers[port] = {"proc": proc, "url": f"http://127.0.0.1:{port}", "state": "starting",
+                              "since": time.time()}
+        print(f"🚀 Starting worker :{port}")
+
+    def warm(self, url):
+        """Decode + inference once on the worker without creating a session (needs ADMIN_TOKEN)."""
+        if self.admin_headers:
+            self.client.post(url + '/admin/warmup', headers=self.admin_headers).raise_for_status()
+
+    def promote_ready(self):
+        """Starting workers that answer /health: warm, register with the router, mark ready."""
+        for port, w in self.workers.items():
+            if w["state"] != "starting":
+                continue
+            if w["proc"].poll() is not None:
+                print(f"❌ Worker :{port} exited with {w['proc'].returncode}")
+                w["state"] = "dead"
+                continue
+            try:
+                if self.client.get(w["url"] + '/health', timeout=2.0).status_code != 200:
+                    continue
+                self.warm(w["url"])
+                if self.router:
+                    self.client.post(self.router + '/router/nodes', json={"url": w["url"]},
+                                     headers=self.admin_headers).raise_for_status()
+            except httpx.HTTPError:
+                continue      # still loading models (or the router is busy); retry next tick
+            w["state"] = "ready"
+            print(f"✅ Worker :{port} warm after {time.time() - w['since']:.0f}s")
+        for port in [p for p, w in self.workers.items() if w["state"] == "dead"]:
+            del self.workers[port]
+
+    def stop_worker(self, port, force=False):
+        """Drain through the router (sessions migrate), then stop the process.
+
+        If the drain fails the worker may still hold sessions: it is kept (False) and
+        drained again on the next tick, unless `force` (shutdown).
+        """
+        w = self.workers[port]
+        if self.router and w["state"] == "ready":
+            try:
+                self.client.request('DELETE', self.router + '/router/nodes', json={"url": w["url"]},
+                                    headers=self.admin_headers).raise_for_status()
+            except httpx.HTTPError as e:
+                print(f"⚠️ Router drain of :{port} failed: {e}")
+                if not force:
+                    return False
+        del self.workers[port]
+        w["proc"].terminate()
+        try:
+            w["proc"].wait(timeout=30)
+        except Exception:
+            w["proc"].kill()
+        print(f"🛑 Stopped worker :{port}")
+        return True
+
+    def reconcile(self, target):
+        for _ in range(target - len(self.workers)):
+            self.start_worker()
+        surplus = len(self.workers) - target
+        if surplus > 0:
+            # Newest first; a worker still starting holds no sessions
+            for port in sorted(self.workers, key=lambda p: (self.workers[p]["state"] == "ready",
+                                                            -self.workers[p]["since"]))[:surplus]:
+                self.stop_worker(port)
+        self.promote_ready()
+
+    def observed_sessions(self):
+        total = 0
+        for w in self.workers.values():
+            if w["state"] != "ready":
+                continue
+            try:
+                total += self.client.get(w["url"] + '/metrics', timeout=2.0).json().get("sessions", 0)
+            except (httpx.HTTPError, ValueError):
+                pass
+        return total
+
+    # ─── Loop ───────────────────────────────────────────────────────────────
+    def tick(self, exams, now=None):
+        now = now or time.time()
+        target, peak = self.target(exams, now)
+        self.reconcile(target)
+        entry = {
+            "ts": now,
+            "exams_active": [e["exam_id"] for e in exams if e["start"] - self.ramp <= now <= e["end"] + self.grace],
+            "predicted_students": self.predicted_students(exams, now),
+            "predicted_peak_in_lead": peak,
+            "target_workers": target,
+            "workers": {s: sum(1 for w in self.workers.values() if w["state"] == s) for s in ("starting", "ready")},
+            "observed_sessions": self.observed_sessions(),
+        }
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+        print(f"📈 predicted {entry['predicted_students']} students (peak {peak} within {int(self.lead)}s), "
+              f"observed {entry['observed_sessions']} sessions — {entry['workers']['ready']}/{target} workers ready")
+        return entry
+
+    def shutdown(self):
+        for port in list(self.workers):
+            self.stop_worker(port, force=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-warm detect workers ahead of scheduled exams")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--schedule', help="local JSON schedule file")
+    source.add_argument('--supabase', action='store_true', help="read exams.starts_at / expected_students")
+    parser.add_argument('--router', default=None, help="session_router.py base URL to register workers with")
+    parser.add_argument('--students-per-worker', type=int, default=int(os.environ.get('PLANNER_STUDENTS_PER_WORKER', 40)))
+    parser.add_argument('--default-students', type=int, default=30, help="when an exam has no expected count")
+    parser.add_argument('--min-workers', type=int, default=1)
+    parser.add_argument('--max-workers', type=int, default=8)
+    parser.add_argument('--lead', type=float, default=300.0, help="seconds ahead to provision for")
+    parser.add_argument('--grace', type=float, default=600.0, help="seconds after an exam ends to keep capacity")
+    parser.add_argument('--tick', type=float, default=15.0)
+    parser.add_argument('--refresh', type=float, default=60.0, help="seconds between schedule reloads")
+    parser.add_argument('--first-port', type=int, default=5011)
+    parser.add_argument('--log', default='capacity_log.jsonl')
+    args = parser.parse_args()
+
+    planner = CapacityPlanner(
+        students_per_worker=args.students_per_worker, min_workers=args.min_workers, max_workers=args.max_workers,
+        lead=args.lead, grace=args.grace, first_port=args.first_port, router=args.router,
+        admin_token=os.environ.get('ADMIN_TOKEN'), log_path=args.log,
+    )
+    if not os.environ.get('ADMIN_TOKEN'):
+        print("⚠️ ADMIN_TOKEN not set — workers are not warmed beyond model load"
+              + (" and the router will refuse to register them" if args.router else ""))
+
+    exams, loaded = [], 0.0
+    try:
+        while True:
+            if time.time() - loaded > args.refresh:
+                try:
+                    exams = (load_schedule(args.schedule, args.default_students) if args.schedule else
+                             load_supabase(os.environ['SUPABASE_URL'], os.environ['SUPABASE_KEY'],
+                                           args.lead + 86400, args.default_students))
+                    loaded = time.time()
+                except Exception as e:
+                    print(f"⚠️ Could not load the exam schedule: {e}")
+            planner.tick(exams)
+            time.sleep(args.tick)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        planner.shutdown()
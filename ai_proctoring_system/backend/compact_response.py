@@ -0,0 +1,83 @@
+"""
+Compact binary responses for /proctor/detect (opt-in via the Accept header).
+
+    Accept: application/msgpack                      → compact MessagePack
+    Accept: application/vnd.proctor.delta+msgpack    → compact, changes only
+
+Anything else gets the normal JSON response. Compact payloads use short keys,
+keep only person/prohibited detections and quantize them to integers:
+
+    p  person_count        o  [[label, conf_pct, x1, y1, x2, y2], ...] (no box: [label, conf_pct])
+    v  violation           d  {"o": object, "c": conf_pct, "m": msg} or None
+    mv movement_alert      s  status       q  quality_level
+    w  warning             a  action       r  reason
+    sp superseded          ru reused
+
+Delta mode: every payload carries a sequence number "n". The client echoes the
+last one it applied as "ack" in the request body. If that matches what the
+server last sent, only changed keys are returned ("b" = base seq, "x" = keys
+that disappeared); otherwise a full payload with "f": true.
+"""
+try:
+    import msgpack
+except ImportError:       # compact mode is simply not offered
+    msgpack = None
+
+MSGPACK = 'application/msgpack'
+MSGPACK_DELTA = 'application/vnd.proctor.delta+msgpack'
+
+KEYS = {
+    'person_count': 'p', 'violation': 'v', 'movement_alert': 'mv', 'status': 's',
+    'quality_level': 'q', 'warning': 'w', 'action': 'a', 'reason': 'r',
+    'superseded': 'sp', 'reused': 'ru',
+}
+
+
+def negotiate(accept):
+    """Accept header → None (JSON), 'full' or 'delta'."""
+    if msgpack is None or not accept:
+        return None
+    accept = accept.lower()
+    if MSGPACK_DELTA in accept:
+        return 'delta'
+    if MSGPACK in accept or 'application/x-msgpack' in accept:
+        return 'full'
+    return None
+
+
+def compact(response, prohibited):
+    out = {short: response[key] for key, short in KEYS.items() if key in response}
+    if 'objects' in response:
+        out['o'] = [
+            [obj['name'], int(round(obj['accuracy'] * 100))] + [int(v) for v in obj.get('box', ())]
+            for obj in response['objects']
+            if obj['name'] == 'person' or obj['name'] in prohibited
+        ]
+    if 'violation_details' in response:
+        details = response['violation_details']
+        out['d'] = {
+            'o': details['object'],
+            'c': int(round(details.get('confidence', 1.0) * 100)),
+            'm': details.get('msg'),
+        } if details else None
+    return out
+
+
+def delta(state, payload, ack):
+    """Diff against the last payload sent to this session; updates the session state."""
+    seq = state.get('compact_seq', 0) + 1
+    last = state.get('compact_last')
+    state['compact_seq'], state['compact_last'] = seq, payload
+
+    if last is None or ack != seq - 1:
+        return {**payload, 'n': seq, 'f': True}
+    out = {k: v for k, v in payload.items() if last.get(k, ...) != v}
+    gone = [k for k in last if k not in payload]
+    if gone:
+        out['x'] = gone
+    out['n'], out['b'] = seq, seq - 1
+    return out
+
+
+def encode(payload):
+    return msgpack.packb(payload, use_bin_type=True)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -121,3 +122,24 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+
+
+# Proctoring inference service (ai_proctor_engine.py) and result persistence
+# Set PROCTOR_INFERENCE_UDS to reach the engine over a Unix socket instead of TCP.
+
+PROCTOR_INFERENCE_URL = os.environ.get('PROCTOR_INFERENCE_URL', 'http://127.0.0.1:8001')
+PROCTOR_INFERENCE_UDS = os.environ.get('PROCTOR_INFERENCE_UDS') or None
+PROCTOR_INFERENCE_TIMEOUT = 10.0
+
+PROCTOR_WRITER_BATCH_SIZE = 200
+PROCTOR_WRITER_FLUSH_INTERVAL = 2.0
+
+# Warm pool of standalone monitor workers (proctoring/monitor_pool.py)
+PROCTOR_MONITOR_POOL = {
+    'min_idle': 1,            # warm workers kept ready at all times
+    'max_idle': 4,            # upper bound while starts arrive in bursts
+    'max_sessions': 8,        # concurrent monitor sessions on this machine
+    'threads_per_worker': 2,  # OMP/MKL thread cap per monitor process
+    'niceness': 5,
+    'idle_ttl': 600,          # seconds before surplus idle workers are reaped
+}
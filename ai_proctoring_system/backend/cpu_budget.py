@@ -0,0 +1,234 @@
+"""
+CPU budgeting for inference processes (Flask backend, FastAPI engine, monitors).
+
+By default every process lets torch, OpenCV and the web server size their own
+thread pools from the machine's core count, so a box running several workers
+ends up with many times more busy threads than cores. At startup each process
+calls configure(role), which:
+
+  * finds the usable cores (affinity mask, capped by a cgroup CPU quota)
+  * claims a worker slot with a file lock, so N workers on one box each get a
+    disjoint share of cores (slot i of CPU_BUDGET_WORKERS)
+  * splits that share between torch intra-op threads, OpenCV threads and
+    concurrent inference requests, applies it and optionally pins affinity
+  * logs the plan
+
+Environment (all optional):
+  CPU_BUDGET_WORKERS          workers sharing this box in the same group (default 1)
+  CPU_BUDGET_GROUP            slot namespace (default: the role name)
+  CPU_BUDGET_SLOT             use this slot instead of claiming one
+  CPU_BUDGET_PIN=1            pin the process to its cores
+  CPU_BUDGET_TORCH_THREADS / CPU_BUDGET_CV2_THREADS / CPU_BUDGET_REQUEST_THREADS
+                              override the computed split
+  CPU_BUDGET_LOCK_DIR         where slot lock files live (default: temp dir)
+
+Benchmark configurations (W worker processes x T torch threads each):
+  python cpu_budget.py --bench 1x8 2x4 4x2 8x1 --pin --seconds 15
+"""
+import argparse
+import math
+import os
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:       # Windows: no slot claiming, every process uses slot 0
+    fcntl = None
+
+_slot_lock = None         # keeps the claimed slot's lock file open for the process lifetime
+
+
+# ─── Discovery ────────────────────────────────────────────────────────────────
+def usable_cpus():
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def cgroup_quota():
+    """CPU quota in cores from cgroup v2 or v1, or None when unlimited."""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+            period = int(f.read())
+        return quota / period if quota > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def claim_slot(group, workers, lock_dir=None):
+    """Take the first free slot 0..workers-1 in `group`; None if all are taken."""
+    global _slot_lock
+    if fcntl is None:
+        return 0
+    lock_dir = lock_dir or tempfile.gettempdir()
+    for slot in range(workers):
+        f = open(os.path.join(lock_dir, f"proctor-cpu-{group}-{slot}.lock"), 'w')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            continue
+        _slot_lock = f
+        return slot
+    return None
+
+
+# ─── Planning ─────────────────────────────────────────────────────────────────
+def plan(role, workers=1, slot=0, cpus=None, quota=None):
+    """Split this worker's share of cores between torch, OpenCV and request concurrency."""
+    cpus = cpus if cpus is not None else usable_cpus()
+    effective = len(cpus)
+    if quota:
+        effective = max(1, min(effective, math.floor(quota)))
+
+    share = max(1, effective // workers)
+    if slot is None:
+        # More workers than slots: share everything rather than fail
+        cores = cpus[:effective]
+    else:
+        start = (slot % workers) * share
+        cores = cpus[start:start + share] or cpus[:share]
+
+    n = len(cores)
+    # Two requests in flight keep the cores busy while one is decoding. Both
+    # backends serialize predict calls on their shared model (Ultralytics is not
+    # thread-safe), so torch gets every core and requests overlap only in decode
+    request_threads = 1 if n < 4 else max(2, n // 4)
+    torch_threads = n
+    cv2_threads = 1 if n < 8 else 2
+
+    return {
+        "role": role,
+        "usable_cpus": len(cpus),
+        "cgroup_quota": quota,
+        "workers": workers,
+        "slot": slot,
+        "cores": cores,
+        "torch_threads": int(os.environ.get('CPU_BUDGET_TORCH_THREADS', torch_threads)),
+        "cv2_threads": int(os.environ.get('CPU_BUDGET_CV2_THREADS', cv2_threads)),
+        "request_threads": int(os.environ.get('CPU_BUDGET_REQUEST_THREADS', request_threads)),
+        "pinned": False,
+    }
+
+
+def apply(p, pin=False):
+    try:
+        import torch
+        torch.set_num_threads(p["torch_threads"])
+    except ImportError:
+        pass
+    try:
+        import cv2
+        cv2.setNumThreads(p["cv2_threads"])
+    except ImportError:
+        pass
+    if pin and p["slot"] is not None and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, p["cores"])
+        p["pinned"] = True
+    return p
+
+
+def configure(role, workers=None):
+    """Claim a slot, compute and apply the plan for this process, and log it."""
+    workers = workers or int(os.environ.get('CPU_BUDGET_WORKERS', 1))
+    group = os.environ.get('CPU_BUDGET_GROUP', role)
+    if os.environ.get('CPU_BUDGET_SLOT'):
+        slot = int(os.environ['CPU_BUDGET_SLOT'])
+    else:
+        slot = claim_slot(group, workers, os.environ.get('CPU_BUDGET_LOCK_DIR'))
+
+    p = apply(plan(role, workers, slot, quota=cgroup_quota()),
+              pin=os.environ.get('CPU_BUDGET_PIN') == '1')
+
+    cores = p["cores"]
+    span = f"{cores[0]}-{cores[-1]}" if len(cores) > 1 else str(cores[0])
+    print(f"🧮 CPU plan [{role}]: slot {p['slot']}/{workers}, cores {span}"
+          f"{' (pinned)' if p['pinned'] else ''} | torch={p['torch_threads']} "
+          f"cv2={p['cv2_threads']} requests={p['request_threads']}"
+          f" | {p['usable_cpus']} usable cpus, quota={p['cgroup_quota'] or 'none'}")
+    if slot is None:
+        print(f"⚠️  All {workers} CPU slots in group '{group}' are taken — sharing all cores")
+    return p
+
+
+# ─── Benchmark ────────────────────────────────────────────────────────────────
+def _bench_worker(slot, workers, torch_threads, pin, weights, imgsz, seconds, start_at, results):
+    os.environ['CPU_BUDGET_TORCH_THREADS'] = str(torch_threads)
+    p = apply(plan('bench', workers, slot), pin=pin)
+
+    import numpy as np
+    from ultralytics import YOLO
+    model = YOLO(weights)
+    frame = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
+    model(frame, verbose=False, imgsz=imgsz)
+
+    # Start together so every worker measures under the same contention
+    time.sleep(max(0.0, start_at - time.time()))
+    latencies = []
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        t0 = time.perf_counter()
+        model(frame, verbose=False, imgsz=imgsz)
+        latencies.append(time.perf_counter() - t0)
+    results.put((slot, p["cores"], latencies))
+
+
+def bench(configs, pin, weights, imgsz, seconds):
+    import multiprocessing as mp
+
+    ctx = mp.get_context('spawn')
+    print(f"{'config':>8}{'frames/s':>10}{'p50 ms':>9}{'p95 ms':>9}  cores per worker")
+    for spec in configs:
+        workers, torch_threads = (int(v) for v in spec.lower().split('x'))
+        results = ctx.Queue()
+        start_at = time.time() + 20    # time for every worker to load the model
+        procs = [ctx.Process(target=_bench_worker,
+                             args=(i, workers, torch_threads, pin, weights, imgsz, seconds, start_at, results))
+                 for i in range(workers)]
+        for proc in procs:
+            proc.start()
+        collected = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+
+        lat = sorted(l for _, _, ls in collected for l in ls)
+        fps = len(lat) / seconds
+        p50 = lat[len(lat) // 2] * 1000
+        p95 = lat[min(len(lat) - 1, int(len(lat) * 0.95))] * 1000
+        cores = len(collected[0][1])
+        print(f"{spec:>8}{fps:10.1f}{p50:9.1f}{p95:9.1f}  {cores}{' pinned' if pin else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the CPU plan or benchmark thread configurations")
+    parser.add_argument('--role', default='flask')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--bench', nargs='+', metavar='WxT', help='e.g. 1x8 2x4 4x2')
+    parser.add_argument('--pin', action='store_true')
+    parser.add_argument('--weights', default='yolo11n.pt')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    if args.bench:
+        bench(args.bench, args.pin, args.weights, args.imgsz, args.seconds)
+    else:
+        # Dry run: print the plan without touching torch/cv2 or taking a slot
+        p = plan(args.role, args.workers or int(os.environ.get('CPU_BUDGET_WORKERS', 1)), 0, quota=cgroup_quota())
+        for key, value in p.items():
+            print(f"  {key:>16}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Load-aware quality degradation for the detect endpoints.
+
+The controller watches how many requests are in flight and the p95 latency of
+recent requests. Under pressure it steps down one level at a time through a
+configured ladder (each level is a plain dict of pipeline knobs); once load has
+stayed low for a while it steps back up. Separate high/low thresholds plus a
+hold time give hysteresis, so the level does not flap.
+"""
+import threading
+import time
+from collections import deque
+
+
+class DegradationController:
+    def __init__(self, levels, high_latency=2.0, low_latency=0.8, high_depth=8, low_depth=2,
+                 window=100, horizon=30.0, min_samples=5, degrade_hold=2.0, recover_hold=15.0):
+        self.levels = levels
+        self.high_latency = high_latency
+        self.low_latency = low_latency
+        self.high_depth = high_depth
+        self.low_depth = low_depth
+        self.horizon = horizon
+        self.min_samples = min_samples
+        self.degrade_hold = degrade_hold
+        self.recover_hold = recover_hold
+
+        self.level = 0
+        self.inflight = 0
+        self._samples = deque(maxlen=window)   # (finished_at, latency)
+        self._changed_at = time.time()
+        self._calm_since = None
+        self._lock = threading.Lock()
+        self.transitions = 0
+
+    def current(self):
+        return self.levels[self.level]
+
+    def enter(self):
+        """Call when a request starts; returns a token for exit()."""
+        with self._lock:
+            self.inflight += 1
+            self._evaluate(time.time())
+        return time.perf_counter()
+
+    def exit(self, started):
+        latency = time.perf_counter() - started
+        now = time.time()
+        with self._lock:
+            self.inflight -= 1
+            self._samples.append((now, latency))
+            self._evaluate(now)
+
+    def _p95(self):
+        # Only recent samples taken at the current level say anything about it
+        since = max(self._changed_at, time.time() - self.horizon)
+        recent = sorted(lat for ts, lat in self._samples if ts >= since)
+        if len(recent) < self.min_samples:
+            return None
+        return recent[min(len(recent) - 1, int(len(recent) * 0.95))]
+
+    def _evaluate(self, now):
+        p95 = self._p95()
+        overloaded = self.inflight > self.high_depth or (p95 is not None and p95 > self.high_latency)
+        calm = self.inflight <= self.low_depth and (p95 is None or p95 < self.low_latency)
+
+        if overloaded:
+            self._calm_since = None
+            if self.level < len(self.levels) - 1 and now - self._changed_at >= self.degrade_hold:
+                self._set_level(self.level + 1, now, p95)
+        elif calm:
+            if self._calm_since is None:
+                self._calm_since = now
+            if (self.level > 0 and now - self._calm_since >= self.recover_hold
+                    and now - self._changed_at >= self.recover_hold):
+                self._set_level(self.level - 1, now, p95)
+                self._calm_since = now
+        else:
+            self._calm_since = None
+
+    def _set_level(self, level, now, p95):
+        direction = "⬇️ degrading" if level > self.level else "⬆️ recovering"
+        print(f"{direction} quality: {self.levels[self.level]['name']} → {self.levels[level]['name']} "
+              f"(in flight {self.inflight}, p95 {p95 if p95 is None else round(p95, 2)}s)")
+        self.level = level
+        self._changed_at = now
+        self.transitions += 1
+
+    def stats(self):
+        with self._lock:
+            p95 = self._p95()
+            return {
+                "level": self.level,
+                "level_name": self.levels[self.level]["name"],
+                "inflight": self.inflight,
+                "p95_latency": round(p95, 3) if p95 is not None else None,
+                "transitions": self.transitions,
+            }
@@ -0,0 +1,52 @@
+"""
+Detection thresholds and label rules shared by the Flask backend and the
+offline tools (test_phone_detection.py harness, threshold calibration).
+"""
+
+# SEPARATE thresholds:
+# - Objects (phone, book): LOW threshold = easier to detect
+# - Person: HIGH threshold = avoid false positives from reflections/monitors/pictures
+CONF_OBJECT = 0.15   # Low — catches phones at odd angles
+CONF_PERSON = 0.75   # High — only real persons, not reflections/backgrounds
+
+PROHIBITED_CLASSES = {'cell phone', 'book', 'laptop', 'remote', 'tablet', 'objects', 'pen'}
+
+# Translate vague custom labels
+LABEL_ALIASES = {'objects': 'airpods'}
+
+
+def frame_labels(detections, conf_object=CONF_OBJECT, conf_person=CONF_PERSON,
+                 prohibited=PROHIBITED_CLASSES, aliases=LABEL_ALIASES):
+    """
+    Raw (label, confidence) pairs for one frame → the set of violation labels
+    the backend would raise: prohibited objects plus 'multiple_persons'.
+    """
+    found = set()
+    persons = 0
+    for label, conf in detections:
+        label = aliases.get(label, label)
+        if label == 'person':
+            if conf >= conf_person:
+                persons += 1
+        elif label in prohibited and conf >= conf_object:
+            found.add(label)
+    if persons > 1:
+        found.add('multiple_persons')
+    return found
+
+
+def frame_risk(person_count, labels, movement=False):
+    """
+    0-100 risk for one processed frame, on the same scale as the standalone
+    monitor's violation risk_score (multiple persons 70, prohibited object 60,
+    face missing 40); 0 for a clean frame.
+    """
+    if person_count > 1 or 'multiple_persons' in labels:
+        return 70
+    if any(label in PROHIBITED_CLASSES for label in labels):
+        return 60
+    if person_count == 0:
+        return 40
+    if movement:
+        return 20
+    return 0
@@ -0,0 +1,105 @@
+"""
+Labeled image/video corpus for offline detection evaluation.
+
+Layout: a folder with the media files and a labels.json:
+
+    {
+      "items": {
+        "phone_desk_01.jpg": ["cell phone"],
+        "two_people.png":    ["multiple persons"],
+        "empty_desk.jpg":    [],
+        "clips/earbuds.mp4": {"labels": ["earbuds"], "stride": 15}
+      }
+    }
+
+Labels are image-level: which violations a correct backend should raise for
+that frame. Videos are sampled every `stride` frames and every sample carries
+the video's labels. Friendly names are normalised to backend labels
+("phone" → "cell phone", "earbuds" → "airpods", ...).
+"""
+import json
+import os
+
+import cv2
+
+EVAL_CLASSES = ['cell phone', 'book', 'laptop', 'remote', 'tablet', 'airpods', 'pen', 'multiple_persons']
+
+LABEL_NAMES = {
+    'phone': 'cell phone', 'mobile': 'cell phone', 'mobile phone': 'cell phone',
+    'earbuds': 'airpods', 'earphones': 'airpods', 'objects': 'airpods',
+    'books': 'book', 'multiple persons': 'multiple_persons', 'persons': 'multiple_persons',
+}
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+
+
+def normalise(label):
+    label = label.strip().lower()
+    return LABEL_NAMES.get(label, label)
+
+
+class CorpusItem:
+    def __init__(self, item_id, path, labels, frame_index=None):
+        self.id = item_id
+        self.path = path
+        self.labels = labels
+        self.frame_index = frame_index
+
+    def load(self):
+        """Decode this item's frame (BGR). Video frames are seeked on demand."""
+        if self.frame_index is None:
+            frame = cv2.imread(self.path, cv2.IMREAD_COLOR)
+        else:
+            cap = cv2.VideoCapture(self.path)
+            cap.set(cv2.CAP_PROP_POS_FRAMES, self.frame_index)
+            _, frame = cap.read()
+            cap.release()
+        if frame is None:
+            raise ValueError(f"could not read {self.id}")
+        return frame
+
+    def load_bytes(self):
+        """The item as a client would upload it: the image file as-is, video frames as JPEG."""
+        if self.frame_index is None:
+            with open(self.path, 'rb') as f:
+                return f.read()
+        ok, jpeg = cv2.imencode('.jpg', self.load())
+        if not ok:
+            raise ValueError(f"could not encode {self.id}")
+        return jpeg.tobytes()
+
+
+def load_corpus(root):
+    with open(os.path.join(root, 'labels.json'), encoding='utf-8') as f:
+        spec = json.load(f)
+
+    items = []
+    for name, entry in sorted(spec['items'].items()):
+        if isinstance(entry, list):
+            entry = {'labels': entry}
+        labels = frozenset(normalise(l) for l in entry.get('labels', []))
+        path = os.path.join(root, name)
+
+        if name.lower().endswith(VIDEO_EXTENSIONS):
+            cap = cv2.VideoCapture(path)
+            total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            cap.release()
+            for idx in range(0, total, max(1, int(entry.get('stride', 15)))):
+                items.append(CorpusItem(f"{name}#{idx}", path, labels, idx))
+        else:
+            items.append(CorpusItem(name, path, labels))
+    return items
+
+
+def score(predictions, truths, classes=EVAL_CLASSES):
+    """Per-class precision/recall over parallel lists of predicted/true label sets."""
+    report = {}
+    for cls in classes:
+        tp = sum(1 for p, t in zip(predictions, truths) if cls in p and cls in t)
+        fp = sum(1 for p, t in zip(predictions, truths) if cls in p and cls not in t)
+        fn = sum(1 for p, t in zip(predictions, truths) if cls not in p and cls in t)
+        report[cls] = {
+            'tp': tp, 'fp': fp, 'fn': fn, 'support': tp + fn,
+            'precision': round(tp / (tp + fp), 4) if tp + fp else None,
+            'recall': round(tp / (tp + fn), 4) if tp + fn else None,
+        }
+    return report
@@ -0,0 +1,307 @@
+"""
+Violation evidence archive.
+
+Frames that triggered a violation are handed to a background writer and stored
+content-addressed (BLAKE2b of the encoded bytes), so identical frames are kept
+once no matter how many events point at them. Blobs are appended to large
+segment files instead of one file per snapshot; a SQLite index maps
+hash → (segment, offset, length) and records every event by (session, time).
+
+    store = EvidenceStore('evidence')
+    store.submit(session, jpeg_bytes, 'cell phone', {...})   # never blocks
+    store.query(session, start, end)                        # events
+    store.read(blob_hash)                                   # bytes
+
+Retention: `python evidence_store.py compact --retain-days 30` drops old events
+and rewrites segments that are mostly dead. A store root should be written by
+one process at a time.
+"""
+import argparse
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    created REAL NOT NULL,
+    sealed  INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    hash    TEXT PRIMARY KEY,
+    segment INTEGER NOT NULL,
+    offset  INTEGER NOT NULL,
+    length  INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    session TEXT NOT NULL,
+    ts      REAL NOT NULL,
+    hash    TEXT NOT NULL,
+    kind    TEXT NOT NULL,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS events_session_ts ON events (session, ts);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+CREATE INDEX IF NOT EXISTS events_hash ON events (hash);
+CREATE INDEX IF NOT EXISTS blobs_segment ON blobs (segment);
+"""
+
+
+class SegmentWriter:
+    """Appends blobs to numbered segment files, rolling over at `segment_bytes`."""
+
+    def __init__(self, segment_dir, segment_bytes):
+        self.segment_dir = segment_dir
+        self.segment_bytes = segment_bytes
+        self.segment_id = None
+        self.file = None
+
+    def path(self, segment_id):
+        return os.path.join(self.segment_dir, f'{segment_id:08d}.seg')
+
+    def append(self, db, data):
+        """Write `data` to the active segment, return (segment_id, offset)."""
+        if self.file is None or self.file.tell() + len(data) > self.segment_bytes:
+            self.seal(db)
+            # Segment ids come from the index so concurrent writers never collide
+            cur = db.execute('INSERT INTO segments (created) VALUES (?)', (time.time(),))
+            self.segment_id = cur.lastrowid
+            self.file = open(self.path(self.segment_id), 'ab')
+        offset = self.file.tell()
+        self.file.write(data)
+        return self.segment_id, offset
+
+    def flush(self, durable=False):
+        if self.file is not None:
+            self.file.flush()
+            if durable:
+                os.fsync(self.file.fileno())
+
+    def seal(self, db):
+        if self.file is not None:
+            self.file.close()
+            db.execute('UPDATE segments SET sealed = 1 WHERE id = ?', (self.segment_id,))
+        self.segment_id = None
+        self.file = None
+
+
+class EvidenceStore:
+    def __init__(self, root='evidence', segment_bytes=64 * 1024 * 1024, queue_size=1000,
+                 retain_seconds=None, compact_every=3600):
+        self.root = root
+        self.segment_dir = os.path.join(root, 'segments')
+        self.index_path = os.path.join(root, 'index.sqlite3')
+        self.segment_bytes = segment_bytes
+        self.retain_seconds = retain_seconds
+        self.compact_every = compact_every
+        os.makedirs(self.segment_dir, exist_ok=True)
+
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._io_lock = threading.Lock()   # serialises appends and compaction
+        self._thread = None
+        self._segments = SegmentWriter(self.segment_dir, segment_bytes)
+        self.submitted = 0
+        self.dropped = 0
+        self.deduplicated = 0
+
+    # ─── Helpers ────────────────────────────────────────────────────────────
+    def _connect(self):
+        db = sqlite3.connect(self.index_path, timeout=30)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        return db
+
+    # ─── Write path ─────────────────────────────────────────────────────────
+    def submit(self, session, data, kind, details=None, ts=None):
+        """Queue one piece of evidence. Never blocks; returns False if dropped."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((session, ts or time.time(), data, kind, details))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.submitted += 1
+        return True
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._io_lock:
+                if self._thread is None:
+                    with self._connect() as db:
+                        # Segments left open by a previous run are never appended to again
+                        db.execute('UPDATE segments SET sealed = 1 WHERE sealed = 0')
+                    self._thread = threading.Thread(target=self._run, name='evidence-writer', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        db = self._connect()
+        last_compact = time.time()
+        while True:
+            try:
+                batch = [self._queue.get(timeout=5)]
+            except queue.Empty:
+                batch = []
+            while batch and len(batch) < 256:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if batch:
+                try:
+                    self._write_batch(db, batch)
+                except Exception as e:
+                    print(f"[evidence] write failed, {len(batch)} items lost: {e}")
+
+            if self.retain_seconds and time.time() - last_compact > self.compact_every:
+                last_compact = time.time()
+                try:
+                    self.compact(self.retain_seconds)
+                except Exception as e:
+                    print(f"[evidence] compaction failed: {e}")
+
+    def _write_batch(self, db, batch):
+        with self._io_lock:
+            for session, ts, data, kind, details in batch:
+                digest = hashlib.blake2b(data, digest_size=20).hexdigest()
+                known = db.execute('SELECT 1 FROM blobs WHERE hash = ?', (digest,)).fetchone()
+                if known:
+                    self.deduplicated += 1
+                else:
+                    segment, offset = self._segments.append(db, data)
+                    db.execute('INSERT INTO blobs (hash, segment, offset, length) VALUES (?, ?, ?, ?)',
+                               (digest, segment, offset, len(data)))
+                db.execute('INSERT INTO events (session, ts, hash, kind, details) VALUES (?, ?, ?, ?, ?)',
+                           (session, ts, digest, kind, json.dumps(details) if details is not None else None))
+            self._segments.flush()
+            db.commit()
+
+    # ─── Read path ──────────────────────────────────────────────────────────
+    def query(self, session, start=None, end=None, limit=500):
+        sql = 'SELECT id, session, ts, hash, kind, details FROM events WHERE session = ?'
+        params = [session]
+        if start is not None:
+            sql += ' AND ts >= ?'
+            params.append(start)
+        if end is not None:
+            sql += ' AND ts < ?'
+            params.append(end)
+        sql += ' ORDER BY ts LIMIT ?'
+        params.append(limit)
+        with self._connect() as db:
+            rows = db.execute(sql, params).fetchall()
+        return [
+            {"id": r[0], "session": r[1], "time": r[2], "hash": r[3], "kind": r[4],
+             "details": json.loads(r[5]) if r[5] else None}
+            for r in rows
+        ]
+
+    def read(self, digest):
+        """Return the stored bytes for a blob hash, or None."""
+        for _ in range(2):  # a concurrent compaction may have just moved the blob
+            with self._connect() as db:
+                row = db.execute('SELECT segment, offset, length FROM blobs WHERE hash = ?', (digest,)).fetchone()
+            if row is None:
+                return None
+            segment, offset, length = row
+            try:
+                with open(self._segments.path(segment), 'rb') as f:
+                    f.seek(offset)
+                    return f.read(length)
+            except FileNotFoundError:
+                continue
+        return None
+
+    def queued_bytes(self):
+        """Frame bytes waiting for the writer thread (for memory accounting)."""
+        with self._queue.mutex:
+            return sum(len(item[2]) for item in self._queue.queue)
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "deduplicated": self.deduplicated,
+        }
+
+    # ─── Retention / compaction ─────────────────────────────────────────────
+    def compact(self, retain_seconds, min_live_ratio=0.5):
+        """
+        Drop events older than `retain_seconds`, forget blobs nothing points to,
+        and rewrite sealed segments whose live data fell below `min_live_ratio`.
+        """
+        cutoff = time.time() - retain_seconds
+        summary = {"events_deleted": 0, "blobs_deleted": 0, "segments_rewritten": 0, "segments_deleted": 0}
+        with self._io_lock:
+            db = self._connect()
+            try:
+                summary["events_deleted"] = db.execute('DELETE FROM events WHERE ts < ?', (cutoff,)).rowcount
+                summary["blobs_deleted"] = db.execute(
+                    'DELETE FROM blobs WHERE hash NOT IN (SELECT DISTINCT hash FROM events)').rowcount
+                db.commit()
+
+                live = dict(db.execute('SELECT segment, SUM(length) FROM blobs GROUP BY segment').fetchall())
+                sealed = [r[0] for r in db.execute('SELECT id FROM segments WHERE sealed = 1').fetchall()]
+                compactor = SegmentWriter(self.segment_dir, self.segment_bytes)
+                for segment in sealed:
+                    path = compactor.path(segment)
+                    size = os.path.getsize(path) if os.path.exists(path) else 0
+                    live_bytes = live.get(segment, 0)
+                    if live_bytes and size and live_bytes / size >= min_live_ratio:
+                        continue
+                    if live_bytes:
+                        blobs = db.execute('SELECT hash, offset, length FROM blobs WHERE segment = ?',
+                                           (segment,)).fetchall()
+                        with open(path, 'rb') as src:
+                            for digest, offset, length in blobs:
+                                src.seek(offset)
+                                new_segment, new_offset = compactor.append(db, src.read(length))
+                                db.execute('UPDATE blobs SET segment = ?, offset = ? WHERE hash = ?',
+                                           (new_segment, new_offset, digest))
+                        compactor.flush(durable=True)
+                        summary["segments_rewritten"] += 1
+                    else:
+                        summary["segments_deleted"] += 1
+                    db.execute('DELETE FROM segments WHERE id = ?', (segment,))
+                    db.commit()
+                    if os.path.exists(path):
+                        os.remove(path)
+                compactor.seal(db)
+                db.commit()
+            finally:
+                db.close()
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Violation evidence archive maintenance")
+    parser.add_argument('command', choices=['compact', 'query'])
+    parser.add_argument('--root', default='evidence')
+    parser.add_argument('--retain-days', type=float, default=30)
+    parser.add_argument('--min-live-ratio', type=float, default=0.5)
+    parser.add_argument('--session')
+    parser.add_argument('--start', type=float, help='unix timestamp')
+    parser.add_argument('--end', type=float, help='unix timestamp')
+    args = parser.parse_args()
+
+    store = EvidenceStore(args.root)
+    if args.command == 'compact':
+        print(store.compact(args.retain_days * 86400, args.min_live_ratio))
+    else:
+        if not args.session:
+            parser.error('query needs --session')
+        for event in store.query(args.session, args.start, args.end):
+            print(json.dumps(event))
+
+
+if __name__ == '__main__':
+    main()
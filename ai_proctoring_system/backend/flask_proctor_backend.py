@@ -1,79 +1,324 @@
 import cv2
+import httpx
 import numpy as np
 import base64
+import threading
 import time
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from ultralytics import YOLO
-from PIL import Image
-import io
 import os
+import queue
+
+from admission import SessionAdmission
+import compact_response
+import cpu_budget
+from degradation import DegradationController
+from detection_rules import CONF_OBJECT, CONF_PERSON, LABEL_ALIASES, PROHIBITED_CLASSES, frame_risk
+from evidence_store import EvidenceStore
+from flight_recorder import FlightRecorder
+from frame_decode import decode_image
+from inference_scheduler import InferenceScheduler
+from live_feed import LiveFeed
+from memory_guard import MemoryGuard, deep_size
+from model_registry import ModelRegistry
+from result_log import ResultLog
+from timer_wheel import TimerWheel
+from tracking import SessionTracker, new_tracked
+from verification import ClientVerifier
 
 app = Flask(__name__)
 CORS(app)
 
+# Thread budget for torch/OpenCV and concurrent inference (see cpu_budget.py)
+cpu_plan = cpu_budget.configure('flask')
+
 # ─── Load Models ─────────────────────────────────────────────────────────────
-print("📦 Loading Baseline YOLO11 model (for person tracking)...")
-model_base = YOLO('yolo11n.pt')
-
-print("📦 Loading Custom YOLO Model (for specific objects)...")
-custom_weights = 'runs/detect/custom_proctor/weights/best.pt'
-model_custom = None
-if os.path.exists(custom_weights):
-    model_custom = YOLO(custom_weights)
-    print("✅ Custom model loaded. Classes:", model_custom.names)
-else:
-    print("⚠️ Custom model not found. Using baseline only.")
-
-print("⚙️ Warming up models to prevent first-request timeout...")
-dummy_img = np.zeros((640, 640, 3), dtype=np.uint8)
-_ = model_base(dummy_img, verbose=False)
-if model_custom:
-    _ = model_custom(dummy_img, verbose=False)
-print("✅ Models warm-up complete.")
+# Weights are held by a registry so an admin can hot-swap them (see model_registry.py)
+BASE_WEIGHTS   = os.environ.get('BASE_WEIGHTS', 'yolo11n.pt')
+CUSTOM_WEIGHTS = os.environ.get('CUSTOM_WEIGHTS', 'runs/detect/custom_proctor/weights/best.pt')
+ADMIN_TOKEN    = os.environ.get('ADMIN_TOKEN')   # admin endpoints are disabled unless set
+
+
+def load_weights(paths):
+    print(f"📦 Loading Baseline YOLO11 model (for person tracking): {paths['base']}")
+    base = YOLO(paths['base'])
+    custom = None
+    if paths.get('custom') and os.path.exists(paths['custom']):
+        custom = YOLO(paths['custom'])
+        print("✅ Custom model loaded. Classes:", custom.names)
+    else:
+        print("⚠️ Custom model not found. Using baseline only.")
+    return base, custom
+
+
+def warm_up(models):
+    print("⚙️ Warming up models to prevent first-request timeout...")
+    dummy_img = np.zeros((640, 640, 3), dtype=np.uint8)
+    with models.lock:
+        _ = models.base(dummy_img, verbose=False)
+        if models.custom:
+            _ = models.custom(dummy_img, verbose=False)
+    print("✅ Models warm-up complete.")
+
+
+registry = ModelRegistry(load_weights, warm_up,
+                         evaluate=lambda models, frame, level: run_models(frame, level, models)[3],
+                         prohibited=PROHIBITED_CLASSES)
+registry.load_initial({"base": BASE_WEIGHTS, "custom": CUSTOM_WEIGHTS})
 
 
 # ─── State ───────────────────────────────────────────────────────────────────
-prev_frame = None
-last_face_timestamp = time.time()
+# Per-session state (frame-diff baseline, no-face timer), keyed by session_key()
+sessions = {}
+sessions_lock = threading.Lock()
+SESSION_IDLE_TTL = 30 * 60   # forget sessions that sent nothing for 30 min
+_last_session_sweep = time.time()
 
 # ─── Config ──────────────────────────────────────────────────────────────────
 NO_FACE_TIMEOUT   = 10    # seconds before exam stops
 MOVE_THRESHOLD    = 8000  # frame-diff sensitivity
 
-# SEPARATE thresholds:
-# - Objects (phone, book): LOW threshold = easier to detect
-# - Person: HIGH threshold = avoid false positives from reflections/monitors/pictures
-CONF_OBJECT = 0.15   # Low — catches phones at odd angles
-CONF_PERSON = 0.75   # High — only real persons, not reflections/backgrounds
-
-PROHIBITED_CLASSES = {'cell phone', 'book', 'laptop', 'remote', 'tablet', 'objects', 'pen'}
+# Detection thresholds (CONF_OBJECT / CONF_PERSON) and PROHIBITED_CLASSES live in
+# detection_rules.py so the offline harness and calibration tools use the same values.
+
+# Quality ladder, best first. Under load the controller steps down one level at a time:
+#   custom_model  run the custom model as well as the base model
+#   imgsz         YOLO inference size
+#   upscale       LANCZOS-upscale frames narrower than 640px before inference
+#   diff_scale    resolution factor for the blur + frame-diff movement check
+#   motion_gate   skip inference and reuse the last detections when less than this
+#                 fraction of pixels changed since the previous frame (0 = off)
+#   frame_stride  only every Nth frame of a session is processed at all
+QUALITY_LEVELS = [
+    {"name": "full",      "custom_model": True,  "imgsz": 640, "upscale": True,  "diff_scale": 1.0,  "motion_gate": 0,     "frame_stride": 1},
+    {"name": "base_only", "custom_model": False, "imgsz": 640, "upscale": True,  "diff_scale": 1.0,  "motion_gate": 0,     "frame_stride": 1},
+    {"name": "reduced",   "custom_model": False, "imgsz": 480, "upscale": False, "diff_scale": 0.5,  "motion_gate": 0.002, "frame_stride": 1},
+    {"name": "gated",     "custom_model": False, "imgsz": 416, "upscale": False, "diff_scale": 0.5,  "motion_gate": 0.01,  "frame_stride": 1},
+    {"name": "sampled",   "custom_model": False, "imgsz": 320, "upscale": False, "diff_scale": 0.25, "motion_gate": 0.02,  "frame_stride": 2},
+]
+quality = DegradationController(
+    QUALITY_LEVELS,
+    high_latency=float(os.environ.get('QUALITY_HIGH_LATENCY', 2.0)),   # FRAME_INTERVAL_MS on the client is 2.5s
+    low_latency=float(os.environ.get('QUALITY_LOW_LATENCY', 0.8)),
+    high_depth=int(os.environ.get('QUALITY_HIGH_DEPTH', 8)),
+    low_depth=int(os.environ.get('QUALITY_LOW_DEPTH', 2)),
+)
+
+# A static scene still gets a real inference after this many consecutive gated frames
+MOTION_GATE_MAX_FRAMES = int(os.environ.get('MOTION_GATE_MAX_FRAMES', 4))
 
 # Find phone class ID in base model
-PHONE_CLASS_ID = None
-for cid, name in model_base.names.items():
-    if name == 'cell phone':
-        PHONE_CLASS_ID = cid
-        break
-
-# Store last received frame for debugging
-last_received_frame = None
-
-
-def decode_image(b64string):
-    """Decode base64 image → OpenCV BGR frame, resized to 640px wide."""
+def phone_class_id():
+    for cid, name in registry.active.base.names.items():
+        if name == 'cell phone':
+            return cid
+    return None
+
+# One frame in flight per session; a newer frame replaces an older waiting one
+admission = SessionAdmission(max_wait=float(os.environ.get('ADMISSION_MAX_WAIT', 10)))
+
+# Inference slots are granted by urgency, with per-exam fairness (see inference_scheduler.py)
+scheduler = InferenceScheduler(
+    slots=cpu_plan["request_threads"],
+    exam_share=float(os.environ.get('SCHED_EXAM_SHARE', 0.5)),
+)
+SCHED_MAX_WAIT = float(os.environ.get('SCHED_MAX_WAIT', 3.0))   # then reuse the last detections
+
+# Detect-and-track: full detection every Nth frame, tracks propagated in between
+TRACK_DETECT_EVERY     = int(os.environ.get('TRACK_DETECT_EVERY', 3))
+TRACK_REDETECT_MOTION  = float(os.environ.get('TRACK_REDETECT_MOTION', 0.05))  # changed-pixel fraction
+TRACK_MAX_PER_SESSION  = int(os.environ.get('TRACK_MAX_PER_SESSION', 16))
+
+# Verification mode: frames that carry a client_report are answered from it unless
+# sampled for full inference (see verification.py). Off by default.
+VERIFY_CLIENT_REPORTS = os.environ.get('VERIFY_CLIENT_REPORTS') == '1'
+verifier = ClientVerifier(
+    PROHIBITED_CLASSES,
+    base_rate=float(os.environ.get('VERIFY_BASE_RATE', 0.2)),
+    risk_rate=float(os.environ.get('VERIFY_RISK_RATE', 0.6)),
+)
+
+# Recent frames per session, kept as the JPEG bytes we were sent (see /debug_frame)
+recorder = FlightRecorder(
+    frames_per_session=int(os.environ.get('RECORDER_FRAMES_PER_SESSION', 20)),
+    sample_every=int(os.environ.get('RECORDER_SAMPLE_EVERY', 1)),
+    budget_bytes=int(os.environ.get('RECORDER_BUDGET_MB', 64)) * 1024 * 1024,
+)
+
+# Per-frame outputs for post-exam queries (see result_log.py)
+results = ResultLog(os.environ.get('RESULT_LOG_DIR', 'result_log'))
+
+# Per-exam aggregates for proctor dashboards, pushed as SSE at a fixed tick (see live_feed.py)
+live = LiveFeed(tick=float(os.environ.get('LIVE_FEED_TICK', 1.0)))
+LIVE_FEED_TOKEN = os.environ.get('LIVE_FEED_TOKEN')   # ?token= on /proctor/live (ADMIN_TOKEN also accepted)
+
+# No-face deadlines live in a timer wheel, re-armed on every face-present frame, so a
+# session that stops sending frames is still stopped server-side (see timer_wheel.py)
+NO_FACE_WEBHOOK_URL = os.environ.get('NO_FACE_WEBHOOK_URL')   # POSTed one batch per tick
+webhook_batches = queue.Queue(maxsize=100)
+no_face_timers = TimerWheel(lambda keys: stop_sessions(keys),
+                            tick=float(os.environ.get('NO_FACE_TICK', 0.5))).start()
+
+# Violation snapshots, written by a background thread (see evidence_store.py)
+retain_days = float(os.environ.get('EVIDENCE_RETAIN_DAYS', 0))
+evidence = EvidenceStore(
+    root=os.environ.get('EVIDENCE_DIR', 'evidence'),
+    retain_seconds=retain_days * 86400 if retain_days else None,
+)
+
+# Bytes held per session and per subsystem; over MEMORY_LIMIT_MB the oldest idle
+# sessions are evicted before the worker gets OOM-killed (see memory_guard.py)
+memory = MemoryGuard(
+    limit_bytes=int(os.environ.get('MEMORY_LIMIT_MB', 0)) * 1024 * 1024,
+    min_idle=float(os.environ.get('MEMORY_MIN_IDLE', 60)),
+    interval=float(os.environ.get('MEMORY_CHECK_INTERVAL', 15)),
+    trace_frames=int(os.environ.get('MEMORY_TRACE_FRAMES', 0)),   # >0 turns on tracemalloc
+)
+
+
+def session_key(data):
+    """Identify the exam session a frame belongs to."""
+    # Set by session_router.py, which already resolved the key for routing
+    if request.headers.get('X-Session-Key'):
+        return request.headers['X-Session-Key']
+    if data.get('session_id'):
+        return str(data['session_id'])
+    if data.get('student_id') or data.get('exam_id'):
+        return f"{data.get('student_id', 'unknown')}:{data.get('exam_id', 'unknown')}"
+    return request.remote_addr or 'anonymous'
+
+
+def get_session(key):
+    """Fetch (or create) the state dict for a session and drop long-idle ones."""
+    global _last_session_sweep
+    now = time.time()
+    with sessions_lock:
+        state = sessions.get(key)
+        created = state is None
+        if created:
+            state = sessions[key] = {
+                "prev_frame": None,
+                "last_face_timestamp": now,
+                "created": now,
+            }
+        state["last_seen"] = now
+
+        expired = []
+        if now - _last_session_sweep > 60:
+            _last_session_sweep = now
+            expired = [k for k, st in sessions.items() if now - st["last_seen"] > SESSION_IDLE_TTL]
+            for k in expired:
+                del sessions[k]
+    if created:
+        no_face_timers.arm(key, NO_FACE_TIMEOUT)
+    for k in expired:
+        recorder.forget(k)
+        no_face_timers.cancel(k)
+    return state
+
+
+def stop_sessions(keys, now=None):
+    """Mark sessions as stopped for no face and fan the event out once per batch."""
+    now = now or time.time()
+    stopped = []
+    with sessions_lock:
+        for key in keys:
+            state = sessions.get(key)
+            if state is None or state.get("stop_reason"):
+                continue
+            # Expiry is dispatched after the wheel lock is released; a face frame may have re-armed it since
+            if now - state["last_face_timestamp"] < NO_FACE_TIMEOUT:
+                continue
+            state["stop_reason"] = f"No face detected for {int(now - state['last_face_timestamp'])} seconds."
+            stopped.append({"session": key, "exam_id": state.get("exam_id"), "student_id": state.get("student_id"),
+                            "last_face": state["last_face_timestamp"], "last_seen": state["last_seen"],
+                            "reason": state["stop_reason"]})
+    for event in stopped:
+        live.publish(event["exam_id"], event["session"], event["student_id"], now, 100, True, "no_face_timeout")
+    if stopped:
+        print(f"⏰ No-face timeout: stopping {len(stopped)} session(s)")
+        if NO_FACE_WEBHOOK_URL:
+            try:
+                webhook_batches.put_nowait({"event": "no_face_timeout", "ts": now, "sessions": stopped})
+            except queue.Full:
+                print(f"⚠️ Webhook queue full, dropped {len(stopped)} no-face event(s)")
+    return stopped
+
+
+def webhook_sender():
+    with httpx.Client(timeout=5.0) as client:
+        while True:
+            batch = webhook_batches.get()
+            try:
+                client.post(NO_FACE_WEBHOOK_URL, json=batch).raise_for_status()
+            except httpx.HTTPError as e:
+                print(f"⚠️ No-face webhook failed: {e}")
+
+
+if NO_FACE_WEBHOOK_URL:
+    threading.Thread(target=webhook_sender, name='no-face-webhook', daemon=True).start()
+
+
+def memory_sessions():
+    """(key, last_seen, bytes by part) for every session, for the memory guard."""
+    with sessions_lock:
+        # Tombstones of stopped sessions are tiny and must outlive eviction
+        items = [(k, st) for k, st in sessions.items() if not st.get("tombstone")]
+    frames = recorder.session_bytes()
+    out = []
+    for key, state in items:
+        try:
+            held = deep_size(dict(state))
+        except RuntimeError:   # mutated by its request thread mid-walk; count it next time
+            held = 0
+        out.append((key, state.get("last_seen", 0), {"state": held, "recorder": frames.get(key, 0)}))
+    return out
+
+
+TOMBSTONE_FIELDS = ("stop_reason", "last_seen", "last_face_timestamp", "created", "exam_id", "student_id")
+
+
+def drop_sessions(keys):
+    """
+    Forget sessions everywhere they hold memory or timers. A session already stopped
+    keeps a tombstone, so a reconnecting client is told STOP_EXAM again instead of
+    starting a fresh session; the idle sweep removes it later.
+    """
+    dropped = []
+    with sessions_lock:
+        for k in keys:
+            state = sessions.pop(k, None)
+            if state is None:
+                continue
+            if state.get("stop_reason"):
+                sessions[k] = {f: state.get(f) for f in TOMBSTONE_FIELDS} | {"prev_frame": None, "tombstone": True}
+            dropped.append(k)
+    for k in dropped:
+        recorder.forget(k)
+        no_face_timers.cancel(k)
+    return dropped
+
+
+def model_bytes():
+    models = registry.active
+    return sum(p.numel() * p.element_size()
+               for m in (models.base, models.custom) if m is not None for p in m.model.parameters())
+
+
+memory.register("recorder", lambda: recorder.stats()["bytes"])
+memory.register("evidence_queue", evidence.queued_bytes)
+memory.register("models", model_bytes)
+memory.start(memory_sessions, drop_sessions)
+
+
+def decode_b64(b64string):
+    """Strip an optional data-URL prefix and return the encoded image bytes."""
     if "," in b64string:
         _, encoded = b64string.split(",", 1)
     else:
         encoded = b64string
-    data = base64.b64decode(encoded)
-    img = Image.open(io.BytesIO(data)).convert("RGB")
-    # Resize to minimum 640px wide so YOLO can detect small objects
-    w, h = img.size
-    if w < 640:
-        ratio = 640 / w
-        img = img.resize((640, int(h * ratio)), Image.LANCZOS)
-    return cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
+    return base64.b64decode(encoded)
 
 
 # ─── Routes ──────────────────────────────────────────────────────────────────
@@ -93,15 +338,16 @@ def health():
     return jsonify({
         "status": "online",
         "model": "yolo11n_dual",
-        "phone_class_id": PHONE_CLASS_ID
+        "phone_class_id": phone_class_id(),
+        "weights_version": registry.active.version
     }), 200
 
 @app.route('/test', methods=['GET'])
 def test_detection():
     return jsonify({
         "message": "Dual YOLO models are loaded",
-        "total_classes_base": len(model_base.names),
-        "total_classes_custom": len(model_custom.names) if model_custom else 0,
+        "total_classes_base": len(registry.active.base.names),
+        "total_classes_custom": len(registry.active.custom.names) if registry.active.custom else 0,
         "prohibited_classes": list(PROHIBITED_CLASSES),
         "confidence_threshold": { "object": CONF_OBJECT, "person": CONF_PERSON }
     })
@@ -109,43 +355,91 @@ def test_detection():
 
 @app.route('/debug_frame', methods=['GET'])
 def debug_frame():
-    """Save last received frame as PNG so you can see what YOLO is working with."""
-    global last_received_frame
-    if last_received_frame is None:
-        return jsonify({"error": "No frame received yet. Start the exam and send at least one frame."}), 404
-    path = 'debug_last_frame.png'
-    cv2.imwrite(path, last_received_frame)
+    """
+    Inspect recent frames from the flight recorder.
+      ?session=ID   pick a session (default: most recent one)
+      ?index=-1     which frame in that session's ring (negative = from newest)
+      ?list=1       list the frames held for the session
+      ?raw=1        return the image itself instead of saving it to disk
+    Students' webcam frames: requires the admin token.
+    """
+    if not admin_authorized():
+        return jsonify({"error": "Admin token required"}), 403
+    session = request.args.get('session') or recorder.latest_session()
+    if session is None:
+        return jsonify({"error": "No frame received yet. Start the exam and send at least one frame.",
+                        "recorder": recorder.stats()}), 404
+
+    if request.args.get('list'):
+        return jsonify({"session": session, "frames": recorder.frames(session), "recorder": recorder.stats()})
+
+    try:
+        index = int(request.args.get('index', -1))
+    except ValueError:
+        return jsonify({"error": "index must be an integer"}), 400
+    entry = recorder.get(session, index)
+    if entry is None:
+        return jsonify({"error": f"No recorded frame {index} for session {session}"}), 404
+    ts, data, meta = entry
+
+    is_png = data[:4] == b'\x89PNG'
+    if request.args.get('raw'):
+        return Response(data, mimetype='image/png' if is_png else 'image/jpeg')
+
+    path = 'debug_last_frame.png' if is_png else 'debug_last_frame.jpg'
+    with open(path, 'wb') as f:
+        f.write(data)
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
     return jsonify({
         "saved": path,
-        "shape": list(last_received_frame.shape),
-        "message": f"Frame saved to backend/{path} — open this file to see what YOLO sees"
+        "session": session,
+        "received_at": ts,
+        "shape": list(img.shape) if img is not None else None,
+        "meta": meta,
+        "message": f"Frame saved to backend/{path} — open this file to see what the client sent"
     })
 
-@app.route('/proctor/detect', methods=['POST', 'OPTIONS'])
-def process_frame():
-    global prev_frame, last_face_timestamp, last_received_frame
-
-    if request.method == 'OPTIONS':
-        return jsonify({"status": "ok"}), 200
-
-    data = request.json
-    image_data = data.get('image')
-    if not image_data:
-        return jsonify({"error": "No image provided"}), 400
-
+@app.route('/evidence', methods=['GET'])
+def list_evidence():
+    """Violation evidence for ?session=ID, optionally within ?start=&end= (unix time)."""
+    if not admin_authorized():
+        return jsonify({"error": "Admin token required"}), 403
+    session = request.args.get('session')
+    if not session:
+        return jsonify({"error": "session is required"}), 400
     try:
-        frame = decode_image(image_data)
-    except Exception as e:
-        return jsonify({"error": f"Image decode failed: {str(e)}"}), 400
-
-    # Store for debugging
-    last_received_frame = frame.copy()
-    print(f"📸 Frame received: {frame.shape[1]}x{frame.shape[0]} px")
-
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    gray = cv2.GaussianBlur(gray, (21, 21), 0)
-
-    # ─── Run Models ─────────────────────────────────────────────────────────
+        start = float(request.args['start']) if 'start' in request.args else None
+        end = float(request.args['end']) if 'end' in request.args else None
+    except ValueError:
+        return jsonify({"error": "start/end must be unix timestamps"}), 400
+    return jsonify({"session": session, "events": evidence.query(session, start, end)})
+
+
+@app.route('/evidence/<blob_hash>', methods=['GET'])
+def get_evidence(blob_hash):
+    if not admin_authorized():
+        return jsonify({"error": "Admin token required"}), 403
+    data = evidence.read(blob_hash)
+    if data is None:
+        return jsonify({"error": "Unknown evidence hash"}), 404
+    return Response(data, mimetype='image/png' if data[:4] == b'\x89PNG' else 'image/jpeg')
+
+
+@app.route('/proctor/live/<exam_id>', methods=['GET'])
+def live_exam_feed(exam_id):
+    """Server-Sent Events stream of one exam's aggregates (EventSource-friendly)."""
+    # EventSource cannot send headers, so the token comes as ?token=; the feed is closed
+    # unless LIVE_FEED_TOKEN or ADMIN_TOKEN is configured
+    token = request.args.get('token')
+    if not (admin_authorized() or (token and token in (LIVE_FEED_TOKEN, ADMIN_TOKEN))):
+        return jsonify({"error": "Invalid token"}), 403
+    sub = live.subscribe(exam_id)
+    return Response(live.stream(sub), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def run_models(frame, level, models):
+    """Run the detection models allowed at this quality level on one frame."""
     # We evaluate the base model for persons/standard objects, and custom model for custom objects
     person_count = 0
     violation    = False
@@ -161,7 +455,7 @@ def process_frame():
             x1, y1, x2, y2 = [round(v) for v in box.xyxy[0].tolist()]
 
             # Translate vague custom labels
-            if label == 'objects': label = 'airpods'
+            label  = LABEL_ALIASES.get(label, label)
 
             if label == 'person':
                 if conf < CONF_PERSON: continue
@@ -174,16 +468,392 @@ def process_frame():
             else:
                 detected_objects.append({"name": label, "accuracy": round(conf,2), "box": [x1,y1,x2,y2]})
 
-    # Evaluate Baseline Model
-    res_base = model_base(frame, verbose=False, conf=CONF_OBJECT)[0]
-    evaluate_results(res_base, model_base)
+    # The scheduler admits several requests at once; predict calls on one model set are serialized
+    with models.lock:
+        # Evaluate Baseline Model
+        res_base = models.base(frame, verbose=False, conf=CONF_OBJECT, imgsz=level["imgsz"])[0]
+        # Evaluate Custom Model (if loaded and the current quality level allows it)
+        res_custom = None
+        if models.custom and level["custom_model"]:
+            res_custom = models.custom(frame, verbose=False, conf=CONF_OBJECT, imgsz=level["imgsz"])[0]
+    evaluate_results(res_base, models.base)
+    if res_custom is not None:
+        evaluate_results(res_custom, models.custom)
+
+    return person_count, violation, violation_details, detected_objects
+
+
+def object_violation(obj):
+    return {"msg": f"PROHIBITED OBJECT: {obj['name'].upper()} ({int(obj['accuracy']*100)}% conf)",
+            "object": obj["name"], "confidence": obj["accuracy"], "track": obj.get("track")}
+
+
+def summarize(objects):
+    """Person count and violation for a list of (tracked) detections, same rules as run_models."""
+    person_count = 0
+    violation = False
+    violation_details = {}
+    for obj in objects:
+        if obj["name"] == 'person':
+            if obj["accuracy"] >= CONF_PERSON:
+                person_count += 1
+        elif obj["name"] in PROHIBITED_CLASSES and obj["accuracy"] >= CONF_OBJECT:
+            violation = True
+            violation_details = object_violation(obj)
+    return person_count, violation, violation_details
+
+
+def acquire_inference(state, data):
+    """Wait for an inference slot ranked by this session's urgency; False if none came in time."""
+    now = time.time()
+    klass, urgency = scheduler.classify(
+        no_face_remaining=NO_FACE_TIMEOUT - (now - state["last_face_timestamp"]),
+        timeout=NO_FACE_TIMEOUT,
+        risk=state.get("last_risk", 0),
+        staleness=now - state.get("last_inferred", state["created"]),
+    )
+    # A session with nothing to fall back on waits as long as it takes
+    timeout = SCHED_MAX_WAIT if state.get("last_detections") is not None else None
+    return scheduler.acquire(str(data.get('exam_id') or 'unknown'), klass, urgency, timeout)
+
+
+def get_tracker(state):
+    tracker = state.get("tracker")
+    if tracker is None:
+        tracker = state["tracker"] = SessionTracker(
+            {'person': CONF_PERSON, '*': CONF_OBJECT},
+            detect_every=TRACK_DETECT_EVERY,
+            max_tracks=TRACK_MAX_PER_SESSION,
+            redetect_motion=TRACK_REDETECT_MOTION,
+        )
+    return tracker
+
+
+def frame_motion(state, frame, level):
+    """Blur + diff against the session's previous frame → (movement_alert, changed fraction)."""
+    scale = level["diff_scale"]
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if scale != 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    ksize = max(3, int(21 * scale) | 1)
+    gray = cv2.GaussianBlur(gray, (ksize, ksize), 0)
+
+    movement_alert = False
+    changed = None
+    prev_frame = state["prev_frame"]
+    if prev_frame is not None and prev_frame.shape == gray.shape:
+        delta = cv2.absdiff(prev_frame, gray)
+        thresh = cv2.threshold(delta, 25, 255, cv2.THRESH_BINARY)[1]
+        # MOVE_THRESHOLD is calibrated for full resolution; scale it with the pixel count
+        if int(np.sum(thresh)) > MOVE_THRESHOLD * scale * scale:
+            movement_alert = True
+        changed = cv2.countNonZero(thresh) / thresh.size
+    state["prev_frame"] = gray
+    return movement_alert, changed
+
+
+def reply(payload, state=None, data=None):
+    """JSON by default; compact MessagePack (optionally delta) if the client asks via Accept."""
+    mode = compact_response.negotiate(request.headers.get('Accept'))
+    if mode is None:
+        resp = jsonify(payload)
+    else:
+        body = compact_response.compact(payload, PROHIBITED_CLASSES)
+        if mode == 'delta' and state is not None:
+            body = compact_response.delta(state, body, data.get('ack'))
+        mimetype = compact_response.MSGPACK_DELTA if mode == 'delta' else compact_response.MSGPACK
+        resp = Response(compact_response.encode(body), mimetype=mimetype)
+    resp.vary.add('Accept')
+    return resp
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return jsonify({
+        "sessions": len(sessions),
+        "cpu_plan": cpu_plan,
+        "tracks": sum(len(st["tracker"].tracks) for st in list(sessions.values()) if "tracker" in st),
+        "admission": admission.stats(),
+        "scheduler": scheduler.stats(),
+        "quality": quality.stats(),
+        "recorder": recorder.stats(),
+        "evidence": evidence.stats(),
+        "results": results.stats(),
+        "live_feed": live.stats(),
+        "no_face_timers": no_face_timers.stats(),
+        "models": registry.stats(),
+        "memory": memory.stats(),
+        "verification": verifier.stats() if VERIFY_CLIENT_REPORTS else None,
+    })
+
+
+def admin_authorized():
+    return bool(ADMIN_TOKEN) and request.headers.get('X-Admin-Token') == ADMIN_TOKEN
+
 
-    # Evaluate Custom Model (if loaded)
-    if model_custom:
-        res_custom = model_custom(frame, verbose=False, conf=CONF_OBJECT)[0]
-        evaluate_results(res_custom, model_custom)
+@app.route('/admin/memory', methods=['GET'])
+def admin_memory():
+    """Last memory report; ?refresh=1 runs a check now (may evict if over the limit)."""
+    if not admin_authorized():
+        return jsonify({"error": "Admin token required"}), 403
+    if request.args.get('refresh') or memory.last is None:
+        return jsonify(memory.check(memory_sessions(), drop_sessions))
+    return jsonify(memory.last)
 
 
+@app.route('/admin/models', methods=['GET'])
+def admin_models():
+    if not admin_authorized():
+        return jsonify({"error": "Admin token required"}), 403
+    return jsonify(registry.stats())
+
+
+@app.route('/admin/models/reload', methods=['POST'])
+def admin_reload_models():
+    """Load new weights in the background; optionally shadow them before the swap."""
+    if not admin_authorized():
+        return jsonify({"error": "Admin token required"}), 403
+    body = request.json or {}
+    paths = {"base": body.get('base', registry.active.paths['base']),
+             "custom": body.get('custom', registry.active.paths.get('custom'))}
+    for path in (paths['base'], paths['custom']):
+        if path and not os.path.exists(path):
+            return jsonify({"error": f"Weights not found: {path}"}), 400
+    try:
+        shadow_fraction = float(body.get('shadow_fraction', 0))
+        shadow_frames = int(body.get('shadow_frames', 200))
+    except (TypeError, ValueError):
+        return jsonify({"error": "shadow_fraction/shadow_frames must be numbers"}), 400
+    started = registry.reload(paths, shadow_fraction=min(max(shadow_fraction, 0.0), 1.0),
+                              shadow_frames=max(1, shadow_frames),
+                              auto_promote=bool(body.get('auto_promote', True)))
+    if not started:
+        return jsonify({"error": "A reload is already in progress", **registry.stats()}), 409
+    return jsonify(registry.stats()), 202
+
+
+@app.route('/admin/models/<action>', methods=['POST'])
+def admin_model_action(action):
+    if not admin_authorized():
+        return jsonify({"error": "Admin token required"}), 403
+    if action not in ('promote', 'abort'):
+        return jsonify({"error": "Unknown action"}), 404
+    done = registry.promote() if action == 'promote' else registry.abort()
+    if not done:
+        return jsonify({"error": "No candidate weights", **registry.stats()}), 409
+    return jsonify(registry.stats())
+
+
+@app.route('/admin/warmup', methods=['POST'])
+def admin_warmup():
+    """A blank frame through decode and the active models at the current quality level; no session is touched."""
+    if not admin_authorized():
+        return jsonify({"error": "Admin token required"}), 403
+    level = quality.current()
+    started = time.perf_counter()
+    _, jpeg = cv2.imencode('.jpg', np.zeros((480, 640, 3), dtype=np.uint8))
+    frame = decode_image(jpeg.tobytes(), upscale=level["upscale"])
+    # Competes for a slot like any frame, ranked below every live session
+    if not scheduler.acquire('warmup', 'over_quota', 0.0, SCHED_MAX_WAIT):
+        return jsonify({"warmed": False, "error": "No inference slot free"}), 503
+    try:
+        with registry.use() as models:
+            run_models(frame, level, models)
+    finally:
+        scheduler.release()
+    return jsonify({"warmed": True, "level": level["name"], "ms": round((time.perf_counter() - started) * 1000, 1)})
+
+
+# ─── Session migration (used by session_router.py when nodes join or leave) ───
+# Only what must survive a move: timers, stop flag, ids and the frame-diff baseline.
+# Trackers and verification state are rebuilt by the next frames on the new node.
+MIGRATED_FIELDS = ("last_face_timestamp", "created", "last_seen", "frame_count", "last_inferred",
+                   "last_risk", "last_violation_object", "stop_reason", "exam_id", "student_id")
+
+
+def export_session(state):
+    out = {f: state[f] for f in MIGRATED_FIELDS if f in state}
+    if state.get("prev_frame") is not None:
+        ok, png = cv2.imencode('.png', state["prev_frame"])
+        if ok:
+            out["prev_frame"] = base64.b64encode(png.tobytes()).decode()
+    return out
+
+
+def import_session(blob):
+    state = {f: blob[f] for f in MIGRATED_FIELDS if f in blob}
+    state["prev_frame"] = None
+    if blob.get("prev_frame"):
+        png = np.frombuffer(base64.b64decode(blob["prev_frame"]), dtype=np.uint8)
+        state["prev_frame"] = cv2.imdecode(png, cv2.IMREAD_GRAYSCALE)
+    return state
+
+
+@app.route('/admin/sessions', methods=['GET'])
+def admin_list_sessions():
+    if not admin_authorized():
+        return jsonify({"error": "Admin token required"}), 403
+    with sessions_lock:
+        return jsonify({"sessions": list(sessions)})
+
+
+@app.route('/admin/sessions/export', methods=['POST'])
+def admin_export_sessions():
+    """Hand sessions over to another node: serialized state, removed here unless keep=true."""
+    if not admin_authorized():
+        return jsonify({"error": "Admin token required"}), 403
+    body = request.json or {}
+    keys = body.get('sessions') or []
+    out = {}
+    with sessions_lock:
+        for key in keys:
+            state = sessions.get(key) if body.get('keep') else sessions.pop(key, None)
+            if state is not None:
+                out[key] = export_session(state)
+    if not body.get('keep'):
+        for key in out:
+            no_face_timers.cancel(key)
+            recorder.forget(key)
+    return jsonify({"sessions": out})
+
+
+@app.route('/admin/sessions/import', methods=['POST'])
+def admin_import_sessions():
+    if not admin_authorized():
+        return jsonify({"error": "Admin token required"}), 403
+    blobs = (request.json or {}).get('sessions') or {}
+    now = time.time()
+    imported = {}
+    try:
+        for key, blob in blobs.items():
+            imported[key] = import_session(blob)
+    except (TypeError, ValueError, KeyError) as e:
+        return jsonify({"error": f"Bad session blob: {e}"}), 400
+    for state in imported.values():
+        state.setdefault("last_face_timestamp", now)
+        state.setdefault("created", now)
+        state["last_seen"] = now
+    with sessions_lock:
+        sessions.update(imported)
+    for key, state in imported.items():
+        if not state.get("stop_reason"):
+            no_face_timers.arm(key, max(0.0, NO_FACE_TIMEOUT - (now - state["last_face_timestamp"])))
+    return jsonify({"imported": len(imported)})
+
+
+@app.route('/proctor/detect', methods=['POST', 'OPTIONS'])
+def process_frame():
+    if request.method == 'OPTIONS':
+        return jsonify({"status": "ok"}), 200
+
+    data = request.json
+    if not data or not data.get('image'):
+        return jsonify({"error": "No image provided"}), 400
+
+    # Admission happens before any decode: a superseded frame costs almost nothing
+    key = session_key(data)
+    if not admission.enter(key):
+        return reply({"superseded": True, "status": "superseded"})
+    try:
+        started = quality.enter()
+        try:
+            return detect_frame(data, key)
+        finally:
+            quality.exit(started)
+    finally:
+        admission.exit(key)
+
+
+def server_detections(state, data, key, raw, level):
+    """Decode, motion check and (tracked) inference for one frame; None if the image is unreadable."""
+    try:
+        frame = decode_image(raw, upscale=level["upscale"])
+    except Exception:
+        return None
+
+    # Keep the sent bytes (not the decoded array) for /debug_frame
+    recorder.record(key, raw, {"size": [frame.shape[1], frame.shape[0]]})
+    print(f"📸 Frame received: {frame.shape[1]}x{frame.shape[0]} px")
+
+    # ─── Body movement (frame differencing) ──────────────────────────
+    movement_alert, changed = frame_motion(state, frame, level)
+
+    # ─── Run Models ─────────────────────────────────────────────────────────
+    # Motion gate: a near-identical frame can reuse the previous detections, a bounded number of times
+    still = (level["motion_gate"] and changed is not None and changed < level["motion_gate"]
+             and state.get("last_detections") is not None)
+    force = still and state.get("gated_frames", 0) >= MOTION_GATE_MAX_FRAMES
+    tracker = get_tracker(state)
+    new_tracks = set()
+    if still and not force:
+        state["gated_frames"] = state.get("gated_frames", 0) + 1
+        person_count, violation, violation_details, detected_objects = state["last_detections"]
+    elif (force or tracker.should_detect(changed)) and acquire_inference(state, data):
+        try:
+            # The active weights are pinned for this inference; a hot swap takes effect on the next one
+            with registry.use() as models:
+                started = time.perf_counter()
+                person_count, violation, violation_details, detected_objects = run_models(frame, level, models)
+            registry.maybe_shadow(frame, level, detected_objects, (time.perf_counter() - started) * 1000)
+        finally:
+            scheduler.release()
+        state["last_inferred"] = time.time()
+        state["gated_frames"] = 0
+        # Only persons and prohibited objects are tracked; the rest is informational
+        tracked = [o for o in detected_objects if o["name"] == 'person' or o["name"] in PROHIBITED_CLASSES]
+        new_tracks = {t.id for t in tracker.update(tracked, time.time(), (frame.shape[1], frame.shape[0]))}
+        if violation:
+            _, violation, violation_details = summarize(tracked)
+        state["last_detections"] = (person_count, violation, violation_details, detected_objects)
+    else:
+        # Between detections (or no inference slot in time): propagate the session's tracks
+        detected_objects = tracker.predict(time.time())
+        person_count, violation, violation_details = summarize(detected_objects)
+    return frame, movement_alert, person_count, violation, violation_details, detected_objects, new_tracks
+
+
+def detect_frame(data, key):
+    image_data = data['image']
+    state = get_session(key)
+    level = quality.current()
+    state["exam_id"], state["student_id"] = data.get('exam_id'), data.get('student_id')
+
+    # Already stopped server-side (the no-face timer fired while no frames arrived)
+    if state.get("stop_reason"):
+        return reply({"action": "STOP_EXAM", "reason": state["stop_reason"], "violation": True}, state, data)
+
+    # ─── Frame sampling under heavy load ──────────────────────────────
+    state["frame_count"] = state.get("frame_count", 0) + 1
+    if level["frame_stride"] > 1 and state["frame_count"] % level["frame_stride"] and state.get("last_response"):
+        return reply({**state["last_response"], "reused": True, "quality_level": level["name"]}, state, data)
+
+    try:
+        raw = decode_b64(image_data)
+    except Exception as e:
+        return jsonify({"error": f"Image decode failed: {str(e)}"}), 400
+
+    # ─── Client verification mode: trust the client's report unless sampled ──
+    report = data.get('client_report') if VERIFY_CLIENT_REPORTS else None
+    verification = None
+    if report is not None:
+        vstate = state.setdefault("verify", {})
+        run_server, reason = verifier.decide(vstate, report, data.get('frame_hash'))
+        verification = {"mode": "verified" if run_server else "trusted", "reason": reason}
+
+    if verification and verification["mode"] == "trusted":
+        detected_objects = verifier.detections(report)
+        person_count, violation, violation_details = summarize(detected_objects)
+        movement_alert = False
+    else:
+        detection = server_detections(state, data, key, raw, level)
+        if detection is None:
+            return jsonify({"error": "Image decode failed"}), 400
+        frame, movement_alert, person_count, violation, violation_details, detected_objects, new_tracks = detection
+        if report is not None:
+            problems = verifier.check(vstate, report, data.get('frame_hash'), frame, person_count,
+                                      [o["name"] for o in detected_objects])
+            verification["disagreements"] = problems
+            verification["escalated"] = vstate.get("escalated_until", 0) > time.time()
 
     # ─── Multiple persons (only counted if above strict threshold) ────
     if person_count > 1:
@@ -197,24 +867,36 @@ def process_frame():
     # ─── No-face timeout ──────────────────────────────────────────────
     current_time = time.time()
     if person_count > 0:
-        last_face_timestamp = current_time
+        state["last_face_timestamp"] = current_time
+        no_face_timers.arm(key, NO_FACE_TIMEOUT)
 
-    no_face_duration = current_time - last_face_timestamp
+    no_face_duration = current_time - state["last_face_timestamp"]
     if no_face_duration > NO_FACE_TIMEOUT:
-        return jsonify({
+        evidence.submit(key, raw, "no_face_timeout", {"seconds": int(no_face_duration)})
+        no_face_timers.cancel(key)
+        stop_sessions([key], current_time)
+        return reply({
             "action": "STOP_EXAM",
             "reason": f"No face detected for {int(no_face_duration)} seconds.",
             "violation": True
-        })
-
-    # ─── Body movement (frame differencing) ──────────────────────────
-    movement_alert = False
-    if prev_frame is not None:
-        delta = cv2.absdiff(prev_frame, gray)
-        thresh = cv2.threshold(delta, 25, 255, cv2.THRESH_BINARY)[1]
-        if int(np.sum(thresh)) > MOVE_THRESHOLD:
-            movement_alert = True
-    prev_frame = gray
+        }, state, data)
+
+    if verification and verification["mode"] == "trusted":
+        # No track ids: a violation is new when its label was not already being reported
+        new_evidence = violation and violation_details["object"] != state.get("last_violation_object")
+        records = [violation_details] if new_evidence else []
+    elif violation_details.get("object") == "multiple_persons":
+        new_evidence = any(o.get("track") in new_tracks for o in detected_objects if o["name"] == 'person')
+        records = [violation_details] if new_evidence else []
+    else:
+        # One record per tracked object: every prohibited object whose track is new, not just
+        # the one summarize() reported
+        records = [object_violation(o) for o in new_tracked(detected_objects, new_tracks, PROHIBITED_CLASSES,
+                                                              CONF_OBJECT)]
+    for details in records:
+        # Queued for the background writer; no disk I/O on the request path
+        evidence.submit(key, raw, details["object"], details)
+    state["last_violation_object"] = violation_details.get("object") if violation else None
 
     # ─── Build response ───────────────────────────────────────────────
     response = {
@@ -223,18 +905,37 @@ def process_frame():
         "violation_details": violation_details,
         "movement_alert": movement_alert,
         "objects": detected_objects,
-        "status": "warning" if (violation or movement_alert) else "normal"
+        "status": "warning" if (violation or movement_alert) else "normal",
+        "quality_level": level["name"]
     }
 
+    if verification:
+        response["verification"] = verification
+
     if no_face_duration > 5:
         response["warning"] = f"Face not visible! Auto-stop in {int(NO_FACE_TIMEOUT - no_face_duration)}s"
 
-    return jsonify(response)
+    confidences = {}
+    for obj in detected_objects:
+        confidences[obj["name"]] = max(confidences.get(obj["name"], 0), obj["accuracy"])
+    state["last_risk"] = frame_risk(person_count, [violation_details["object"]] if violation else [], movement_alert)
+    results.append(data.get('exam_id'), key, current_time, person_count, movement_alert, confidences,
+                   state["last_risk"])
+    live.publish(data.get('exam_id'), key, data.get('student_id'), current_time, state["last_risk"],
+                 violation, violation_details.get("object"))
+
+    state["last_response"] = response
+    return reply(response, state, data)
 
 
 if __name__ == "__main__":
-    print("🛡️  AI Proctoring Flask Backend — http://localhost:5001")
+    import argparse
+    parser = argparse.ArgumentParser(description="AI Proctoring Flask Backend")
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5001)),
+                        help="several local instances can sit behind session_router.py")
+    port = parser.parse_args().port
+    print(f"🛡️  AI Proctoring Flask Backend — http://localhost:{port}")
     print(f"📱  Phone/object threshold: {CONF_OBJECT} ({int(CONF_OBJECT*100)}%)")
     print(f"👤  Person threshold:        {CONF_PERSON} ({int(CONF_PERSON*100)}%) — prevents false positives")
-    print("🔗  Test endpoint: http://localhost:5001/test")
-    app.run(host='0.0.0.0', port=5001, debug=False)
+    print(f"🔗  Test endpoint: http://localhost:{port}/test")
+    app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,110 @@
+"""
+Per-session flight recorder for debugging what the detect endpoint received.
+
+Frames are kept as the encoded bytes the client sent (no decode, no copy — the
+recorder only holds a reference), in a small ring per session, with one global
+memory budget across all sessions. Decoding/encoding only happens when someone
+asks for a frame through /debug_frame.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class FlightRecorder:
+    def __init__(self, frames_per_session=20, sample_every=1, budget_bytes=64 * 1024 * 1024):
+        self.frames_per_session = frames_per_session
+        self.sample_every = max(1, sample_every)
+        self.budget_bytes = budget_bytes
+        self.enabled = frames_per_session > 0 and budget_bytes > 0
+
+        self._rings = {}              # session → deque[(seq, ts, data, meta)]
+        self._order = OrderedDict()   # (session, seq) → size, oldest first
+        self._counters = {}           # session → frames seen (for sampling)
+        self._bytes = 0
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def record(self, session, data, meta=None):
+        """Hot path: O(1), keeps a reference to `data` (bytes) if sampled."""
+        if not self.enabled:
+            return
+        with self._lock:
+            count = self._counters.get(session, 0)
+            self._counters[session] = count + 1
+            if count % self.sample_every:
+                return
+
+            ring = self._rings.get(session)
+            if ring is None:
+                ring = self._rings[session] = deque()
+            if len(ring) >= self.frames_per_session:
+                self._evict_oldest_of(session)
+
+            self._seq += 1
+            ring.append((self._seq, time.time(), data, meta or {}))
+            self._order[(session, self._seq)] = len(data)
+            self._bytes += len(data)
+
+            while self._bytes > self.budget_bytes and self._order:
+                (old_session, _), _ = next(iter(self._order.items()))
+                self._evict_oldest_of(old_session)
+
+    def _evict_oldest_of(self, session):
+        ring = self._rings[session]
+        seq, _, data, _ = ring.popleft()
+        self._order.pop((session, seq), None)
+        self._bytes -= len(data)
+        if not ring:
+            del self._rings[session]
+
+    def forget(self, session):
+        with self._lock:
+            ring = self._rings.pop(session, ())
+            for seq, _, data, _ in ring:
+                self._order.pop((session, seq), None)
+                self._bytes -= len(data)
+            self._counters.pop(session, None)
+
+    # ─── Read side (debug endpoints only) ───────────────────────────────────
+    def latest_session(self):
+        with self._lock:
+            if not self._order:
+                return None
+            return next(reversed(self._order))[0]
+
+    def frames(self, session):
+        """Metadata for the frames held for `session`, oldest first."""
+        with self._lock:
+            return [
+                {"seq": seq, "time": ts, "bytes": len(data), **meta}
+                for seq, ts, data, meta in self._rings.get(session, ())
+            ]
+
+    def get(self, session, index=-1):
+        """(timestamp, bytes, meta) for one frame, or None."""
+        with self._lock:
+            ring = self._rings.get(session)
+            if not ring:
+                return None
+            try:
+                _, ts, data, meta = ring[index]
+            except IndexError:
+                return None
+            return ts, data, meta
+
+    def session_bytes(self):
+        """session → bytes of frames held (for memory accounting)."""
+        with self._lock:
+            return {session: sum(len(data) for _, _, data, _ in ring) for session, ring in self._rings.items()}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "sessions": len(self._rings),
+                "frames": len(self._order),
+                "bytes": self._bytes,
+                "budget_bytes": self.budget_bytes,
+                "sample_every": self.sample_every,
+            }
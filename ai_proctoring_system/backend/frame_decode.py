@@ -0,0 +1,20 @@
+"""
+Frame decoding shared by the Flask backend and the offline harness, so a frame
+is evaluated with exactly the preprocessing it gets in production.
+"""
+import io
+
+import cv2
+import numpy as np
+from PIL import Image
+
+
+def decode_image(data, upscale=True):
+    """Decode image bytes → OpenCV BGR frame, resized to 640px wide."""
+    img = Image.open(io.BytesIO(data)).convert("RGB")
+    # Resize to minimum 640px wide so YOLO can detect small objects
+    w, h = img.size
+    if upscale and w < 640:
+        ratio = 640 / w
+        img = img.resize((640, int(h * ratio)), Image.LANCZOS)
+    return cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
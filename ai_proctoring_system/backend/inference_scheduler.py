@@ -0,0 +1,180 @@
+"""
+Inference scheduler: a fixed number of inference slots, handed out by urgency
+instead of arrival order, with per-exam token buckets for fairness.
+
+Waiting requests are ranked by (class, urgency, arrival):
+
+    critical    close to the no-face timeout, or an active high-risk violation
+    elevated    recent moderate risk
+    normal      everything else
+    over_quota  the request's exam has used up its token bucket
+
+Each exam's bucket refills at `exam_share` of the recent completion rate, so
+under contention no exam gets more than that share of capacity. The scheduler
+is work-conserving: an over-quota exam still gets idle slots when nobody
+in-quota is waiting.
+"""
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+CLASSES = ('critical', 'elevated', 'normal', 'over_quota')
+
+
+class _Waiter:
+    __slots__ = ('exam', 'klass', 'urgency', 'seq', 'event', 'granted', 'enqueued')
+
+    def __init__(self, exam, klass, urgency, seq):
+        self.exam = exam
+        self.klass = klass
+        self.urgency = urgency
+        self.seq = seq
+        self.event = threading.Event()
+        self.granted = False
+        self.enqueued = time.monotonic()
+
+    def key(self):
+        return (CLASSES.index(self.klass), -self.urgency, self.seq)
+
+    def __lt__(self, other):
+        return self.key() < other.key()
+
+
+class InferenceScheduler:
+    def __init__(self, slots, exam_share=0.5, burst_seconds=2.0, min_rate=0.5, max_exams=1000):
+        self.slots = max(1, slots)
+        self.exam_share = exam_share
+        self.burst_seconds = burst_seconds
+        self.min_rate = min_rate          # tokens/s floor while throughput is still unknown
+        self.max_exams = max_exams        # idle exams are forgotten once the tables grow past this
+
+        self.in_flight = 0
+        self._waiting = []                # heap of _Waiter
+        self._seq = itertools.count()
+        self._buckets = {}                # exam → [tokens, last_refill]
+        self._exam_stats = {}             # exam → {"granted": n, "waiting": n}
+        self._completions = deque(maxlen=200)
+        self._waits = deque(maxlen=500)
+        self._lock = threading.Lock()
+        self.granted = {k: 0 for k in CLASSES}
+
+    # ─── Policy ─────────────────────────────────────────────────────────────
+    @staticmethod
+    def classify(no_face_remaining, timeout, risk, staleness, stale_after=10.0):
+        """Session signals → (class, urgency 0..1)."""
+        deadline = max(0.0, 1 - no_face_remaining / timeout) if timeout else 0.0
+        urgency = 0.5 * deadline + 0.3 * min(1.0, risk / 100) + 0.2 * min(1.0, staleness / stale_after)
+        if no_face_remaining < 3 or risk >= 70:
+            return 'critical', urgency
+        if risk >= 40 or no_face_remaining < timeout / 2:
+            return 'elevated', urgency
+        return 'normal', urgency
+
+    def _rate(self, now):
+        recent = [t for t in self._completions if now - t < 10]
+        throughput = len(recent) / 10 if recent else 0
+        return max(self.min_rate, throughput * self.exam_share)
+
+    def _tokens(self, exam, now):
+        rate = self._rate(now)
+        bucket = self._buckets.get(exam)
+        if bucket is None:
+            bucket = self._buckets[exam] = [rate * self.burst_seconds, now]
+        bucket[0] = min(rate * self.burst_seconds, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        return bucket
+
+    def _peek_tokens(self, exam, now):
+        """What _tokens() would report, without refilling or creating the bucket."""
+        rate = self._rate(now)
+        bucket = self._buckets.get(exam)
+        if bucket is None:
+            return rate * self.burst_seconds
+        return min(rate * self.burst_seconds, bucket[0] + (now - bucket[1]) * rate)
+
+    # ─── Slots ──────────────────────────────────────────────────────────────
+    def acquire(self, exam, klass, urgency, timeout=None):
+        """Block until a slot is granted (True) or `timeout` passes (False)."""
+        with self._lock:
+            now = time.monotonic()
+            stats = self._exam_stats.setdefault(exam, {"granted": 0, "waiting": 0})
+            bucket = self._tokens(exam, now)
+            if self.in_flight < self.slots and not self._waiting:
+                self._grant(exam, klass if bucket[0] >= 1 else 'over_quota', bucket, 0.0)
+                return True
+            waiter = _Waiter(exam, klass, urgency, next(self._seq))
+            heapq.heappush(self._waiting, waiter)
+            stats["waiting"] += 1
+
+        if waiter.event.wait(timeout):
+            return True
+        with self._lock:
+            if waiter.granted:        # granted just as we timed out
+                return True
+            self._waiting.remove(waiter)
+            heapq.heapify(self._waiting)
+            stats["waiting"] -= 1
+            return False
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._completions.append(time.monotonic())
+            self._dispatch()
+            if len(self._exam_stats) > self.max_exams:
+                self._prune()
+
+    def _prune(self):
+        """Forget exams with nothing waiting (their bucket refills from full if they return)."""
+        waiting = {w.exam for w in self._waiting}
+        for exam in [e for e, s in self._exam_stats.items() if not s["waiting"] and e not in waiting]:
+            del self._exam_stats[exam]
+            self._buckets.pop(exam, None)
+
+    def _grant(self, exam, klass, bucket, waited):
+        # Borrowed (over-quota) grants leave a debt, bounded so an exam recovers within a burst
+        bucket[0] = max(bucket[0] - 1, -self._rate(time.monotonic()) * self.burst_seconds)
+        self.in_flight += 1
+        self.granted[klass] += 1
+        self._exam_stats[exam]["granted"] += 1
+        self._waits.append(waited)
+
+    def _dispatch(self):
+        now = time.monotonic()
+        while self.in_flight < self.slots and self._waiting:
+            # Best in-quota waiter first; fall back to the best overall (work-conserving)
+            chosen, klass = None, None
+            for waiter in sorted(self._waiting):
+                if self._tokens(waiter.exam, now)[0] >= 1:
+                    chosen, klass = waiter, waiter.klass
+                    break
+            if chosen is None:
+                chosen, klass = self._waiting[0], 'over_quota'
+            self._waiting.remove(chosen)
+            heapq.heapify(self._waiting)
+            self._exam_stats[chosen.exam]["waiting"] -= 1
+            self._grant(chosen.exam, klass, self._tokens(chosen.exam, now), now - chosen.enqueued)
+            chosen.granted = True
+            chosen.event.set()
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            depths = {k: 0 for k in CLASSES}
+            for waiter in self._waiting:
+                in_quota = self._peek_tokens(waiter.exam, now) >= 1
+                depths[waiter.klass if in_quota else 'over_quota'] += 1
+            waits = sorted(self._waits)
+            return {
+                "policy": {"slots": self.slots, "exam_share": self.exam_share,
+                           "burst_seconds": self.burst_seconds, "classes": list(CLASSES)},
+                "in_flight": self.in_flight,
+                "queue_depth": depths,
+                "granted": dict(self.granted),
+                "wait_p95_ms": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 1) if waits else None,
+                "exam_rate": round(self._rate(now), 2),
+                "exams": {e: {**s, "tokens": round(self._peek_tokens(e, now), 2)}
+                          for e, s in self._exam_stats.items() if e in self._buckets},
+            }
@@ -0,0 +1,179 @@
+"""
+Live per-exam aggregates for proctor dashboards, served as Server-Sent Events.
+
+The detect path calls publish() once per processed frame: an O(1) update of
+that exam's aggregate under a lock (session risk, in-violation counter, new
+violation episodes). Nothing is serialized there.
+
+A single ticker thread wakes every `tick` seconds, and for each exam that
+changed and has subscribers builds one snapshot, serializes it once into an
+SSE frame and hands the same bytes to every subscriber's bounded queue. A slow
+subscriber drops old snapshots (each one is complete), so a hundred open
+dashboards cost one json.dumps per exam per tick.
+
+    event: aggregate
+    data: {"exam_id": ..., "active_sessions": 41, "in_violation": 3,
+           "top_risk": [{"session": ..., "student_id": ..., "risk": 70, ...}],
+           "episodes": [{"id": 17, "session": ..., "kind": "cell phone", "ts": ...}], ...}
+"""
+import heapq
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+
+class _Exam:
+    __slots__ = ('sessions', 'in_violation', 'episodes', 'dirty', 'subscribers', 'version')
+
+    def __init__(self):
+        self.sessions = {}                 # session → {"student_id", "last_seen", "risk", "violation"}
+        self.in_violation = 0
+        self.episodes = deque(maxlen=20)   # most recent violation episodes
+        self.dirty = True
+        self.subscribers = set()
+        self.version = 0
+
+
+class Subscriber:
+    def __init__(self, exam_id, max_queue):
+        self.exam_id = exam_id
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def offer(self, payload):
+        while True:
+            try:
+                self.queue.put_nowait(payload)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()     # drop the oldest snapshot
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+
+class LiveFeed:
+    def __init__(self, tick=1.0, active_window=30.0, top_n=10, max_queue=4, heartbeat=15.0):
+        self.tick = tick
+        self.active_window = active_window
+        self.top_n = top_n
+        self.max_queue = max_queue
+        self.heartbeat = heartbeat
+        self._exams = {}
+        self._episode_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.published = 0
+        self.broadcasts = 0
+        threading.Thread(target=self._ticker, name='live-feed', daemon=True).start()
+
+    def _exam(self, exam_id):
+        exam = self._exams.get(exam_id)
+        if exam is None:
+            exam = self._exams[exam_id] = _Exam()
+        return exam
+
+    # ─── Detect path ────────────────────────────────────────────────────────
+    def publish(self, exam_id, session, student_id, ts, risk, violation, kind=None):
+        with self._lock:
+            exam = self._exam(exam_id)
+            st = exam.sessions.get(session)
+            if st is None:
+                st = exam.sessions[session] = {"student_id": student_id, "last_seen": ts,
+                                               "risk": 0, "violation": None}
+            was = st["violation"]
+            now_kind = kind if violation else None
+            if now_kind and now_kind != was:
+                exam.episodes.append({"id": next(self._episode_ids), "session": session,
+                                      "student_id": st["student_id"], "kind": now_kind, "ts": ts})
+            exam.in_violation += (now_kind is not None) - (was is not None)
+            st["violation"] = now_kind
+            st["risk"] = risk
+            st["last_seen"] = ts
+            exam.dirty = True
+            self.published += 1
+
+    # ─── Subscribers ────────────────────────────────────────────────────────
+    def subscribe(self, exam_id):
+        sub = Subscriber(exam_id, self.max_queue)
+        with self._lock:
+            exam = self._exam(exam_id)
+            exam.subscribers.add(sub)
+            exam.dirty = True          # new subscriber gets a snapshot on the next tick
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            exam = self._exams.get(sub.exam_id)
+            if exam:
+                exam.subscribers.discard(sub)
+
+    def stream(self, sub):
+        """SSE byte chunks for one subscriber (blocks between ticks)."""
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    yield sub.queue.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield b": keep-alive\n\n"
+        finally:
+            self.unsubscribe(sub)
+
+    # ─── Ticker ─────────────────────────────────────────────────────────────
+    def _expire(self, exam, now):
+        # Drop sessions that stopped sending; keep the in-violation counter exact
+        for session, st in list(exam.sessions.items()):
+            if now - st["last_seen"] > self.active_window:
+                if st["violation"] is not None:
+                    exam.in_violation -= 1
+                del exam.sessions[session]
+                exam.dirty = True
+
+    def _snapshot(self, exam_id, exam, now):
+        top = heapq.nlargest(self.top_n, exam.sessions.items(), key=lambda kv: kv[1]["risk"])
+        exam.version += 1
+        return {
+            "exam_id": exam_id,
+            "version": exam.version,
+            "ts": now,
+            "active_sessions": len(exam.sessions),
+            "in_violation": exam.in_violation,
+            "top_risk": [{"session": s, "student_id": st["student_id"], "risk": st["risk"],
+                          "violation": st["violation"]} for s, st in top if st["risk"] > 0],
+            "episodes": list(exam.episodes),
+        }
+
+    def _ticker(self):
+        while True:
+            time.sleep(self.tick)
+            now = time.time()
+            with self._lock:
+                work = []
+                for exam_id, exam in list(self._exams.items()):
+                    self._expire(exam, now)
+                    if not exam.subscribers:
+                        if not exam.sessions:
+                            del self._exams[exam_id]
+                        continue
+                    if exam.dirty:
+                        exam.dirty = False
+                        work.append((self._snapshot(exam_id, exam, now), list(exam.subscribers)))
+            # Serialize and fan out outside the lock; one payload shared by all subscribers
+            for snapshot, subscribers in work:
+                payload = f"event: aggregate\ndata: {json.dumps(snapshot, separators=(',', ':'))}\n\n".encode()
+                for sub in subscribers:
+                    sub.offer(payload)
+                self.broadcasts += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "exams": len(self._exams),
+                "subscribers": sum(len(e.subscribers) for e in self._exams.values()),
+                "published": self.published,
+                "broadcasts": self.broadcasts,
+            }
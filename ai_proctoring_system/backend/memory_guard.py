@@ -0,0 +1,220 @@
+"""
+Memory accounting and a leak guard for long-running detect servers.
+
+Every `interval` seconds check() walks the live sessions and the registered
+subsystems and records bytes held per session (frame-diff baselines, cached
+detections, tracks, recorder frames) and per subsystem, next to the process
+RSS. The RSS history gives a growth rate, so slow creep over an exam window
+is visible on the admin endpoint long before it is a problem.
+
+With `limit_bytes` set, an RSS over the limit evicts the oldest idle sessions
+(least recently seen first, never one seen within `min_idle` seconds) until
+the accounted bytes freed bring RSS back under `target` of the limit. Freed
+Python memory is rarely handed back to the OS, so after an eviction RSS is not
+trusted on its own: usage is estimated as the RSS at that eviction plus the
+change in accounted bytes since, until RSS itself drops below that point.
+
+With `trace_frames` > 0, tracemalloc runs and every `trace_every`-th check
+diffs a snapshot against the previous one and against the first, so the
+allocation sites that keep growing show up by file and line.
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+
+def rss_bytes():
+    """Current resident set size (peak RSS where /proc is unavailable; None on Windows)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def deep_size(obj, depth=6, seen=None):
+    """Approximate bytes held by `obj` and what it references (numpy buffers included)."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen or depth < 0:
+        return 0
+    seen.add(id(obj))
+    nbytes = getattr(obj, 'nbytes', None)
+    if isinstance(nbytes, int):                   # numpy arrays, memoryviews
+        # An owning array's getsizeof already includes its buffer; a view only its header
+        return sys.getsizeof(obj) if getattr(obj, 'base', None) is not None else max(sys.getsizeof(obj), nbytes)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+    if isinstance(obj, dict):
+        return size + sum(deep_size(k, depth - 1, seen) + deep_size(v, depth - 1, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset, deque)):
+        return size + sum(deep_size(v, depth - 1, seen) for v in obj)
+    fields = getattr(obj, '__dict__', None)
+    if fields is not None:
+        size += deep_size(fields, depth - 1, seen)
+    for slot in getattr(type(obj), '__slots__', ()):
+        size += deep_size(getattr(obj, slot, None), depth - 1, seen)
+    return size
+
+
+class MemoryGuard:
+    def __init__(self, limit_bytes=0, target=0.85, min_idle=60.0, interval=15.0, trace_frames=0,
+                 trace_every=4, top=15):
+        self.limit_bytes = limit_bytes
+        self.target = target
+        self.min_idle = min_idle
+        self.interval = interval
+        self.trace_frames = trace_frames
+        self.trace_every = max(1, trace_every)
+        self.top = top
+        self._subsystems = {}
+        self._history = deque(maxlen=240)        # (ts, rss)
+        self._first_snapshot = None
+        self._last_snapshot = None
+        self._last_trace = None
+        self._checks = 0
+        self._lock = threading.Lock()
+        self.last = None
+        self.evicted = 0
+        self._anchor = None                      # (estimated usage, accounted bytes) at the last eviction
+        if trace_frames and not tracemalloc.is_tracing():
+            tracemalloc.start(trace_frames)
+
+    def register(self, name, fn):
+        """`fn()` → bytes held by a subsystem outside the per-session states."""
+        self._subsystems[name] = fn
+
+    # ─── Checks ─────────────────────────────────────────────────────────────
+    def check(self, sessions, evict, now=None):
+        """
+        sessions: [(key, last_seen, {"part": bytes, ...})]; evict(keys) drops them.
+        Returns (and keeps) the report served on the admin endpoint.
+        """
+        with self._lock:
+            self._checks += 1
+            now = now or time.time()
+            rss = rss_bytes()
+            if rss is not None:
+                self._history.append((now, rss))
+
+            per_session = [(key, seen, parts, sum(parts.values())) for key, seen, parts in sessions]
+            by_part = {}
+            for _, _, parts, _ in per_session:
+                for part, n in parts.items():
+                    by_part[part] = by_part.get(part, 0) + n
+            subsystems = {}
+            for name, fn in self._subsystems.items():
+                try:
+                    subsystems[name] = int(fn())
+                except Exception as e:
+                    subsystems[name] = None
+                    print(f"⚠️ Memory accounting for {name} failed: {e}")
+
+            accounted = sum(s[3] for s in per_session) + sum(v for v in subsystems.values() if v)
+            usage = rss
+            if rss is not None and self._anchor is not None:
+                anchor_usage, anchor_accounted = self._anchor
+                estimate = anchor_usage + accounted - anchor_accounted
+                if rss <= estimate:
+                    self._anchor = None              # RSS caught up (or memory went back to the OS)
+                else:
+                    usage = estimate
+
+            evicted = []
+            if self.limit_bytes and usage is not None and usage > self.limit_bytes:
+                need = usage - self.limit_bytes * self.target
+                idle = sorted((s for s in per_session if now - s[1] > self.min_idle), key=lambda s: s[1])
+                freed = 0
+                for key, _, _, total in idle:
+                    if freed >= need:
+                        break
+                    evicted.append(key)
+                    freed += total
+                if evicted:
+                    evict(evicted)
+                    self.evicted += len(evicted)
+                    self._anchor = (usage, accounted)
+                    print(f"🧯 Usage ~{usage / 2**20:.0f} MB (RSS {rss / 2**20:.0f} MB) over the "
+                          f"{self.limit_bytes / 2**20:.0f} MB limit — evicted {len(evicted)} idle session(s), "
+                          f"~{freed / 2**20:.1f} MB accounted")
+                else:
+                    print(f"⚠️ Usage ~{usage / 2**20:.0f} MB over the limit and no idle sessions to evict")
+
+            if self.trace_frames and self._checks % self.trace_every == 1 % self.trace_every:
+                self._last_trace = self._trace()
+            heaviest = sorted(per_session, key=lambda s: -s[3])[:self.top]
+            self.last = {
+                "ts": now,
+                "rss_bytes": rss,
+                "estimated_bytes": usage,
+                "limit_bytes": self.limit_bytes or None,
+                "rss_growth_bytes_per_hour": self._growth(),
+                "sessions": {
+                    "count": len(per_session),
+                    "bytes": sum(s[3] for s in per_session),
+                    "by_part": by_part,
+                    "heaviest": [{"session": k, "bytes": t, "idle_seconds": round(now - seen, 1), **parts}
+                                 for k, seen, parts, t in heaviest],
+                },
+                "subsystems": subsystems,
+                "evicted": {"this_check": len(evicted), "total": self.evicted},
+                "tracemalloc": self._last_trace,
+            }
+            return self.last
+
+    def _growth(self):
+        """Least-squares slope of RSS over the kept history, in bytes per hour."""
+        if len(self._history) < 4:
+            return None
+        t0 = self._history[0][0]
+        xs = [t - t0 for t, _ in self._history]
+        ys = [r for _, r in self._history]
+        mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+        var = sum((x - mx) ** 2 for x in xs)
+        if not var:
+            return None
+        return int(sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / var * 3600)
+
+    def _trace(self):
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        first, last = self._first_snapshot, self._last_snapshot
+        self._last_snapshot = snapshot
+        if first is None:
+            self._first_snapshot = snapshot
+            return {"traced_bytes": tracemalloc.get_traced_memory()[0], "since_last": [], "since_start": []}
+
+        def diff(base):
+            return [{"where": str(stat.traceback[0]), "size_diff": stat.size_diff, "count_diff": stat.count_diff,
+                     "size": stat.size} for stat in snapshot.compare_to(base, 'lineno')[:self.top]]
+        return {"traced_bytes": tracemalloc.get_traced_memory()[0],
+                "since_last": diff(last), "since_start": diff(first)}
+
+    def run(self, collect, evict):
+        """Check forever; `collect()` returns the sessions list for check()."""
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check(collect(), evict)
+            except Exception as e:
+                print(f"⚠️ Memory check failed: {e}")
+
+    def start(self, collect, evict):
+        threading.Thread(target=self.run, args=(collect, evict), name='memory-guard', daemon=True).start()
+        return self
+
+    def stats(self):
+        last = self.last or {}
+        return {"rss_bytes": last.get("rss_bytes"), "limit_bytes": self.limit_bytes or None,
+                "rss_growth_bytes_per_hour": last.get("rss_growth_bytes_per_hour"), "evicted": self.evicted}
@@ -0,0 +1,245 @@
+"""
+Detection weights that can be replaced while the backend is serving.
+
+Requests take the active model set for the duration of one inference
+(`with registry.use() as models:`). An Ultralytics model is not safe to call
+from several threads at once, so every call on a set goes through its
+`lock`; requests still decode and track in parallel. A reload loads and warms the new weights
+on a background thread, optionally runs them in shadow on a sampled fraction
+of live frames, and then swaps the active set with a single assignment under
+the lock, so every request sees either the old models or the new ones. The
+old set is released (and memory collected) once its last in-flight request
+returns it.
+
+Shadow evaluation never adds latency to a request: sampled frames are queued
+(bounded, dropped when full) to one worker thread that runs the candidate and
+compares it with what the active models returned.
+"""
+import gc
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ModelSet:
+    def __init__(self, version, base, custom, paths):
+        self.version = version
+        self.base = base
+        self.custom = custom
+        self.paths = paths
+        self.loaded_at = time.time()
+        self.users = 0
+        self.retired = False
+        self.lock = threading.Lock()   # one predict at a time on these weights
+
+    def describe(self):
+        return {"version": self.version, "paths": self.paths, "loaded_at": self.loaded_at,
+                "classes_base": len(self.base.names) if self.base else 0,
+                "classes_custom": len(self.custom.names) if self.custom else 0}
+
+
+def _key(objects, prohibited):
+    persons = sum(1 for o in objects if o["name"] == 'person')
+    return persons, frozenset(o["name"] for o in objects if o["name"] in prohibited)
+
+
+class ModelRegistry:
+    def __init__(self, loader, warmup, evaluate, prohibited, rng=None):
+        self.loader = loader          # paths → (base, custom)
+        self.warmup = warmup          # ModelSet → None
+        self.evaluate = evaluate      # (ModelSet, frame, level) → detected objects
+        self.prohibited = prohibited
+        self.rng = rng or random.Random()
+        self.active = None
+        self.candidate = None
+        self.status = "idle"          # idle | loading | shadowing | awaiting_promote | failed
+        self.error = None
+        self.shadow = None
+        self.swaps = 0
+        self._versions = 0
+        self._lock = threading.Lock()
+        self._jobs = queue.Queue(maxsize=2)
+        threading.Thread(target=self._shadow_worker, name='model-shadow', daemon=True).start()
+
+    def _load(self, paths):
+        base, custom = self.loader(paths)
+        with self._lock:
+            self._versions += 1
+            version = self._versions
+        models = ModelSet(version, base, custom, paths)
+        self.warmup(models)
+        return models
+
+    def load_initial(self, paths):
+        self.active = self._load(paths)
+        return self.active
+
+    # ─── Request path ───────────────────────────────────────────────────────
+    @contextmanager
+    def use(self):
+        with self._lock:
+            models = self.active
+            models.users += 1
+        try:
+            yield models
+        finally:
+            with self._lock:
+                models.users -= 1
+                free = models.retired and models.users == 0
+            if free:
+                self._free(models)
+
+    def maybe_shadow(self, frame, level, objects, latency_ms):
+        """Offer one served frame to the candidate (sampled; never blocks)."""
+        shadow = self.shadow
+        if self.status != "shadowing" or shadow is None or self.rng.random() >= shadow["fraction"]:
+            return
+        try:
+            self._jobs.put_nowait((frame, level, objects, latency_ms))
+        except queue.Full:
+            shadow["dropped"] += 1
+
+    # ─── Reload / swap ──────────────────────────────────────────────────────
+    def reload(self, paths, shadow_fraction=0.0, shadow_frames=200, auto_promote=True,
+               min_agreement=0.9, max_latency_ratio=1.5):
+        """Start a background reload; False if one is already in progress."""
+        with self._lock:
+            if self.status in ("loading", "shadowing", "awaiting_promote"):
+                return False
+            self.status, self.error, self.shadow = "loading", None, None
+        threading.Thread(target=self._prepare, name='model-reload', daemon=True,
+                         args=(paths, shadow_fraction, shadow_frames, auto_promote,
+                               min_agreement, max_latency_ratio)).start()
+        return True
+
+    def _prepare(self, paths, fraction, frames, auto_promote, min_agreement, max_latency_ratio):
+        try:
+            started = time.time()
+            candidate = self._load(paths)
+            print(f"📦 Weights v{candidate.version} loaded and warmed in {time.time() - started:.1f}s: {paths}")
+        except Exception as e:
+            with self._lock:
+                self.status, self.error = "failed", str(e)
+            print(f"❌ Model reload failed: {e}")
+            return
+        if fraction <= 0:
+            with self._lock:
+                self.candidate = candidate
+            self._swap(candidate)
+            return
+        with self._lock:
+            self.candidate = candidate
+            self.shadow = {"fraction": fraction, "target": frames, "auto_promote": auto_promote,
+                           "min_agreement": min_agreement, "max_latency_ratio": max_latency_ratio,
+                           "frames": 0, "agreed": 0, "dropped": 0, "errors": 0,
+                           "active_ms": 0.0, "candidate_ms": 0.0, "disagreements": []}
+            self.status = "shadowing"
+        print(f"👥 Shadowing v{candidate.version} on {int(fraction * 100)}% of frames")
+
+    def _shadow_worker(self):
+        while True:
+            frame, level, objects, latency_ms = self._jobs.get()
+            candidate, shadow = self.candidate, self.shadow
+            if self.status != "shadowing" or candidate is None:
+                continue
+            try:
+                started = time.perf_counter()
+                shadow_objects = self.evaluate(candidate, frame, level)
+                candidate_ms = (time.perf_counter() - started) * 1000
+            except Exception as e:
+                shadow["errors"] += 1
+                print(f"⚠️ Shadow inference failed: {e}")
+                continue
+            ours, theirs = _key(objects, self.prohibited), _key(shadow_objects, self.prohibited)
+            shadow["frames"] += 1
+            shadow["active_ms"] += latency_ms
+            shadow["candidate_ms"] += candidate_ms
+            if ours == theirs:
+                shadow["agreed"] += 1
+            elif len(shadow["disagreements"]) < 20:
+                shadow["disagreements"].append({"active": [ours[0], sorted(ours[1])],
+                                                "candidate": [theirs[0], sorted(theirs[1])]})
+            if shadow["frames"] >= shadow["target"]:
+                self._finish_shadow(candidate, shadow)
+
+    def _finish_shadow(self, candidate, shadow):
+        agreement = shadow["agreed"] / shadow["frames"]
+        ratio = shadow["candidate_ms"] / max(shadow["active_ms"], 1e-6)
+        if shadow["auto_promote"] and agreement >= shadow["min_agreement"] and ratio <= shadow["max_latency_ratio"]:
+            self._swap(candidate)
+            return
+        with self._lock:
+            if self.candidate is not candidate:
+                return      # promoted or aborted by an admin meanwhile
+            self.status = "awaiting_promote"
+        print(f"⏸️ v{candidate.version} shadow done (agreement {agreement:.0%}, latency x{ratio:.2f}) — "
+              f"waiting for promote/abort")
+
+    def promote(self):
+        with self._lock:
+            candidate = self.candidate if self.status in ("shadowing", "awaiting_promote") else None
+        if candidate is None:
+            return False
+        return self._swap(candidate)
+
+    def abort(self):
+        with self._lock:
+            candidate = self.candidate if self.status in ("shadowing", "awaiting_promote") else None
+            if candidate is None:
+                return False
+            self.candidate, self.status = None, "idle"
+            candidate.retired = True
+        self._free(candidate)
+        return True
+
+    def _swap(self, new):
+        """Make `new` (the current candidate) active; False if it was already promoted or aborted."""
+        with self._lock:
+            # Admin promote can race auto-promote: only the first swap may retire the old set
+            if self.candidate is not new or self.active is new:
+                return False
+            old, self.active = self.active, new
+            self.candidate, self.status = None, "idle"
+            self.swaps += 1
+            old.retired = True
+            free = old.users == 0
+        print(f"🔁 Now serving weights v{new.version} (was v{old.version})")
+        if free:
+            self._free(old)
+        return True
+
+    def _free(self, models):
+        models.base = models.custom = None
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+        print(f"🧹 Released weights v{models.version}")
+
+    def stats(self):
+        shadow = self.shadow
+        report = None
+        if shadow:
+            n = shadow["frames"]
+            report = {
+                "frames": n, "target": shadow["target"], "fraction": shadow["fraction"],
+                "dropped": shadow["dropped"], "errors": shadow["errors"],
+                "agreement": round(shadow["agreed"] / n, 3) if n else None,
+                "active_ms": round(shadow["active_ms"] / n, 1) if n else None,
+                "candidate_ms": round(shadow["candidate_ms"] / n, 1) if n else None,
+                "disagreements": list(shadow["disagreements"]),
+            }
+        candidate = self.candidate
+        return {
+            "status": self.status,
+            "error": self.error,
+            "active": self.active.describe() if self.active else None,
+            "candidate": candidate.describe() if candidate else None,
+            "shadow": report,
+            "swaps": self.swaps,
+        }
@@ -1,3 +1,17 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Detection, ProctorAlert
+
+
+@admin.register(Detection)
+class DetectionAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'exam_id', 'student_id', 'label', 'confidence')
+    list_filter = ('label',)
+    search_fields = ('exam_id', 'student_id')
+
+
+@admin.register(ProctorAlert)
+class ProctorAlertAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'exam_id', 'student_id', 'status', 'risk_score', 'message')
+    list_filter = ('status',)
+    search_fields = ('exam_id', 'student_id')
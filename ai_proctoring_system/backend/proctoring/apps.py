@@ -1,5 +1,14 @@
+import os
+
 from django.apps import AppConfig
 
 
 class ProctoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
     name = 'proctoring'
+
+    def ready(self):
+        # Opt-in: spawn the warm monitor workers with the server instead of on first start
+        if os.environ.get('PROCTOR_MONITOR_PREWARM') == '1':
+            from .monitor_pool import get_pool
+            get_pool()
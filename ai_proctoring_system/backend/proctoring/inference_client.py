@@ -0,0 +1,65 @@
+"""
+Client for the local inference service (`ai_proctor_engine.py`, POST /proctor/infer).
+
+Under ASGI one keep-alive connection pool is kept per event loop, so every
+request reuses warm connections. Under WSGI, async_to_sync may run each request
+on a fresh loop that is gone afterwards, so those requests use a client scoped
+to the call and closed with it instead of leaving a pool behind per loop. Set PROCTOR_INFERENCE_UDS to talk to the
+engine over a Unix socket (`uvicorn ai_proctor_engine:app --uds ...`).
+"""
+import asyncio
+import weakref
+
+import httpx
+from django.conf import settings
+
+_clients = weakref.WeakKeyDictionary()
+
+
+def _make_client():
+    uds = getattr(settings, 'PROCTOR_INFERENCE_UDS', None)
+    transport = httpx.AsyncHTTPTransport(
+        uds=uds,
+        retries=1,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+    )
+    return httpx.AsyncClient(
+        base_url=getattr(settings, 'PROCTOR_INFERENCE_URL', 'http://127.0.0.1:8001'),
+        transport=transport,
+        timeout=getattr(settings, 'PROCTOR_INFERENCE_TIMEOUT', 10.0),
+    )
+
+
+async def _post(client, image_bytes, conf):
+    return await client.post(
+        '/proctor/infer',
+        params={'conf': conf},
+        content=image_bytes,
+        headers={'Content-Type': 'application/octet-stream'},
+    )
+
+
+def get_client():
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _make_client()
+        _clients[loop] = client
+    return client
+
+
+async def detect(image_bytes, conf=0.25, pooled=True):
+    """
+    Send encoded image bytes to the inference service, return its detections.
+    Pass pooled=False when the running loop will not outlive the request.
+    """
+    if pooled:
+        response = await _post(get_client(), image_bytes, conf)
+    else:
+        async with _make_client() as client:
+            response = await _post(client, image_bytes, conf)
+    response.raise_for_status()
+    payload = response.json()
+    if payload.get('error'):
+        raise RuntimeError(payload['error'])
+    return payload
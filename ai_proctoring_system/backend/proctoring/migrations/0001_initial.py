@@ -0,0 +1,42 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Detection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_id', models.CharField(default='unknown', max_length=64)),
+                ('exam_id', models.CharField(default='unknown', max_length=64)),
+                ('label', models.CharField(max_length=64)),
+                ('confidence', models.FloatField()),
+                ('box', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['exam_id', 'student_id', 'created_at'], name='detection_exam_student_ts_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProctorAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_id', models.CharField(default='unknown', max_length=64)),
+                ('exam_id', models.CharField(default='unknown', max_length=64)),
+                ('message', models.TextField()),
+                ('status', models.CharField(default='normal', max_length=16)),
+                ('risk_score', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['exam_id', 'student_id', 'created_at'], name='alert_exam_student_ts_idx')],
+            },
+        ),
+    ]
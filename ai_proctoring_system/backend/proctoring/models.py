@@ -1,3 +1,37 @@
 from django.db import models
 
-# Create your models here.
+
+class Detection(models.Model):
+    """One object YOLO found in a proctoring frame."""
+    student_id = models.CharField(max_length=64, default='unknown')
+    exam_id = models.CharField(max_length=64, default='unknown')
+    label = models.CharField(max_length=64)
+    confidence = models.FloatField()
+    box = models.JSONField(default=list)  # [x1, y1, x2, y2]
+    created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['exam_id', 'student_id', 'created_at'], name='detection_exam_student_ts_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.label} ({self.confidence:.2f}) - {self.student_id}/{self.exam_id}"
+
+
+class ProctorAlert(models.Model):
+    """An alert raised while analysing a frame, with the frame's risk score."""
+    student_id = models.CharField(max_length=64, default='unknown')
+    exam_id = models.CharField(max_length=64, default='unknown')
+    message = models.TextField()
+    status = models.CharField(max_length=16, default='normal')
+    risk_score = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['exam_id', 'student_id', 'created_at'], name='alert_exam_student_ts_idx'),
+        ]
+
+    def __str__(self):
+        return f"[{self.status}] {self.message[:40]} - {self.student_id}/{self.exam_id}"
@@ -0,0 +1,220 @@
+"""
+Warm pool of standalone proctor monitor processes.
+
+Starting `proctor_monitor.py` from scratch re-imports ultralytics/supabase and
+reloads the YOLO weights, which takes seconds. Instead we keep a few workers
+running in `--worker` mode: they load everything up front and then block on
+stdin until we hand them a session (one JSON line). Each (student, exam) pair
+gets its own worker, so concurrent sessions no longer kill each other.
+"""
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'standalone_monitor', 'proctor_monitor.py')
+
+
+class PoolFull(Exception):
+    pass
+
+
+class Worker:
+    def __init__(self, proc):
+        self.proc = proc
+        self.spawned_at = time.time()
+        self.assigned_at = None
+        self.key = None
+
+    @property
+    def alive(self):
+        return self.proc.poll() is None
+
+
+class MonitorPool:
+    def __init__(self, min_idle=1, max_idle=4, max_sessions=8, threads_per_worker=2,
+                 niceness=5, idle_ttl=600, reap_interval=5):
+        self.min_idle = min_idle
+        self.max_idle = max_idle
+        self.max_sessions = max_sessions
+        self.threads_per_worker = threads_per_worker
+        self.niceness = niceness
+        self.idle_ttl = idle_ttl
+        self.reap_interval = reap_interval
+
+        self._idle = []          # warm workers waiting for an assignment
+        self._sessions = {}      # (student_id, exam_id) → Worker
+        self._recent_starts = deque()
+        self._lock = threading.Lock()
+
+        self._fill_idle()
+        threading.Thread(target=self._reaper, name='monitor-pool-reaper', daemon=True).start()
+
+    # ─── Process management ─────────────────────────────────────────────────
+    def _spawn(self):
+        env = dict(os.environ)
+        # Cap per-process thread pools so many monitors don't oversubscribe the CPU
+        for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+            env[var] = str(self.threads_per_worker)
+        env['CPU_BUDGET_TORCH_THREADS'] = str(self.threads_per_worker)
+        # Every live monitor (running or idle) claims its own slot of cores
+        env.setdefault('CPU_BUDGET_WORKERS', str(self.max_sessions + self.max_idle))
+
+        kwargs = {}
+        if os.name == 'nt':
+            kwargs['creationflags'] = subprocess.CREATE_NEW_CONSOLE
+        else:
+            kwargs['start_new_session'] = True
+        # The worker lowers its own priority: preexec_fn is unsafe in this threaded server
+        cmd = [sys.executable, SCRIPT_PATH, '--worker']
+        if self.niceness and os.name != 'nt':
+            cmd += ['--nice', str(self.niceness)]
+
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE, text=True, env=env, **kwargs
+        )
+        return Worker(proc)
+
+    @staticmethod
+    def _kill(worker):
+        if not worker.alive:
+            return
+        try:
+            if os.name == 'nt':
+                subprocess.call(['taskkill', '/F', '/T', '/PID', str(worker.proc.pid)])
+            else:
+                os.killpg(worker.proc.pid, signal.SIGTERM)
+        except Exception:
+            pass
+
+    def _target_idle(self):
+        # Keep more workers warm while starts are arriving in bursts
+        cutoff = time.time() - 60
+        while self._recent_starts and self._recent_starts[0] < cutoff:
+            self._recent_starts.popleft()
+        return max(self.min_idle, min(self.max_idle, len(self._recent_starts)))
+
+    def _fill_idle(self):
+        with self._lock:
+            self._idle = [w for w in self._idle if w.alive]
+            missing = self._target_idle() - len(self._idle)
+            room = self.max_sessions + self.max_idle - len(self._idle) - len(self._sessions)
+            for _ in range(max(0, min(missing, room))):
+                self._idle.append(self._spawn())
+
+    def _reaper(self):
+        while True:
+            time.sleep(self.reap_interval)
+            try:
+                self._reap()
+                self._fill_idle()
+            except Exception as e:
+                print(f"[monitor-pool] reaper error: {e}")
+
+    def _reap(self):
+        now = time.time()
+        with self._lock:
+            for key, worker in list(self._sessions.items()):
+                if not worker.alive:
+                    del self._sessions[key]
+            target = self._target_idle()
+            keep = []
+            for worker in sorted(self._idle, key=lambda w: w.spawned_at, reverse=True):
+                if not worker.alive:
+                    continue
+                if len(keep) >= target and now - worker.spawned_at > self.idle_ttl:
+                    self._release_idle(worker)
+                else:
+                    keep.append(worker)
+            self._idle = keep
+
+    def _release_idle(self, worker):
+        # Closing stdin makes an unassigned worker exit on its own
+        try:
+            worker.proc.stdin.close()
+        except Exception:
+            pass
+        try:
+            worker.proc.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self._kill(worker)
+
+    # ─── Public API ─────────────────────────────────────────────────────────
+    def start_session(self, student_id, exam_id, auto=False):
+        key = (student_id, exam_id)
+        self.stop_session(student_id, exam_id)
+
+        with self._lock:
+            active = sum(1 for w in self._sessions.values() if w.alive)
+            if active >= self.max_sessions:
+                raise PoolFull(f"{active} monitor sessions already running (limit {self.max_sessions})")
+            worker = None
+            while self._idle and worker is None:
+                candidate = self._idle.pop(0)
+                if candidate.alive:
+                    worker = candidate
+            if worker is None:
+                worker = self._spawn()  # cold start, pool was empty
+            self._recent_starts.append(time.time())
+
+            assignment = {'student_id': student_id, 'exam_id': exam_id, 'auto': auto}
+            worker.proc.stdin.write(json.dumps(assignment) + '\n')
+            worker.proc.stdin.flush()
+            worker.proc.stdin.close()
+            worker.key = key
+            worker.assigned_at = time.time()
+            self._sessions[key] = worker
+
+        threading.Thread(target=self._fill_idle, daemon=True).start()
+        return worker.proc.pid
+
+    def stop_session(self, student_id, exam_id):
+        with self._lock:
+            worker = self._sessions.pop((student_id, exam_id), None)
+        if worker is None or not worker.alive:
+            return False
+        self._kill(worker)
+        return True
+
+    def stop_all(self):
+        with self._lock:
+            workers = list(self._sessions.values())
+            self._sessions.clear()
+        stopped = 0
+        for worker in workers:
+            if worker.alive:
+                self._kill(worker)
+                stopped += 1
+        return stopped
+
+    def status(self):
+        with self._lock:
+            return {
+                'idle_workers': sum(1 for w in self._idle if w.alive),
+                'sessions': [
+                    {'student_id': k[0], 'exam_id': k[1], 'pid': w.proc.pid,
+                     'running_for': round(time.time() - w.assigned_at, 1)}
+                    for k, w in self._sessions.items() if w.alive
+                ],
+                'max_sessions': self.max_sessions,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = MonitorPool(**getattr(settings, 'PROCTOR_MONITOR_POOL', {}))
+    return _pool
@@ -0,0 +1,107 @@
+"""
+Buffered persistence for proctoring results.
+
+The detect view only appends rows to an in-memory buffer; a background thread
+turns them into `bulk_create` batches. The request path never waits on an
+INSERT, and the database sees one statement per batch instead of one per frame.
+"""
+import atexit
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .models import Detection, ProctorAlert
+
+
+class BufferedWriter:
+    def __init__(self, batch_size=200, flush_interval=2.0, max_pending=20000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self.written = 0
+
+    def enqueue(self, *objs):
+        """Buffer unsaved model instances. Never blocks; drops on overflow."""
+        self._ensure_started()
+        for obj in objs:
+            try:
+                self._queue.put_nowait(obj)
+            except queue.Full:
+                self.dropped += 1
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='proctor-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _drain(self, first=None):
+        batch = [] if first is None else [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        by_model = {}
+        for obj in batch:
+            by_model.setdefault(type(obj), []).append(obj)
+        for model, rows in by_model.items():
+            model.objects.bulk_create(rows, batch_size=self.batch_size)
+            self.written += len(rows)
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = self._drain(first)
+            try:
+                close_old_connections()
+                self._write(batch)
+            except Exception as e:
+                print(f"[writer] bulk_create failed, {len(batch)} rows lost: {e}")
+
+    def flush(self):
+        """Write everything still buffered (called at interpreter exit)."""
+        while True:
+            batch = self._drain()
+            if not batch:
+                return
+            try:
+                self._write(batch)
+            except Exception as e:
+                print(f"[writer] final flush failed, {len(batch)} rows lost: {e}")
+                return
+
+
+writer = BufferedWriter(
+    batch_size=getattr(settings, 'PROCTOR_WRITER_BATCH_SIZE', 200),
+    flush_interval=getattr(settings, 'PROCTOR_WRITER_FLUSH_INTERVAL', 2.0),
+)
+
+
+def record_frame(student_id, exam_id, detections, alerts, status, risk_score, created_at):
+    rows = [
+        Detection(student_id=student_id, exam_id=exam_id, label=d['object'],
+                  confidence=d['confidence'], box=d['box'], created_at=created_at)
+        for d in detections
+    ]
+    rows += [
+        ProctorAlert(student_id=student_id, exam_id=exam_id, message=message,
+                     status=status, risk_score=risk_score, created_at=created_at)
+        for message in alerts
+    ]
+    if rows:
+        writer.enqueue(*rows)
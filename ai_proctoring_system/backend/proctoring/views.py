@@ -1,43 +1,55 @@
-import cv2
-import numpy as np
 import base64
+import json
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from ultralytics import YOLO
-from PIL import Image
-import io
 
-import subprocess
-import os
-import signal
-import sys
+from . import inference_client
+from .monitor_pool import PoolFull, get_pool
+from .persistence import record_frame
 
-# Global variable to track the proctoring process
-proctoring_process = None
+# Expanded list of suspicious objects in COCO dataset
+PROHIBITED_CLASSES = {
+    'cell phone', 'laptop', 'remote', 'book', 'keyboard',
+    'mouse', 'bottle', 'backpack', 'handbag', 'tablet', 'cup'
+}
 
-# Load YOLOv8 model - using 'yolov8n.pt' (nano) for performance
-# It will automatically download on first run
-model = YOLO('yolov8n.pt')
 
-class ProctoringAIView(APIView):
-    def post(self, request):
+@method_decorator(csrf_exempt, name='dispatch')
+class ProctoringAIView(View):
+    """
+    Async detect view. YOLO runs in the inference service (ai_proctor_engine.py),
+    not in this process; results are persisted through the buffered writer.
+    """
+
+    async def post(self, request):
         try:
+            try:
+                body = json.loads(request.body or b'{}')
+            except ValueError:
+                body = request.POST
+
             # Get frame from request
-            frame_data = request.data.get('frame')
+            frame_data = body.get('frame')
             print(f"--- Frame Received: {len(frame_data) if frame_data else 0} bytes ---")
             if not frame_data:
-                return Response({'error': 'No frame provided'}, status=400)
+                return JsonResponse({'error': 'No frame provided'}, status=400)
 
-            # Decode base64 image
+            # Decode base64 image; the raw bytes are forwarded as-is
             header, encoded = frame_data.split(",", 1)
             image_data = base64.b64decode(encoded)
-            
-            # Convert to OpenCV format
-            image = Image.open(io.BytesIO(image_data))
-            frame = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
 
             # Run YOLOv8 inference with LOWER confidence for better detection
-            results = model(frame, conf=0.25)[0]
+            # Pooled connections only under ASGI; under WSGI the loop is per request
+            result = await inference_client.detect(image_data, conf=0.25,
+                                                   pooled=isinstance(request, ASGIRequest))
+            frame_width = result['shape'][1]
             
             detections = []
             alerts = []
@@ -45,29 +57,20 @@ class ProctoringAIView(APIView):
             device_detected = False
             person_count = 0
             
-            # Expanded list of suspicious objects in COCO dataset
-            prohibited_classes = [
-                'cell phone', 'laptop', 'remote', 'book', 'keyboard', 
-                'mouse', 'bottle', 'backpack', 'handbag', 'tablet', 'cup'
-            ]
-            
-            for box in results.boxes:
-                cls = int(box.cls[0])
-                name = results.names[cls]
-                conf = float(box.conf[0])
-                xyxy = box.xyxy[0].tolist() # [x1, y1, x2, y2]
+            for det in result['detections']:
+                name = det['object']
                 
                 detections.append({
                     'object': name,
-                    'confidence': conf,
-                    'box': xyxy
+                    'confidence': det['confidence'],
+                    'box': det['box']
                 })
                 
                 if name == 'person':
                     person_count += 1
                 
                 # Check against expanded prohibited list
-                if name in prohibited_classes:
+                if name in PROHIBITED_CLASSES:
                     device_detected = True
                     alerts.append(f"It seems you're breaching the proctoring protocols. Please concentrate and focus on the exam. Failure to do so will lead to termination of the session.")
 
@@ -87,10 +90,10 @@ class ProctoringAIView(APIView):
             # Mock Gaze/Head Movement Detection
             # In a real scenario, we'd use pose/landmarks. 
             # Here we simulate by checking if the person is severely off-center
-            for box in results.boxes:
-                if int(box.cls[0]) == 0: # Person
-                    x1, y1, x2, y2 = box.xyxy[0]
-                    center_x = (x1 + x2) / 2 / frame.shape[1]
+            for det in result['detections']:
+                if det['class_id'] == 0: # Person
+                    x1, y1, x2, y2 = det['box']
+                    center_x = (x1 + x2) / 2 / frame_width
                     if center_x < 0.3 or center_x > 0.7:
                         alerts.append("Unusual head movement/Looking away detected")
                         risk_score += 20
@@ -100,60 +103,56 @@ class ProctoringAIView(APIView):
                 status = 'critical'
             elif risk_score > 30:
                 status = 'suspicious'
+            risk_score = min(risk_score, 100)
 
-            return Response({
+            record_frame(
+                student_id=str(body.get('student_id', 'unknown')),
+                exam_id=str(body.get('exam_id', 'unknown')),
+                detections=detections,
+                alerts=alerts,
+                status=status,
+                risk_score=risk_score,
+                created_at=timezone.now(),
+            )
+
+            return JsonResponse({
                 'detections': detections,
                 'alerts': alerts,
                 'status': status,
-                'risk_score': min(risk_score, 100)
+                'risk_score': risk_score
             })
 
         except Exception as e:
-            return Response({'error': str(e)}, status=500)
+            return JsonResponse({'error': str(e)}, status=500)
 
 class StartProctorView(APIView):
     def post(self, request):
-        global proctoring_process
-        
-        # If already running, stop it first
-        if proctoring_process and proctoring_process.poll() is None:
-            try:
-                if os.name == 'nt': # Windows
-                    subprocess.call(['taskkill', '/F', '/T', '/PID', str(proctoring_process.pid)])
-                else:
-                    os.killpg(os.getpgid(proctoring_process.pid), signal.SIGTERM)
-            except:
-                pass
-
         try:
-            student_id = request.data.get('student_id', 'unknown')
-            exam_id = request.data.get('exam_id', 'unknown')
+            student_id = str(request.data.get('student_id', 'unknown'))
+            exam_id = str(request.data.get('exam_id', 'unknown'))
             
-            # Find the script path
-            script_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'standalone_monitor', 'proctor_monitor.py')
+            # Hand the session to a pre-warmed monitor worker (model already loaded)
+            pid = get_pool().start_session(student_id, exam_id)
             
-            # Start the process
-            # We use sys.executable to ensure we use the same python interpreter
-            proctoring_process = subprocess.Popen(
-                [sys.executable, script_path, '--student_id', student_id, '--exam_id', exam_id],
-                creationflags=subprocess.CREATE_NEW_CONSOLE if os.name == 'nt' else 0
-            )
-            
-            return Response({'status': 'started', 'pid': proctoring_process.pid})
+            return Response({'status': 'started', 'pid': pid})
+        except PoolFull as e:
+            return Response({'error': str(e)}, status=429)
         except Exception as e:
             return Response({'error': str(e)}, status=500)
 
 class StopProctorView(APIView):
     def post(self, request):
-        global proctoring_process
-        if proctoring_process and proctoring_process.poll() is None:
-            try:
-                if os.name == 'nt':
-                    subprocess.call(['taskkill', '/F', '/T', '/PID', str(proctoring_process.pid)])
-                else:
-                    os.killpg(os.getpgid(proctoring_process.pid), signal.SIGTERM)
-                proctoring_process = None
-                return Response({'status': 'stopped'})
-            except Exception as e:
-                return Response({'error': str(e)}, status=500)
-        return Response({'status': 'not_running'})
+        student_id = request.data.get('student_id')
+        exam_id = request.data.get('exam_id')
+        try:
+            if student_id is not None or exam_id is not None:
+                stopped = get_pool().stop_session(str(student_id or 'unknown'), str(exam_id or 'unknown'))
+            else:
+                stopped = get_pool().stop_all()
+        except Exception as e:
+            return Response({'error': str(e)}, status=500)
+        return Response({'status': 'stopped' if stopped else 'not_running'})
+
+class ProctorStatusView(APIView):
+    def get(self, request):
+        return Response(get_pool().status())
@@ -0,0 +1,339 @@
+"""
+Append-only columnar log of per-frame detection results.
+
+Every processed frame becomes one fixed-width record. Records are grouped per
+exam into numbered segments, and each column lives in its own raw file inside
+the segment, so a query memory-maps only the columns it needs:
+
+    <root>/<exam>/index.json              exam id, session → sid, segments
+    <root>/<exam>/seg-000001/ts.f8        float64  unix time
+                             session.u4   uint32   sid (see index.json)
+                             persons.u1   uint8    person count (capped at 255)
+                             movement.u1  uint8    movement alert 0/1
+                             risk.u1      uint8    frame risk 0-100
+                             conf.u1      uint8    [rows x classes] max confidence, percent
+
+Appends go through buffered files and are flushed by a background thread; the
+index is only rewritten when a session or segment is added, never per frame.
+Row counts come from file sizes, so a reader never sees a half-written record.
+Several processes can log the same exam: index changes are merged under a file
+lock and every writer appends to segments of its own.
+
+    log = ResultLog('result_log')
+    log.append(exam, session, time.time(), 1, False, {'cell phone': 0.62}, 60)
+    log.sustained(exam, lambda c: c['conf'][:, log.class_index('cell phone')] > 50, 5)
+
+CLI: python result_log.py sustained --exam EXAM --label "cell phone" --min-conf 0.5 --seconds 5
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from detection_rules import LABEL_ALIASES, PROHIBITED_CLASSES
+
+try:
+    import fcntl
+except ImportError:       # Windows: index changes are not locked, one writer per exam directory
+    fcntl = None
+
+RESULT_CLASSES = sorted((set(PROHIBITED_CLASSES) - set(LABEL_ALIASES)) | set(LABEL_ALIASES.values()))
+SCALARS = {'ts': np.float64, 'session': np.uint32, 'persons': np.uint8, 'movement': np.uint8, 'risk': np.uint8}
+EXT = {np.float64: 'f8', np.uint32: 'u4', np.uint8: 'u1'}
+
+
+def exam_dirname(exam_id):
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', str(exam_id)) or '_'
+
+
+class _ExamWriter:
+    """
+    Open segment files and session ids for one exam. Caller holds the log lock.
+
+    Several processes may write the same exam directory (pooled monitors, backends
+    sharing a root). Every index change re-reads index.json and merges into it
+    under an flock on index.lock, and each writer appends only to segments it
+    allocated itself, so writers never overwrite each other's sessions or rows.
+    """
+
+    def __init__(self, exam_dir, exam_id, classes, segment_rows):
+        self.exam_dir = exam_dir
+        self.exam_id = str(exam_id)
+        self.segment_rows = segment_rows
+        os.makedirs(exam_dir, exist_ok=True)
+        with self._index(classes) as index:
+            self.classes = index['classes']
+        self.sessions = {}            # session → sid, as allocated in the shared index
+        self.files = {}
+        self.rows = 0
+        self.last_write = time.time()
+        self._open_segment()
+
+    @contextmanager
+    def _index(self, classes=None):
+        """The current index.json under an exclusive lock; written back when the block exits."""
+        with open(os.path.join(self.exam_dir, 'index.lock'), 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            index = _read_index(self.exam_dir) or {
+                'exam_id': self.exam_id, 'classes': classes or self.classes, 'sessions': {}, 'segments': [],
+            }
+            yield index
+            tmp = os.path.join(self.exam_dir, 'index.json.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(index, f)
+            os.replace(tmp, os.path.join(self.exam_dir, 'index.json'))
+
+    def _open_segment(self):
+        with self._index() as index:
+            seg = len(index['segments']) + 1
+            # A directory without an index entry is left over from a writer that died mid-allocation
+            while os.path.exists(os.path.join(self.exam_dir, f"seg-{seg:06d}")):
+                seg += 1
+            name = f"seg-{seg:06d}"
+            seg_dir = os.path.join(self.exam_dir, name)
+            os.makedirs(seg_dir)
+            index['segments'].append(name)
+        self.files = {col: open(os.path.join(seg_dir, f"{col}.{EXT[dtype]}"), 'ab')
+                      for col, dtype in SCALARS.items()}
+        self.files['conf'] = open(os.path.join(seg_dir, 'conf.u1'), 'ab')
+        self.rows = 0
+
+    def sid(self, session):
+        sid = self.sessions.get(session)
+        if sid is None:
+            with self._index() as index:
+                sessions = index['sessions']
+                if session not in sessions:
+                    sessions[session] = len(sessions)
+                sid = self.sessions[session] = sessions[session]
+        return sid
+
+    def write(self, record, conf_row):
+        if self.rows >= self.segment_rows:
+            self.close_files()
+            self._open_segment()
+        for col, dtype in SCALARS.items():
+            self.files[col].write(np.asarray(record[col], dtype=dtype).tobytes())
+        self.files['conf'].write(conf_row.tobytes())
+        self.rows += 1
+        self.last_write = time.time()
+
+    def flush(self):
+        # Conf last, so it is never longer than the scalar columns it belongs to
+        for col in list(SCALARS) + ['conf']:
+            self.files[col].flush()
+
+    def close_files(self):
+        self.flush()
+        for f in self.files.values():
+            f.close()
+        self.files = {}
+
+
+def _read_index(exam_dir):
+    try:
+        with open(os.path.join(exam_dir, 'index.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class ResultLog:
+    def __init__(self, root, classes=RESULT_CLASSES, segment_rows=1 << 16, flush_interval=1.0,
+                 idle_close=600):
+        self.root = root
+        self.classes = list(classes)
+        self.segment_rows = segment_rows
+        self.idle_close = idle_close
+        self._class_index = {c: i for i, c in enumerate(self.classes)}
+        self._writers = {}
+        self._lock = threading.Lock()
+        self.appended = 0
+        os.makedirs(root, exist_ok=True)
+        if flush_interval:
+            threading.Thread(target=self._flusher, args=(flush_interval,),
+                             name='result-log-flush', daemon=True).start()
+
+    def class_index(self, label):
+        return self._class_index[label]
+
+    # ─── Writing ────────────────────────────────────────────────────────────
+    def append(self, exam_id, session, ts, person_count, movement, confidences, risk):
+        """Hot path: a few buffered writes. `confidences` maps label → max confidence (0-1)."""
+        conf_row = np.zeros(len(self.classes), dtype=np.uint8)
+        for label, conf in confidences.items():
+            idx = self._class_index.get(label)
+            if idx is not None:
+                conf_row[idx] = max(conf_row[idx], min(100, int(round(conf * 100))))
+        record = {'ts': ts, 'persons': min(255, person_count), 'movement': 1 if movement else 0,
+                  'risk': max(0, min(100, int(risk)))}
+
+        exam_id = str(exam_id or 'unknown')
+        with self._lock:
+            writer = self._writers.get(exam_id)
+            if writer is None:
+                writer = self._writers[exam_id] = _ExamWriter(
+                    os.path.join(self.root, exam_dirname(exam_id)), exam_id, self.classes, self.segment_rows)
+            if writer.classes != self.classes:
+                # Class list changed since this exam started; map onto the stored order
+                conf_row = np.array([conf_row[self._class_index[c]] if c in self._class_index else 0
+                                     for c in writer.classes], dtype=np.uint8)
+            record['session'] = writer.sid(str(session))
+            writer.write(record, conf_row)
+            self.appended += 1
+
+    def flush(self):
+        with self._lock:
+            for writer in self._writers.values():
+                writer.flush()
+
+    def close(self):
+        with self._lock:
+            for writer in self._writers.values():
+                writer.close_files()
+            self._writers.clear()
+
+    def _flusher(self, interval):
+        while True:
+            time.sleep(interval)
+            now = time.time()
+            with self._lock:
+                for exam_id, writer in list(self._writers.items()):
+                    writer.flush()
+                    if now - writer.last_write > self.idle_close:
+                        writer.close_files()
+                        del self._writers[exam_id]
+
+    def stats(self):
+        with self._lock:
+            return {"appended": self.appended, "open_exams": len(self._writers)}
+
+    # ─── Reading ────────────────────────────────────────────────────────────
+    def exams(self):
+        out = []
+        for name in sorted(os.listdir(self.root)):
+            index = _read_index(os.path.join(self.root, name))
+            if index:
+                out.append(index)
+        return out
+
+    def load(self, exam_id, columns=None):
+        """Memory-map an exam's columns → (dict of arrays, index). Multi-segment exams are concatenated."""
+        exam_dir = os.path.join(self.root, exam_dirname(exam_id))
+        index = _read_index(exam_dir)
+        if index is None:
+            return None, None
+        columns = columns or list(SCALARS) + ['conf']
+        n_classes = len(index['classes'])
+        parts = {col: [] for col in columns}
+
+        for seg in index['segments']:
+            seg_dir = os.path.join(exam_dir, seg)
+            sizes = {col: os.path.getsize(os.path.join(seg_dir, f"{col}.{EXT[dtype]}"))
+                     // np.dtype(dtype).itemsize for col, dtype in SCALARS.items()
+                     if os.path.exists(os.path.join(seg_dir, f"{col}.{EXT[dtype]}"))}
+            conf_path = os.path.join(seg_dir, 'conf.u1')
+            if len(sizes) < len(SCALARS) or not os.path.exists(conf_path):
+                continue
+            rows = min(min(sizes.values()), os.path.getsize(conf_path) // max(n_classes, 1))
+            if rows == 0:
+                continue
+            for col in columns:
+                if col == 'conf':
+                    parts[col].append(np.memmap(conf_path, dtype=np.uint8, mode='r', shape=(rows, n_classes)))
+                else:
+                    dtype = SCALARS[col]
+                    parts[col].append(np.memmap(os.path.join(seg_dir, f"{col}.{EXT[dtype]}"),
+                                                dtype=dtype, mode='r', shape=(rows,)))
+
+        cols = {}
+        for col in columns:
+            if parts[col]:
+                cols[col] = parts[col][0] if len(parts[col]) == 1 else np.concatenate(parts[col])
+            elif col == 'conf':
+                cols[col] = np.zeros((0, n_classes), dtype=np.uint8)
+            else:
+                cols[col] = np.zeros(0, dtype=SCALARS[col])
+        return cols, index
+
+    def sustained(self, exam_id, condition, min_seconds, max_gap=6.0):
+        """
+        Runs where `condition(cols)` held for at least `min_seconds` in one session.
+        A run breaks when the condition fails or the session sent nothing for `max_gap` s.
+        """
+        cols, index = self.load(exam_id)
+        if cols is None or not len(cols['ts']):
+            return []
+        mask = np.asarray(condition(cols), dtype=bool)
+        order = np.lexsort((cols['ts'], cols['session']))
+        sess, ts, m = cols['session'][order], cols['ts'][order], mask[order]
+
+        brk = np.ones(len(ts), dtype=bool)
+        brk[1:] = (sess[1:] != sess[:-1]) | (m[1:] != m[:-1]) | (np.diff(ts) > max_gap)
+        starts = np.flatnonzero(brk)
+        ends = np.append(starts[1:], len(ts)) - 1
+        hit = m[starts] & (ts[ends] - ts[starts] >= min_seconds)
+
+        names = {sid: name for name, sid in index['sessions'].items()}
+        return [{
+            "session": names.get(int(sess[s]), str(sess[s])),
+            "start": float(ts[s]), "end": float(ts[e]),
+            "seconds": round(float(ts[e] - ts[s]), 2), "frames": int(e - s + 1),
+        } for s, e in zip(starts[hit], ends[hit])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the per-frame result log")
+    parser.add_argument('--root', default=os.environ.get('RESULT_LOG_DIR', 'result_log'))
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('exams', help='List exams with their sessions')
+    q = sub.add_parser('sustained', help='Sessions where a condition held for a while')
+    q.add_argument('--exam', required=True)
+    q.add_argument('--label', help='Class for --min-conf, e.g. "cell phone"')
+    q.add_argument('--min-conf', type=float, default=0.5)
+    q.add_argument('--persons-gt', type=int)
+    q.add_argument('--risk-gt', type=int)
+    q.add_argument('--seconds', type=float, default=5)
+    q.add_argument('--max-gap', type=float, default=6.0)
+    args = parser.parse_args()
+
+    log = ResultLog(args.root, flush_interval=0)
+    if args.command == 'exams':
+        for index in log.exams():
+            print(f"{index['exam_id']}: {len(index['sessions'])} sessions, {len(index['segments'])} segments")
+        return
+
+    cols, index = log.load(args.exam)
+    if cols is None:
+        raise SystemExit(f"❌ No results for exam {args.exam}")
+    if args.label and args.label not in index['classes']:
+        raise SystemExit(f"❌ Unknown label {args.label!r}; known: {', '.join(index['classes'])}")
+
+    def condition(c):
+        mask = np.ones(len(c['ts']), dtype=bool)
+        if args.label:
+            mask &= c['conf'][:, index['classes'].index(args.label)] > args.min_conf * 100
+        if args.persons_gt is not None:
+            mask &= c['persons'] > args.persons_gt
+        if args.risk_gt is not None:
+            mask &= c['risk'] > args.risk_gt
+        return mask
+
+    t0 = time.perf_counter()
+    runs = log.sustained(args.exam, condition, args.seconds, args.max_gap)
+    elapsed = (time.perf_counter() - t0) * 1000
+    for run in runs:
+        start = time.strftime('%H:%M:%S', time.localtime(run['start']))
+        print(f"  {run['session']}: {run['seconds']}s from {start} ({run['frames']} frames)")
+    print(f"🔎 {len(runs)} runs in {len(set(r['session'] for r in runs))} sessions "
+          f"({len(cols['ts'])} frames scanned in {elapsed:.1f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,352 @@
+"""
+Session-affine router in front of several Flask detect backends.
+
+Every frame of a session must reach the node that holds its state (frame-diff
+baseline, no-face timer, tracks), so /proctor/detect is routed by consistent-
+hashing the session key onto a ring of backends (virtual nodes smooth the
+spread). Requests go out over a pooled keep-alive httpx client.
+
+A health checker polls each backend's /health. When a node joins or leaves,
+only the sessions whose owner changes are moved: their state is exported from
+the old owner and imported on the new one through the backends' admin session
+endpoints, while frames for those sessions wait briefly in the router. A node
+that died takes its sessions with it; they restart fresh on their new owner.
+
+Local test with three backends on one machine:
+
+    ADMIN_TOKEN=secret python session_router.py --listen 5001 --spawn 3
+    ADMIN_TOKEN=secret python session_router.py --node http://127.0.0.1:5011 --node http://127.0.0.1:5012
+
+Nodes can also be added or drained at runtime:
+
+    curl -X POST   -H 'X-Admin-Token: secret' -d '{"url": "http://127.0.0.1:5013"}' \\
+         -H 'Content-Type: application/json' localhost:5001/router/nodes
+    curl -X DELETE -H 'X-Admin-Token: secret' -d '{"url": "http://127.0.0.1:5013"}' \\
+         -H 'Content-Type: application/json' localhost:5001/router/nodes
+"""
+import argparse
+import bisect
+import hashlib
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+from flask import Flask, Response, jsonify, request
+from flask_cors import CORS
+
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+HOP_HEADERS = {'connection', 'keep-alive', 'transfer-encoding', 'content-length', 'content-encoding', 'host'}
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    def __init__(self, nodes=(), vnodes=100):
+        self.vnodes = vnodes
+        self.nodes = frozenset(nodes)
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._keys = [p for p, _ in points]
+        self._owners = [n for _, n in points]
+
+    def node_for(self, key):
+        if not self._keys:
+            return None
+        i = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._owners[i]
+
+    def with_nodes(self, nodes):
+        return HashRing(nodes, self.vnodes)
+
+
+class SessionRouter:
+    def __init__(self, nodes, vnodes=100, check_every=2.0, fail_after=2, move_wait=5.0, admin_token=None):
+        self.members = set(nodes)          # configured backends
+        self.healthy = set(nodes)          # assumed up until a check says otherwise
+        self.ring = HashRing(self.healthy, vnodes)
+        self.check_every = check_every
+        self.fail_after = fail_after
+        self.move_wait = move_wait
+        self.admin_headers = {'X-Admin-Token': admin_token} if admin_token else {}
+        self.client = httpx.Client(timeout=30.0, limits=httpx.Limits(max_connections=200,
+                                                                     max_keepalive_connections=64))
+        self._failures = {}
+        self._inflight = {}                # session → requests currently forwarded
+        self._moving = {}                  # session → Event set when its migration is done
+        self._lock = threading.Lock()
+        self._rebalance_lock = threading.Lock()
+        self.counts = {"forwarded": 0, "errors": 0, "migrated": 0, "rebalances": 0, "moving_rejected": 0}
+
+    # ─── Request path ───────────────────────────────────────────────────────
+    def begin(self, key):
+        """
+        Wait out a migration of this session, then pin it to its node → (True, node).
+        (False, None) if the migration did not finish within move_wait: the old owner
+        may already have exported the state, so the frame must not go there.
+        """
+        deadline = time.time() + self.move_wait
+        while True:
+            with self._lock:
+                moving = self._moving.get(key)
+                if moving is None:
+                    self._inflight[key] = self._inflight.get(key, 0) + 1
+                    return True, self.ring.node_for(key)
+            if not moving.wait(max(0.0, deadline - time.time())):
+                self.counts["moving_rejected"] += 1
+                return False, None
+
+    def end(self, key):
+        with self._lock:
+            n = self._inflight.get(key, 0) - 1
+            if n > 0:
+                self._inflight[key] = n
+            else:
+                self._inflight.pop(key, None)
+
+    def forward(self, node, path, key, body, headers):
+        headers = {k: v for k, v in headers.items() if k.lower() not in HOP_HEADERS}
+        headers['X-Session-Key'] = key
+        return self.client.post(node + path, content=body, headers=headers)
+
+    # ─── Membership ─────────────────────────────────────────────────────────
+    def _admin(self, node, method, path, **kwargs):
+        resp = self.client.request(method, node + path, headers=self.admin_headers, timeout=30.0, **kwargs)
+        resp.raise_for_status()
+        return resp.json()
+
+    def rebalance(self, healthy, draining=None):
+        """Move the ring to `healthy`, migrating only sessions whose owner changes."""
+        with self._rebalance_lock:
+            old, new = self.ring, self.ring.with_nodes(healthy)
+            if old.nodes == new.nodes:
+                return 0
+            # Sessions live on nodes that can still answer: everything in the old ring that
+            # is up, plus a node being drained on purpose
+            sources = (old.nodes & set(healthy)) | ({draining} if draining else set())
+            plan = {}                              # (src, dst) → [session]
+            for src in sources:
+                try:
+                    keys = self._admin(src, 'GET', '/admin/sessions')["sessions"]
+                except (httpx.HTTPError, KeyError, ValueError) as e:
+                    print(f"⚠️ Cannot list sessions on {src}: {e}")
+                    continue
+                for key in keys:
+                    dst = new.node_for(key)
+                    if dst != src:
+                        plan.setdefault((src, dst), []).append(key)
+
+            moving = {key: threading.Event() for keys in plan.values() for key in keys}
+            with self._lock:
+                self._moving.update(moving)
+            # Let frames already forwarded for moving sessions finish first
+            deadline = time.time() + self.move_wait
+            while time.time() < deadline:
+                with self._lock:
+                    if not any(k in self._inflight for k in moving):
+                        break
+                time.sleep(0.05)
+
+            moved = 0
+            for (src, dst), keys in plan.items():
+                try:
+                    blobs = self._admin(src, 'POST', '/admin/sessions/export', json={"sessions": keys})["sessions"]
+                    if blobs:
+                        self._admin(dst, 'POST', '/admin/sessions/import', json={"sessions": blobs})
+                    moved += len(blobs)
+                except (httpx.HTTPError, KeyError, ValueError) as e:
+                    print(f"⚠️ Migration {src} → {dst} failed for {len(keys)} session(s): {e}")
+
+            with self._lock:
+                self.ring = new
+                for key, event in moving.items():
+                    self._moving.pop(key, None)
+                    event.set()
+            self.counts["migrated"] += moved
+            self.counts["rebalances"] += 1
+            print(f"🔀 Ring now {sorted(new.nodes)} — moved {moved} session(s)")
+            return moved
+
+    def join(self, node):
+        self.members.add(node)
+        self._failures[node] = 0
+        self.healthy.add(node)
+        return self.rebalance(set(self.healthy))
+
+    def leave(self, node):
+        """Drain `node`: its sessions move to the remaining nodes before it is dropped."""
+        self.members.discard(node)
+        self.healthy.discard(node)
+        return self.rebalance(set(self.healthy), draining=node)
+
+    def check_health(self):
+        changed = False
+        for node in list(self.members):
+            try:
+                ok = self.client.get(node + '/health', timeout=2.0).status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                self._failures[node] = 0
+                if node not in self.healthy:
+                    self.healthy.add(node)
+                    changed = True
+                    print(f"✅ Backend up: {node}")
+            else:
+                self._failures[node] = self._failures.get(node, 0) + 1
+                if node in self.healthy and self._failures[node] >= self.fail_after:
+                    self.healthy.discard(node)
+                    changed = True
+                    print(f"❌ Backend down: {node}")
+        if changed:
+            self.rebalance(set(self.healthy))
+
+    def run_health_checks(self):
+        while True:
+            time.sleep(self.check_every)
+            try:
+                self.check_health()
+            except Exception as e:
+                print(f"⚠️ Health check failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "members": sorted(self.members),
+                "healthy": sorted(self.healthy),
+                "ring": sorted(self.ring.nodes),
+                "inflight_sessions": len(self._inflight),
+                "moving_sessions": len(self._moving),
+                **self.counts,
+            }
+
+
+# ─── Routes ──────────────────────────────────────────────────────────────────
+
+app = Flask(__name__)
+CORS(app)
+router = None
+
+
+def session_key(data):
+    """Same key the backend would derive (see flask_proctor_backend.session_key)."""
+    if data.get('session_id'):
+        return str(data['session_id'])
+    if data.get('student_id') or data.get('exam_id'):
+        return f"{data.get('student_id', 'unknown')}:{data.get('exam_id', 'unknown')}"
+    forwarded = request.headers.get('X-Forwarded-For')
+    return forwarded.split(',')[0].strip() if forwarded else (request.remote_addr or 'anonymous')
+
+
+def admin_authorized():
+    return bool(ADMIN_TOKEN) and request.headers.get('X-Admin-Token') == ADMIN_TOKEN
+
+
+@app.route('/health', methods=['GET', 'OPTIONS'])
+def health():
+    if request.method == 'OPTIONS':
+        return jsonify({"status": "ok"}), 200
+    status = "online" if router.healthy else "no_backends"
+    return jsonify({"status": status, "backends": len(router.healthy)}), 200 if router.healthy else 503
+
+
+@app.route('/proctor/detect', methods=['POST', 'OPTIONS'])
+def detect():
+    if request.method == 'OPTIONS':
+        return jsonify({"status": "ok"}), 200
+    body = request.get_data()
+    data = request.get_json(silent=True) or {}
+    key = session_key(data)
+    pinned, node = router.begin(key)
+    if not pinned:
+        return jsonify({"error": "Session is being migrated, retry shortly"}), 503, {"Retry-After": "1"}
+    try:
+        if node is None:
+            return jsonify({"error": "No healthy backends"}), 503
+        resp = router.forward(node, '/proctor/detect', key, body, request.headers)
+        router.counts["forwarded"] += 1
+    except httpx.HTTPError as e:
+        router.counts["errors"] += 1
+        return jsonify({"error": f"Backend {node} unavailable: {e}"}), 502
+    finally:
+        router.end(key)
+    headers = {k: v for k, v in resp.headers.items() if k.lower() not in HOP_HEADERS}
+    return Response(resp.content, status=resp.status_code, headers=headers)
+
+
+@app.route('/router/status', methods=['GET'])
+def status():
+    return jsonify(router.stats())
+
+
+@app.route('/router/nodes', methods=['POST', 'DELETE'])
+def nodes():
+    if not admin_authorized():
+        return jsonify({"error": "Admin token required"}), 403
+    url = ((request.json or {}).get('url') or '').rstrip('/')
+    if not url.startswith(('http://', 'https://')):
+        return jsonify({"error": "url must be an http(s) backend URL"}), 400
+    moved = router.join(url) if request.method == 'POST' else router.leave(url)
+    return jsonify({"moved": moved, **router.stats()})
+
+
+def spawn_backend(port, workers):
+    """Start one local Flask backend on `port` (one of `workers` sharing this box)."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    # Result log and evidence store are single-writer: one directory per node
+    env = {**os.environ, "CPU_BUDGET_WORKERS": str(workers),
+           "RESULT_LOG_DIR": os.path.join('result_log', f'node-{port}'),
+           "EVIDENCE_DIR": os.path.join('evidence', f'node-{port}')}
+    return subprocess.Popen([sys.executable, os.path.join(here, 'flask_proctor_backend.py'), '--port', str(port)],
+                            cwd=here, env=env)
+
+
+def spawn_backends(count, first_port):
+    """Start `count` local Flask backends on consecutive ports; returns their URLs."""
+    urls = []
+    for i in range(count):
+        spawn_backend(first_port + i, count)
+        urls.append(f"http://127.0.0.1:{first_port + i}")
+    return urls
+
+
+def wait_healthy(urls, timeout=300.0):
+    """Block until every URL answers /health (model loading takes a while)."""
+    deadline = time.time() + timeout
+    pending = set(urls)
+    while pending and time.time() < deadline:
+        for url in list(pending):
+            try:
+                if httpx.get(url + '/health', timeout=2.0).status_code == 200:
+                    pending.discard(url)
+            except httpx.HTTPError:
+                pass
+        time.sleep(1.0)
+    return not pending
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Session-affine router for Flask detect backends")
+    parser.add_argument('--listen', type=int, default=int(os.environ.get('PORT', 5001)))
+    parser.add_argument('--node', action='append', default=[], help="backend URL (repeatable)")
+    parser.add_argument('--spawn', type=int, default=0, help="start N local backends first")
+    parser.add_argument('--spawn-port', type=int, default=5011)
+    parser.add_argument('--vnodes', type=int, default=100)
+    args = parser.parse_args()
+
+    backends = [n.rstrip('/') for n in args.node]
+    if args.spawn:
+        spawned = spawn_backends(args.spawn, args.spawn_port)
+        print(f"⏳ Waiting for {args.spawn} backend(s) to load models...")
+        wait_healthy(spawned)
+        backends += spawned
+    if not ADMIN_TOKEN:
+        print("⚠️ ADMIN_TOKEN not set — sessions cannot be migrated when nodes change")
+
+    router = SessionRouter(backends, vnodes=args.vnodes, admin_token=ADMIN_TOKEN)
+    threading.Thread(target=router.run_health_checks, name='health', daemon=True).start()
+    print(f"🔀 Session router — http://localhost:{args.listen} → {backends}")
+    app.run(host='0.0.0.0', port=args.listen, debug=False)
@@ -0,0 +1,289 @@
+"""
+Neural Sentinel - Multi-Stream Monitor
+======================================
+Runs many seats from one process on a lab server: one capture thread per
+stream, one shared YOLO model fed in batches, one shared Haar cascade pair.
+Each stream keeps its own results and Supabase sync (per student/exam).
+
+Run:   python multi_monitor.py --stream 0,STUDENT_ID,EXAM_ID --stream lab3.mp4,S2,E2
+       python multi_monitor.py --config seats.json --headless
+          seats.json: [{"source": 0, "student_id": "...", "exam_id": "..."}, ...]
+Press:  Q to quit (grid view)
+"""
+
+import argparse
+import json
+import math
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import proctor_monitor as pm
+
+TILE_W, TILE_H  = 320, 240
+SYNC_EVERY      = 2.0   # min seconds between violation inserts per stream
+HEARTBEAT_EVERY = 5     # seconds
+
+
+# ─────────────────────────────────────────────
+#  CAPTURE
+# ─────────────────────────────────────────────
+class CaptureThread(threading.Thread):
+    """Reads one camera/file/URL continuously and keeps only the newest frame."""
+
+    def __init__(self, index, source, student_id, exam_id):
+        super().__init__(name=f"capture-{index}", daemon=True)
+        self.index      = index
+        self.source     = int(source) if str(source).isdigit() else source
+        self.student_id = str(student_id)
+        self.exam_id    = str(exam_id)
+        self.is_file    = isinstance(self.source, str) and '://' not in self.source
+        self._lock      = threading.Lock()
+        self._frame     = None
+        self._seq       = 0
+        self.connected  = False
+        self.stopped    = False
+
+    def latest(self):
+        with self._lock:
+            return self._seq, self._frame
+
+    def run(self):
+        while not self.stopped:
+            cap = cv2.VideoCapture(self.source)
+            if not cap.isOpened():
+                print(f"  [WARN] Stream {self.index} ({self.source}) not available — retrying")
+                time.sleep(2)
+                continue
+            self.connected = True
+            # Play files at their own rate so they behave like a live camera
+            delay = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 25) if self.is_file else 0
+            while not self.stopped:
+                ret, frame = cap.read()
+                if not ret or frame is None:
+                    if self.is_file:
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)   # loop recordings
+                        continue
+                    break
+                with self._lock:
+                    self._frame = frame
+                    self._seq  += 1
+                if delay:
+                    time.sleep(delay)
+            self.connected = False
+            cap.release()
+
+
+# ─────────────────────────────────────────────
+#  SUPABASE SYNC (off the frame loop)
+# ─────────────────────────────────────────────
+class SyncWorker(threading.Thread):
+    def __init__(self):
+        super().__init__(name="supabase-sync", daemon=True)
+        self.jobs = queue.Queue(maxsize=1000)
+
+    def submit(self, table, row, upsert=False):
+        try:
+            self.jobs.put_nowait((table, row, upsert))
+        except queue.Full:
+            pass  # network is down or too slow — drop rather than stall video
+
+    def run(self):
+        while True:
+            table, row, upsert = self.jobs.get()
+            try:
+                query = pm.supabase.table(table)
+                (query.upsert(row) if upsert else query.insert(row)).execute()
+            except Exception as e:
+                print(f"  [ERROR] Sync failed ({row.get('student_id')}): {e}")
+
+
+class StreamState:
+    """Per-seat analysis results and sync bookkeeping."""
+
+    def __init__(self, capture):
+        self.capture        = capture
+        self.last_seq       = 0
+        self.frames         = 0     # frames analyzed; YOLO runs on every yolo_every-th
+        self.frame          = None
+        self.faces          = None
+        self.detections     = []
+        self.violations     = []
+        self.violation_log  = []
+        self.last_sync      = 0
+        self.last_heartbeat = 0
+
+
+# ─────────────────────────────────────────────
+#  RENDERING
+# ─────────────────────────────────────────────
+def render_tile(st):
+    cap = st.capture
+    if st.frame is None:
+        tile = np.zeros((TILE_H, TILE_W, 3), dtype=np.uint8)
+        pm.put_text_with_bg(tile, f"#{cap.index} CONNECTING...", (10, 25), 0.5, 1)
+        return tile
+
+    display = st.frame.copy()
+    pm.draw_faces(display, st.faces)
+    pm.draw_detections(display, st.detections)
+    tile = cv2.resize(display, (TILE_W, TILE_H), interpolation=cv2.INTER_AREA)
+
+    border = (0, 0, 255) if st.violations else (0, 200, 80)
+    cv2.rectangle(tile, (0, 0), (TILE_W - 1, TILE_H - 1), border, 3 if st.violations else 2)
+    pm.put_text_with_bg(tile, f"#{cap.index} {cap.student_id[:8]}", (8, 20), 0.45, 1,
+                        bg=(0, 0, 200) if st.violations else (0, 140, 50))
+    if st.violations:
+        pm.put_text_with_bg(tile, st.violations[0].upper()[:38], (8, TILE_H - 10), 0.4, 1,
+                            fg=(255, 255, 255), bg=(0, 0, 200))
+    return tile
+
+
+def render_grid(states):
+    cols = max(1, math.ceil(math.sqrt(len(states))))
+    rows = math.ceil(len(states) / cols)
+    grid = np.zeros((rows * TILE_H, cols * TILE_W, 3), dtype=np.uint8)
+    for i, st in enumerate(states):
+        r, c = divmod(i, cols)
+        grid[r*TILE_H:(r+1)*TILE_H, c*TILE_W:(c+1)*TILE_W] = render_tile(st)
+    return grid
+
+
+# ─────────────────────────────────────────────
+#  MAIN LOOP
+# ─────────────────────────────────────────────
+def load_streams(args):
+    specs = []
+    if args.config:
+        with open(args.config) as f:
+            specs.extend(json.load(f))
+    for item in args.stream or []:
+        source, student_id, exam_id = (item.split(',') + ['unknown', 'unknown'])[:3]
+        specs.append({'source': source, 'student_id': student_id, 'exam_id': exam_id})
+    return [CaptureThread(i, s['source'], s.get('student_id', 'unknown'), s.get('exam_id', 'unknown'))
+            for i, s in enumerate(specs)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monitor many seats with one shared model")
+    parser.add_argument('--stream', action='append',
+                        help='source,student_id,exam_id (source = camera index, video file or URL)')
+    parser.add_argument('--config', help='JSON list of {source, student_id, exam_id}')
+    parser.add_argument('--headless', action='store_true', help='No window; print a status line instead')
+    parser.add_argument('--yolo-every', type=int, default=3, help="Run YOLO on every Nth frame of each stream")
+    parser.add_argument('--batch', type=int, default=16, help='Max frames per YOLO batch')
+    parser.add_argument('--no-sync', action='store_true', help='Do not write to Supabase')
+    args = parser.parse_args()
+
+    captures = load_streams(args)
+    if not captures:
+        parser.error('give at least one --stream or a --config file')
+
+    print("\n" + "="*55)
+    print(f"  🔒  Neural Sentinel  |  Multi-Stream Monitor ({len(captures)} seats)")
+    print("="*55)
+    yolo, face_cascade, eye_cascade = pm.load_detectors()
+
+    sync = SyncWorker()
+    if not args.no_sync:
+        sync.start()
+    for cap in captures:
+        cap.start()
+    states = [StreamState(cap) for cap in captures]
+
+    window = "🔒 Neural Sentinel - Lab View"
+    if not args.headless:
+        cv2.namedWindow(window, cv2.WINDOW_NORMAL)
+
+    last_status = time.time()
+    processed   = 0
+    try:
+        while True:
+            fresh = []
+            for st in states:
+                seq, frame = st.capture.latest()
+                if frame is not None and seq != st.last_seq:
+                    st.last_seq = seq
+                    st.frame = cv2.flip(frame, 1)
+                    st.frames += 1
+                    fresh.append(st)
+
+            if not fresh:
+                time.sleep(0.005)
+            processed += len(fresh)
+
+            # ── Face stage: one cascade pair shared by every stream ──
+            for st in fresh:
+                gray = cv2.cvtColor(st.frame, cv2.COLOR_BGR2GRAY)
+                st.faces = pm.analyze_faces(gray, st.frame.shape[1], face_cascade, eye_cascade)
+
+            # ── YOLO stage: batched across streams ───────────────────
+            # Counted per stream, so a seat whose frames arrive off-beat still gets its turn
+            due = [st for st in fresh if st.frames % args.yolo_every == 0]
+            if due:
+                for i in range(0, len(due), args.batch):
+                    chunk = due[i:i + args.batch]
+                    results = yolo([st.frame for st in chunk], conf=pm.CONF_THRESHOLD, verbose=False)
+                    for st, res in zip(chunk, results):
+                        st.detections = pm.parse_yolo(res)
+
+            # ── Per-stream violations + Supabase sync ─────────────────
+            now = time.time()
+            for st in fresh:
+                cap = st.capture
+                st.violations = list(st.faces['violations'])
+                st.violations += [f"PROHIBITED OBJECT: {d['label']} detected" for d in st.detections]
+
+                if args.no_sync:
+                    pass
+                elif now - st.last_heartbeat > HEARTBEAT_EVERY:
+                    st.last_heartbeat = now
+                    sync.submit("proctoring_status", {
+                        "student_id": cap.student_id, "exam_id": cap.exam_id,
+                        "is_active": True, "last_heartbeat": "now()"
+                    }, upsert=True)
+
+                if st.violations:
+                    st.violation_log.append({'time': time.strftime('%H:%M:%S'), 'events': st.violations})
+                    if not args.no_sync and now - st.last_sync > SYNC_EVERY:
+                        st.last_sync = now
+                        sync.submit("violation_logs", {
+                            "student_id": cap.student_id,
+                            "exam_id":    cap.exam_id,
+                            "violation_type": " | ".join(st.violations),
+                            "risk_score": pm.risk_score(st.faces['multi_person'], st.detections,
+                                                        st.faces['gaze_direction'])
+                        })
+
+            # ── Output ────────────────────────────────────────────────
+            if args.headless:
+                if now - last_status > 5:
+                    fps = processed / (now - last_status)
+                    flagged = [f"#{st.capture.index}" for st in states if st.violations]
+                    print(f"  [{time.strftime('%H:%M:%S')}] {fps:.1f} frames/s over {len(states)} streams"
+                          f" | violations: {', '.join(flagged) or 'none'}")
+                    last_status, processed = now, 0
+            else:
+                if fresh:
+                    cv2.imshow(window, render_grid(states))
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for cap in captures:
+            cap.stopped = True
+        if not args.headless:
+            cv2.destroyAllWindows()
+
+    print("\n  Session ended.")
+    for st in states:
+        print(f"    #{st.capture.index} {st.capture.student_id}/{st.capture.exam_id}: "
+              f"{len(st.violation_log)} violation events")
+
+
+if __name__ == '__main__':
+    main()
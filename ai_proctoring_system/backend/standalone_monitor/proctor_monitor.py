@@ -8,18 +8,29 @@ Opens a real-time OpenCV window that detects:
   - Multiple persons in frame
 
 Run:   python proctor_monitor.py
-Press:  Q to quit
+Press:  Q to quit, P to toggle the per-stage timing overlay
+
+Benchmark (no window, no Supabase writes, no result log):
+       python proctor_monitor.py --headless --source video.mp4 --profile
 """
 
 import cv2
 import time
 import numpy as np
 import argparse
+import json
 import os
+import sys
 from ultralytics import YOLO
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
+# cpu_budget.py lives in the backend folder, one level up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import cpu_budget
+from result_log import ResultLog
+from profiler import NULL, StageProfiler
+
 # ─────────────────────────────────────────────
 #  CONFIG & ARGS
 # ─────────────────────────────────────────────
@@ -27,10 +38,25 @@ parser = argparse.ArgumentParser()
 parser.add_argument('--student_id', default='unknown')
 parser.add_argument('--exam_id',    default='unknown')
 parser.add_argument('--auto', action='store_true', help='Auto start/stop based on Supabase exam status')
-args = parser.parse_args()
-
-STUDENT_ID = args.student_id
-EXAM_ID    = args.exam_id
+parser.add_argument('--worker', action='store_true',
+                    help='Pre-warm models, then wait for a JSON session assignment on stdin')
+parser.add_argument('--nice', type=int, default=0,
+                    help='Lower this process\'s scheduling priority by N at startup')
+parser.add_argument('--source', default=None,
+                    help='Video file (or camera index) instead of searching for a webcam')
+parser.add_argument('--headless', action='store_true',
+                    help='No window, no Supabase sync and no result log; report achieved frames/s at the end')
+parser.add_argument('--no-log', action='store_true',
+                    help='Do not append frames to the on-disk result log (RESULT_LOG_DIR)')
+parser.add_argument('--max-frames', type=int, default=0,
+                    help='Stop after this many frames (benchmark runs on a live camera)')
+parser.add_argument('--profile', nargs='?', const='monitor_profile.json', default=None,
+                    help='Write a per-stage timing report at exit (default: monitor_profile.json)')
+
+# Set by configure() once we know which session this process is monitoring
+args       = None
+STUDENT_ID = 'unknown'
+EXAM_ID    = 'unknown'
 
 # Load environment (should be in the same dir or one level up)
 # For dev, we can also use hardcoded values if .env is missing
@@ -47,8 +73,19 @@ PROHIBITED_CLASSES = {
     63: 'LAPTOP',   # also keyboard
     64: 'MOUSE',
 }
+# Monitor label → backend class name used by the result log
+RESULT_LABELS = {'MOBILE PHONE': 'cell phone', 'LAPTOP': 'laptop', 'BOOK': 'book', 'REMOTE': 'remote'}
 CONF_THRESHOLD = 0.30   # Lower = more sensitive
-WINDOW_NAME   = f"🔒 Neural Sentinel - {STUDENT_ID[:8]}"
+WINDOW_NAME   = "🔒 Neural Sentinel"
+
+
+def configure(parsed):
+    """Bind the session identity used by the window title and Supabase sync."""
+    global args, STUDENT_ID, EXAM_ID, WINDOW_NAME
+    args       = parsed
+    STUDENT_ID = parsed.student_id
+    EXAM_ID    = parsed.exam_id
+    WINDOW_NAME = f"🔒 Neural Sentinel - {STUDENT_ID[:8]}"
 
 
 # ─────────────────────────────────────────────
@@ -84,17 +121,168 @@ def put_text_with_bg(img, text, pos, font_scale=0.55, thickness=1,
                 font_scale, fg, thickness, cv2.LINE_AA)
 
 
+def draw_faces(display, fa):
+    """Candidate face box + gaze label, and red boxes for any extra faces."""
+    if not fa['face_detected']:
+        return
+    fx, fy, fw, fh = fa['face_box']
+    col = (0, 220, 0) if fa['gaze_direction'] == "FORWARD" else (0, 120, 255)
+    draw_rounded_rect(display, (fx, fy), (fx+fw, fy+fh), col, 2)
+    put_text_with_bg(display, f"STUDENT  {fa['gaze_direction']}",
+                     (fx, fy - 10), 0.45, 1, fg=(255,255,255), bg=col)
+
+    # Draw other faces (suspicious)
+    for (x, y, ww, hh) in fa['faces'][1:]:
+        draw_rounded_rect(display, (x, y), (x+ww, y+hh), (0, 0, 220), 2)
+        put_text_with_bg(display, "UNKNOWN PERSON",
+                         (x, y - 10), 0.45, 1, fg=(255,255,255), bg=(0,0,200))
+
+def draw_detections(display, detections):
+    """Red boxes for prohibited objects found by YOLO."""
+    for det in detections:
+        x1, y1, x2, y2 = det['box']
+        pct = f"{det['conf']*100:.0f}%"
+        cv2.rectangle(display, (x1, y1), (x2, y2), (0, 50, 255), 3)
+        # Glow effect
+        cv2.rectangle(display, (x1-2, y1-2), (x2+2, y2+2), (0, 100, 255), 1)
+        put_text_with_bg(display, f"⚠ {det['label']}  {pct}",
+                         (x1, max(y1 - 12, 18)), 0.5, 1,
+                         fg=(255, 255, 255), bg=(0, 0, 200))
+
+def draw_hud(display, w, h, fa, detections, violations, fps):
+    """Status panel, measured FPS and the violation / secure banner."""
+    face_detected  = fa['face_detected']
+    gaze_direction = fa['gaze_direction']
+
+    # Top-left status panel
+    panel_h = 115
+    alpha_blend_rect(display, (0, 0), (260, panel_h), (10, 10, 10), 0.65)
+    cv2.putText(display, "NEURAL SENTINEL  v2.0",
+                (10, 22), cv2.FONT_HERSHEY_DUPLEX, 0.5, (80, 200, 255), 1)
+
+    face_col  = (0, 200, 0) if face_detected else (0, 0, 255)
+    gaze_col  = (0, 200, 0) if gaze_direction == "FORWARD" else (0, 100, 255)
+    obj_col   = (0, 0, 255) if detections else (0, 200, 0)
+
+    cv2.putText(display, f"FACE  : {'DETECTED' if face_detected else 'MISSING'}",
+                (10, 46), cv2.FONT_HERSHEY_DUPLEX, 0.48, face_col, 1)
+    cv2.putText(display, f"GAZE  : {gaze_direction}",
+                (10, 66), cv2.FONT_HERSHEY_DUPLEX, 0.48, gaze_col, 1)
+    cv2.putText(display, f"EYES  : {fa['eye_status']}",
+                (10, 86), cv2.FONT_HERSHEY_DUPLEX, 0.48, (200, 200, 200), 1)
+    cv2.putText(display, f"OBJECT: {'DETECTED' if detections else 'CLEAR'}",
+                (10, 106), cv2.FONT_HERSHEY_DUPLEX, 0.48, obj_col, 1)
+
+    # FPS display: measured loop rate, not the camera's nominal setting
+    cv2.putText(display, f"FPS: {fps:.1f}", (w - 90, 22),
+                cv2.FONT_HERSHEY_DUPLEX, 0.45, (150, 150, 150), 1)
+
+    if violations:
+        # Red alert bar at the bottom
+        alpha_blend_rect(display, (0, h - 65), (w, h), (0, 0, 220), 0.80)
+        cv2.rectangle(display, (0, h - 65), (w, h), (0, 0, 200), 2)
+
+        cv2.putText(display, "⚠  MALPRACTICE DETECTED  —  DON'T DO THIS!",
+                    (30, h - 42), cv2.FONT_HERSHEY_DUPLEX, 0.65, (255, 255, 255), 2)
+        cv2.putText(display, violations[0].upper(),
+                    (30, h - 18), cv2.FONT_HERSHEY_DUPLEX, 0.45, (255, 200, 200), 1)
+
+        # Red border
+        cv2.rectangle(display, (0, 0), (w - 1, h - 1), (0, 0, 255), 4)
+    else:
+        # Green secure border
+        cv2.rectangle(display, (0, 0), (w - 1, h - 1), (0, 200, 80), 2)
+        put_text_with_bg(display, "✔  SECURE  —  NO VIOLATIONS",
+                         (int(w/2) - 130, h - 15), 0.50, 1,
+                         fg=(255, 255, 255), bg=(0, 140, 50))
+
+
 # ─────────────────────────────────────────────
-#  MAIN MONITOR
+#  ANALYSIS (shared with multi_monitor.py)
 # ─────────────────────────────────────────────
-def main():
-    print("\n" + "="*55)
-    print("  🔒  Neural Sentinel  |  Exam Proctoring Monitor")
-    print("="*55)
+def analyze_faces(gray, w, face_cascade, eye_cascade, prof=NULL):
+    """Haar face + eye pass over one grayscale frame → gaze/eye state and violations."""
+    with prof.stage('face'):
+        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.2,
+                                              minNeighbors=5, minSize=(60, 60))
 
-    # Load YOLOv8
+    result = {
+        'faces':          faces,
+        'face_box':       None,
+        'face_detected':  len(faces) > 0,
+        'multi_person':   len(faces) > 1,
+        'gaze_direction': "FORWARD",
+        'eye_status':     "OK",
+        'violations':     [],
+    }
+    violations = result['violations']
+
+    if result['face_detected']:
+        # Largest face = exam candidate
+        fx, fy, fw, fh = sorted(faces, key=lambda b: b[2]*b[3], reverse=True)[0]
+        result['face_box'] = (fx, fy, fw, fh)
+        cx = fx + fw / 2
+
+        # Gaze estimation from face centre position
+        if cx < w * 0.30:
+            result['gaze_direction'] = "LOOKING RIGHT ▶"
+            violations.append("GAZE SHIFT: Looking Right")
+        elif cx > w * 0.70:
+            result['gaze_direction'] = "LOOKING LEFT  ◀"
+            violations.append("GAZE SHIFT: Looking Left")
+        else:
+            # Check eyes inside face ROI
+            roi_gray = gray[fy:fy+fh, fx:fx+fw]
+            with prof.stage('eyes'):
+                eyes = eye_cascade.detectMultiScale(roi_gray, scaleFactor=1.1,
+                                                    minNeighbors=3, minSize=(20, 20))
+            if len(eyes) < 1:
+                result['gaze_direction'] = "LOOKING AWAY ↑"
+                violations.append("GAZE: Eyes not visible")
+                result['eye_status'] = "NOT VISIBLE"
+            elif len(eyes) < 2:
+                result['eye_status'] = "PARTIAL"
+    else:
+        result['gaze_direction'] = "NOT DETECTED"
+        violations.append("FACE: Not visible in frame")
+
+    if result['multi_person']:
+        violations.append("ALERT: Multiple persons detected")
+    return result
+
+def parse_yolo(yolo_results):
+    """Keep only prohibited-class boxes from one YOLO result."""
+    detections = []
+    for box in yolo_results.boxes:
+        cls_id = int(box.cls[0])
+        conf   = float(box.conf[0])
+        if cls_id in PROHIBITED_CLASSES:
+            coords = [int(c) for c in box.xyxy[0].tolist()]
+            detections.append({
+                'label': PROHIBITED_CLASSES[cls_id],
+                'conf':  conf,
+                'box':   coords
+            })
+    return detections
+
+def risk_score(multi_person, detections, gaze_direction):
+    """Risk score logged with a violation, based on detection severity."""
+    if multi_person: return 70
+    if detections: return 60
+    if gaze_direction != "FORWARD": return 40
+    return 20
+
+
+# ─────────────────────────────────────────────
+#  MAIN MONITOR
+# ─────────────────────────────────────────────
+def load_detectors():
+    """Load YOLO and the Haar cascades (the slow part of startup)."""
+    cpu_budget.configure('monitor')
     print("  Loading YOLOv8n model...")
     yolo = YOLO('yolov8n.pt')
+    # One dummy pass so the first real frame doesn't pay for lazy initialisation
+    yolo(np.zeros((480, 640, 3), dtype=np.uint8), verbose=False)
     print("  ✅  YOLOv8n ready")
 
     # Load face & eye cascade
@@ -103,13 +291,30 @@ def main():
     eye_cascade = cv2.CascadeClassifier(
         cv2.data.haarcascades + 'haarcascade_eye.xml')
     print("  ✅  Face detector ready")
+    return yolo, face_cascade, eye_cascade
+
+
+def main(detectors=None):
+    print("\n" + "="*55)
+    print("  🔒  Neural Sentinel  |  Exam Proctoring Monitor")
+    print("="*55)
+
+    yolo, face_cascade, eye_cascade = detectors or load_detectors()
 
     # Open webcam — try multiple backends to fix Windows black screen
     cap = None
     BACKENDS = [cv2.CAP_MSMF, cv2.CAP_DSHOW, cv2.CAP_ANY]
     BACKEND_NAMES = ['MSMF', 'DSHOW', 'ANY']
+    headless = args.headless
+
+    if args.source is not None:
+        cap = cv2.VideoCapture(int(args.source) if args.source.isdigit() else args.source)
+        if not cap.isOpened():
+            print(f"\n  ❌  Cannot open source: {args.source}")
+            return
+        print(f"  ✅  Reading frames from {args.source}")
 
-    for idx in [0, 1, 2]:
+    for idx in ([] if cap is not None else [0, 1, 2]):
         for backend, bname in zip(BACKENDS, BACKEND_NAMES):
             print(f"  Trying camera {idx} with backend {bname}...")
             cap = cv2.VideoCapture(idx, backend)
@@ -156,7 +361,7 @@ def main():
         return True
 
     # If running in auto mode, wait for remote exam start (is_active=True)
-    if args.auto:
+    if args.auto and not headless:
         print("  Auto mode: waiting for exam to start on the server...")
         while True:
             if get_remote_active():
@@ -164,21 +369,32 @@ def main():
                 break
             time.sleep(3)
 
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH,  640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-    cap.set(cv2.CAP_PROP_FPS, 30)
+    if args.source is None:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH,  640)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        cap.set(cv2.CAP_PROP_FPS, 30)
 
     w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
 
     print(f"\n  Camera: {w}x{h}")
-    print("  Press  Q  to quit safely\n")
-
-    # Create resizable window and keep it persistent so closing it won't kill the process
-    cv2.namedWindow(WINDOW_NAME, cv2.WINDOW_NORMAL)
+    if headless:
+        print("  Headless run — until the source ends" +
+              (f" or {args.max_frames} frames\n" if args.max_frames else "\n"))
+    else:
+        print("  Press  Q  to quit safely,  P  for the timing overlay\n")
+        # Create resizable window and keep it persistent so closing it won't kill the process
+        cv2.namedWindow(WINDOW_NAME, cv2.WINDOW_NORMAL)
+
+    # Stage timers are always on (a few perf_counter calls per frame): they drive the
+    # measured FPS on the HUD, the P overlay and the --profile report
+    prof = StageProfiler()
+    show_profile = False
 
     # Violation counters
     violation_log = []
+    # Only a real session is logged; headless benchmark/profiling runs would fill it with noise
+    results       = None if headless or args.no_log else ResultLog(os.environ.get('RESULT_LOG_DIR', 'result_log'))
     yolo_every    = 3    # Run YOLO every N frames (saves CPU)
     frame_idx     = 0
     last_yolo_det = []   # Cache last YOLO results between frames
@@ -187,7 +403,10 @@ def main():
     heartbeat_every = 5 # seconds
 
     while True:
-        ret, frame = cap.read()
+        with prof.stage('capture'):
+            ret, frame = cap.read()
+        if (not ret or frame is None) and args.source is not None:
+            break    # end of the video (or the given source failed)
         if not ret or frame is None:
             # Camera disconnected or in use (e.g., user clicked browser). Don't exit: try to reconnect.
             print("  [WARN] Camera read failed — attempting to reconnect...")
@@ -240,17 +459,18 @@ def main():
                 ret, frame = cap.read()
             
         # ── 0. HEARTBEAT ──────────────────────────────────────────
-        if time.time() - last_heartbeat > heartbeat_every:
-            try:
-                supabase.table("proctoring_status").upsert({
-                    "student_id": STUDENT_ID,
-                    "exam_id":    EXAM_ID,
-                    "is_active":  True,
-                    "last_heartbeat": "now()"
-                }).execute()
-                last_heartbeat = time.time()
-            except:
-                pass # Silently fail if net is down
+        if not headless and time.time() - last_heartbeat > heartbeat_every:
+            with prof.stage('sync'):
+                try:
+                    supabase.table("proctoring_status").upsert({
+                        "student_id": STUDENT_ID,
+                        "exam_id":    EXAM_ID,
+                        "is_active":  True,
+                        "last_heartbeat": "now()"
+                    }).execute()
+                    last_heartbeat = time.time()
+                except:
+                    pass # Silently fail if net is down
 
         frame = cv2.flip(frame, 1)   # Mirror so it feels natural
         display = frame.copy()
@@ -258,158 +478,71 @@ def main():
 
         # ── 1. FACE DETECTION (every frame) ──────────────────────
         gray  = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.2,
-                                              minNeighbors=5, minSize=(60, 60))
-
-        face_detected   = len(faces) > 0
-        multi_person    = len(faces) > 1
-        gaze_direction  = "FORWARD"
-        eye_status      = "OK"
-        violations_this_frame = []
-
-        if face_detected:
-            # Largest face = exam candidate
-            fx, fy, fw, fh = sorted(faces, key=lambda b: b[2]*b[3], reverse=True)[0]
-            cx = fx + fw / 2
-
-            # Gaze estimation from face centre position
-            if cx < w * 0.30:
-                gaze_direction = "LOOKING RIGHT ▶"
-                violations_this_frame.append("GAZE SHIFT: Looking Right")
-            elif cx > w * 0.70:
-                gaze_direction = "LOOKING LEFT  ◀"
-                violations_this_frame.append("GAZE SHIFT: Looking Left")
-            else:
-                # Check eyes inside face ROI
-                roi_gray = gray[fy:fy+fh, fx:fx+fw]
-                eyes = eye_cascade.detectMultiScale(roi_gray, scaleFactor=1.1,
-                                                    minNeighbors=3, minSize=(20, 20))
-                if len(eyes) < 1:
-                    gaze_direction = "LOOKING AWAY ↑"
-                    violations_this_frame.append("GAZE: Eyes not visible")
-                    eye_status = "NOT VISIBLE"
-                elif len(eyes) < 2:
-                    eye_status = "PARTIAL"
-
-            # Draw face box
-            col = (0, 220, 0) if gaze_direction == "FORWARD" else (0, 120, 255)
-            draw_rounded_rect(display, (fx, fy), (fx+fw, fy+fh), col, 2)
-            put_text_with_bg(display, f"STUDENT  {gaze_direction}",
-                             (fx, fy - 10), 0.45, 1, fg=(255,255,255), bg=col)
-
-            # Draw other faces (suspicious)
-            for (x, y, ww, hh) in faces[1:]:
-                draw_rounded_rect(display, (x, y), (x+ww, y+hh), (0, 0, 220), 2)
-                put_text_with_bg(display, "UNKNOWN PERSON",
-                                 (x, y - 10), 0.45, 1, fg=(255,255,255), bg=(0,0,200))
-
-        else:
-            gaze_direction = "NOT DETECTED"
-            violations_this_frame.append("FACE: Not visible in frame")
-
-        if multi_person:
-            violations_this_frame.append("ALERT: Multiple persons detected")
+        fa = analyze_faces(gray, w, face_cascade, eye_cascade, prof)
+        face_detected   = fa['face_detected']
+        multi_person    = fa['multi_person']
+        gaze_direction  = fa['gaze_direction']
+        eye_status      = fa['eye_status']
+        violations_this_frame = list(fa['violations'])
 
         # ── 2. YOLO OBJECT DETECTION (every 3rd frame) ───────────
         if frame_idx % yolo_every == 0:
-            yolo_results = yolo(frame, conf=CONF_THRESHOLD, verbose=False)[0]
-            new_det = []
-            for box in yolo_results.boxes:
-                cls_id = int(box.cls[0])
-                conf   = float(box.conf[0])
-                if cls_id in PROHIBITED_CLASSES:
-                    coords = [int(c) for c in box.xyxy[0].tolist()]
-                    new_det.append({
-                        'label': PROHIBITED_CLASSES[cls_id],
-                        'conf':  conf,
-                        'box':   coords
-                    })
-            last_yolo_det = new_det
-
-        # Draw YOLO detections (cached)
+            with prof.stage('yolo'):
+                yolo_results = yolo(frame, conf=CONF_THRESHOLD, verbose=False)[0]
+                last_yolo_det = parse_yolo(yolo_results)
+
         for det in last_yolo_det:
-            x1, y1, x2, y2 = det['box']
-            pct = f"{det['conf']*100:.0f}%"
-            cv2.rectangle(display, (x1, y1), (x2, y2), (0, 50, 255), 3)
-            # Glow effect
-            cv2.rectangle(display, (x1-2, y1-2), (x2+2, y2+2), (0, 100, 255), 1)
-            put_text_with_bg(display, f"⚠ {det['label']}  {pct}",
-                             (x1, max(y1 - 12, 18)), 0.5, 1,
-                             fg=(255, 255, 255), bg=(0, 0, 200))
-            
             violations_this_frame.append(f"PROHIBITED OBJECT: {det['label']} detected")
 
-        # ── 3. HUD OVERLAY ────────────────────────────────────────
-        # Top-left status panel
-        panel_h = 115
-        alpha_blend_rect(display, (0, 0), (260, panel_h), (10, 10, 10), 0.65)
-        cv2.putText(display, "NEURAL SENTINEL  v2.0",
-                    (10, 22), cv2.FONT_HERSHEY_DUPLEX, 0.5, (80, 200, 255), 1)
-
-        face_col  = (0, 200, 0) if face_detected else (0, 0, 255)
-        gaze_col  = (0, 200, 0) if gaze_direction == "FORWARD" else (0, 100, 255)
-        obj_col   = (0, 0, 255) if last_yolo_det else (0, 200, 0)
-
-        cv2.putText(display, f"FACE  : {'DETECTED' if face_detected else 'MISSING'}",
-                    (10, 46), cv2.FONT_HERSHEY_DUPLEX, 0.48, face_col, 1)
-        cv2.putText(display, f"GAZE  : {gaze_direction}",
-                    (10, 66), cv2.FONT_HERSHEY_DUPLEX, 0.48, gaze_col, 1)
-        cv2.putText(display, f"EYES  : {eye_status}",
-                    (10, 86), cv2.FONT_HERSHEY_DUPLEX, 0.48, (200, 200, 200), 1)
-        cv2.putText(display, f"OBJECT: {'DETECTED' if last_yolo_det else 'CLEAR'}",
-                    (10, 106), cv2.FONT_HERSHEY_DUPLEX, 0.48, obj_col, 1)
-
-        # FPS display
-        fps_text = f"FPS: {cap.get(cv2.CAP_PROP_FPS):.0f}"
-        cv2.putText(display, fps_text, (w - 90, 22),
-                    cv2.FONT_HERSHEY_DUPLEX, 0.45, (150, 150, 150), 1)
-
-        # ── 4. VIOLATION BANNER ───────────────────────────────────
+        # Every frame goes to the on-disk result log (queried after the exam)
+        if results is not None:
+            with prof.stage('log'):
+                results.append(EXAM_ID, STUDENT_ID, time.time(), 2 if multi_person else int(face_detected), False,
+                               {RESULT_LABELS.get(d['label'], d['label']): d['conf'] for d in last_yolo_det},
+                               risk_score(multi_person, last_yolo_det, gaze_direction) if violations_this_frame else 0)
+
+        # ── 3. HUD OVERLAY + VIOLATION BANNER ─────────────────────
+        with prof.stage('draw'):
+            draw_faces(display, fa)
+            # Draw YOLO detections (cached)
+            draw_detections(display, last_yolo_det)
+            draw_hud(display, w, h, fa, last_yolo_det, violations_this_frame, prof.fps())
+            if show_profile:
+                prof.draw(display)
+
+        # ── 4. VIOLATION LOG + SUPABASE SYNC ──────────────────────
         if violations_this_frame:
-            # Red alert bar at the bottom
-            alpha_blend_rect(display, (0, h - 65), (w, h), (0, 0, 220), 0.80)
-            cv2.rectangle(display, (0, h - 65), (w, h), (0, 0, 200), 2)
-
-            cv2.putText(display, "⚠  MALPRACTICE DETECTED  —  DON'T DO THIS!",
-                        (30, h - 42), cv2.FONT_HERSHEY_DUPLEX, 0.65, (255, 255, 255), 2)
-            cv2.putText(display, violations_this_frame[0].upper(),
-                        (30, h - 18), cv2.FONT_HERSHEY_DUPLEX, 0.45, (255, 200, 200), 1)
-
-            # Red border
-            cv2.rectangle(display, (0, 0), (w - 1, h - 1), (0, 0, 255), 4)
-
             violation_log.append({
                 'time': time.strftime('%H:%M:%S'),
                 'events': violations_this_frame
             })
-            
+
             # Sync to Supabase
-            try:
-                # Calculate risk score based on detection severity
-                base_risk = 20
-                if multi_person: base_risk = 70
-                elif last_yolo_det: base_risk = 60
-                elif gaze_direction != "FORWARD": base_risk = 40
-                
-                print(f"  [SYNC] Logging violations: {', '.join(violations_this_frame)}")
-                supabase.table("violation_logs").insert({
-                    "student_id": STUDENT_ID,
-                    "exam_id":    EXAM_ID,
-                    "violation_type": " | ".join(violations_this_frame),
-                    "risk_score": base_risk
-                }).execute()
-            except Exception as e:
-                print(f"  [ERROR] Sync failed: {e}")
-            except:
-                pass
-        else:
-            # Green secure border
-            cv2.rectangle(display, (0, 0), (w - 1, h - 1), (0, 200, 80), 2)
-            put_text_with_bg(display, "✔  SECURE  —  NO VIOLATIONS",
-                             (int(w/2) - 130, h - 15), 0.50, 1,
-                             fg=(255, 255, 255), bg=(0, 140, 50))
+            if not headless:
+                with prof.stage('sync'):
+                    try:
+                        # Calculate risk score based on detection severity
+                        base_risk = risk_score(multi_person, last_yolo_det, gaze_direction)
+
+                        print(f"  [SYNC] Logging violations: {', '.join(violations_this_frame)}")
+                        supabase.table("violation_logs").insert({
+                            "student_id": STUDENT_ID,
+                            "exam_id":    EXAM_ID,
+                            "violation_type": " | ".join(violations_this_frame),
+                            "risk_score": base_risk
+                        }).execute()
+                    except Exception as e:
+                        print(f"  [ERROR] Sync failed: {e}")
+
+        prof.frame_done()
+        if args.max_frames and prof.frames >= args.max_frames:
+            break
+        if headless:
+            continue
 
-        cv2.imshow(WINDOW_NAME, display)
+        with prof.stage('imshow'):
+            cv2.imshow(WINDOW_NAME, display)
+            key = cv2.waitKey(1) & 0xFF
 
         # If user clicks the window close button, OpenCV marks it invisible.
         # Recreate the window and continue monitoring instead of exiting.
@@ -429,11 +562,20 @@ def main():
             time.sleep(0.3)
             continue
 
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+        if key == ord('q'):
             break
+        if key == ord('p'):
+            show_profile = not show_profile
 
     cap.release()
-    cv2.destroyAllWindows()
+    if not headless:
+        cv2.destroyAllWindows()
+    if results is not None:
+        results.close()
+    if args.profile:
+        prof.write_report(args.profile)
+    elif headless:
+        prof.print_report()
 
     print(f"\n  Session ended.  Total violation events: {len(violation_log)}")
     if violation_log:
@@ -441,5 +583,44 @@ def main():
         for v in violation_log[-10:]:
             print(f"    [{v['time']}] {' | '.join(v['events'])}")
 
+def lower_priority(nice):
+    if nice and hasattr(os, 'nice'):
+        os.nice(nice)
+    elif nice:
+        print("  ⚠️  --nice is not supported on this platform; running at normal priority")
+
+
+def run_worker(nice=0):
+    """
+    Warm pool mode (see proctoring/monitor_pool.py): load everything up front,
+    then block until the launcher writes one JSON line with the session to run.
+    """
+    lower_priority(nice)
+    detectors = load_detectors()
+    print("  ⏳  Worker warm — waiting for assignment")
+    line = sys.stdin.readline()
+    if not line.strip():
+        return  # Pool shut down or reaped us before we were used
+    assignment = json.loads(line)
+    configure(argparse.Namespace(
+        student_id=str(assignment.get('student_id', 'unknown')),
+        exam_id=str(assignment.get('exam_id', 'unknown')),
+        auto=bool(assignment.get('auto', False)),
+        worker=True,
+        source=None,
+        headless=False,
+        max_frames=0,
+        profile=None,
+        no_log=False,
+    ))
+    main(detectors)
+
+
 if __name__ == '__main__':
-    main()
+    cli_args = parser.parse_args()
+    if cli_args.worker:
+        run_worker(cli_args.nice)
+    else:
+        lower_priority(cli_args.nice)
+        configure(cli_args)
+        main()
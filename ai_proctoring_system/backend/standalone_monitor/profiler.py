@@ -0,0 +1,134 @@
+"""
+Per-stage timing for the monitor loop.
+
+    prof = StageProfiler()
+    with prof.stage('yolo'):
+        ...
+    prof.frame_done()
+    prof.draw(display)          # rolling ms per stage + measured FPS
+    prof.write_report(path)     # totals and percentiles for the whole run
+
+FPS is measured from frame completion times over the rolling window, not
+read from the camera's nominal setting.
+"""
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import cv2
+
+STAGES = ('capture', 'face', 'eyes', 'yolo', 'draw', 'log', 'sync', 'imshow')
+
+
+class StageProfiler:
+    def __init__(self, window=120, keep=20000):
+        self.window = window
+        self.recent = {s: deque(maxlen=window) for s in STAGES}    # (frame, ms)
+        self.samples = {s: deque(maxlen=keep) for s in STAGES}     # for the exit report
+        self.totals = {s: 0.0 for s in STAGES}
+        self.counts = {s: 0 for s in STAGES}
+        self.frame_times = deque(maxlen=window)
+        self.frames = 0
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - t0) * 1000
+            self.recent[name].append((self.frames, ms))
+            self.samples[name].append(ms)
+            self.totals[name] += ms
+            self.counts[name] += 1
+
+    def frame_done(self):
+        self.frames += 1
+        self.frame_times.append(time.perf_counter())
+
+    def fps(self):
+        if len(self.frame_times) < 2:
+            return 0.0
+        return (len(self.frame_times) - 1) / (self.frame_times[-1] - self.frame_times[0])
+
+    def rolling(self):
+        """stage → (mean ms per call, ms per frame) over the recent window."""
+        first = self.frames - self.window
+        out = {}
+        for name, entries in self.recent.items():
+            window = [ms for frame, ms in entries if frame >= first]
+            if window:
+                out[name] = (sum(window) / len(window), sum(window) / max(1, min(self.frames, self.window)))
+        return out
+
+    def draw(self, img):
+        """Overlay panel (top right): measured FPS and per-stage cost."""
+        rows = self.rolling()
+        h, w = img.shape[:2]
+        x = w - 230
+        bottom = 40 + 18 * len(rows)
+        overlay = img.copy()
+        cv2.rectangle(overlay, (x - 10, 32), (w - 5, bottom), (10, 10, 10), -1)
+        cv2.addWeighted(overlay, 0.65, img, 0.35, 0, img)
+        cv2.putText(img, f"PROFILE  {self.fps():5.1f} fps", (x, 50),
+                    cv2.FONT_HERSHEY_DUPLEX, 0.45, (80, 200, 255), 1)
+        y = 50
+        for name in STAGES:
+            if name not in rows:
+                continue
+            y += 18
+            per_call, per_frame = rows[name]
+            cv2.putText(img, f"{name:<8}{per_call:7.1f} ms {per_frame:6.1f}/f", (x, y),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 200, 200), 1)
+
+    def report(self):
+        wall = time.perf_counter() - self.started
+        stages = {}
+        for name in self.totals:
+            samples = sorted(self.samples[name])
+            if not samples:
+                continue
+            stages[name] = {
+                "calls": self.counts[name],
+                "mean_ms": round(self.totals[name] / self.counts[name], 2),
+                "p50_ms": round(samples[len(samples) // 2], 2),
+                "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+                "max_ms": round(samples[-1], 2),
+                "ms_per_frame": round(self.totals[name] / max(1, self.frames), 2),
+                "share": round(self.totals[name] / 1000 / wall, 3) if wall else 0,
+            }
+        return {
+            "frames": self.frames,
+            "wall_seconds": round(wall, 2),
+            "achieved_fps": round(self.frames / wall, 2) if wall else 0,
+            "stages": stages,
+        }
+
+    def print_report(self, report=None):
+        report = report or self.report()
+        print(f"\n  Profile: {report['frames']} frames in {report['wall_seconds']}s "
+              f"= {report['achieved_fps']} fps")
+        print(f"    {'stage':<8} {'calls':>6} {'mean':>8} {'p95':>8} {'ms/frame':>9} {'share':>6}")
+        for name, s in sorted(report['stages'].items(), key=lambda kv: -kv[1]['ms_per_frame']):
+            print(f"    {name:<8} {s['calls']:>6} {s['mean_ms']:>8} {s['p95_ms']:>8} "
+                  f"{s['ms_per_frame']:>9} {s['share']*100:>5.1f}%")
+
+    def write_report(self, path):
+        report = self.report()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        self.print_report(report)
+        print(f"  📄 Timing report written to {path}")
+        return report
+
+
+class _NullProfiler:
+    """Stand-in when nobody is measuring (e.g. multi_monitor's analysis threads)."""
+    @contextmanager
+    def stage(self, name):
+        yield
+
+
+NULL = _NullProfiler()
@@ -1,73 +1,183 @@
 """
-Quick YOLO Phone Detection Test
-Run this directly: python test_phone_detection.py
-It opens your webcam and shows live YOLO detections.
-Press Q to quit.
+Detection Accuracy & Latency Regression Harness
+Run: python test_phone_detection.py --corpus eval_corpus/ [--baseline baseline.json]
+
+Runs a labeled image/video corpus (see eval_corpus.py for the layout) through
+each configured pipeline headlessly, in batches, and reports per-class
+precision/recall (phones, books, earbuds, multiple persons, ...) plus
+per-image latency. Labels are decided with the backend's own rules
+(detection_rules.py) and frames are decoded by the backend's decode_image
+(frame_decode.py, LANCZOS upscale to 640px wide unless --no-upscale), so a
+pipeline here behaves like flask_proctor_backend.py.
+
+  --run NAME:W1[,W2]   one pipeline; weights are combined like model_base +
+                       model_custom. Any format YOLO() loads works, so
+                       exported engines (.onnx, .engine, *_openvino_model/)
+                       are compared by listing them as separate runs.
+  --baseline FILE      compare against a saved result; exit 1 on regression
+  --write-baseline     save this run's results to --baseline (requires --baseline)
+  --no-upscale         decode like the degraded quality levels (no upscale)
+
+Example:
+  python test_phone_detection.py --corpus eval_corpus \
+      --run pt:yolo11n.pt,runs/detect/custom_proctor/weights/best.pt \
+      --run onnx:yolo11n.onnx --baseline eval_baseline.json
 """
-import cv2
-from ultralytics import YOLO
-
-print("📦 Loading YOLOv8 model...")
-model = YOLO('yolov8n.pt')
-print("✅ Model loaded")
-print("📷 Opening webcam...")
-
-cap = cv2.VideoCapture(0)
-if not cap.isOpened():
-    print("❌ Could not open webcam!")
-    exit(1)
-
-print("=" * 50)
-print("✅ Camera is open!")
-print("👉 Hold your PHONE in front of the camera")
-print("👉 It will draw a RED box if phone is detected")
-print("👉 Press Q to quit")
-print("=" * 50)
-
-PROHIBITED = {'cell phone', 'book', 'laptop', 'remote'}
-CONF = 0.20  # Very low threshold for testing
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
-
-    # Run YOLO
-    results = model(frame, verbose=False, conf=CONF)[0]
-
-    phone_found = False
-    for box in results.boxes:
-        cls_id = int(box.cls[0])
-        label  = model.names[cls_id]
-        conf   = float(box.conf[0])
-        x1, y1, x2, y2 = [int(v) for v in box.xyxy[0]]
-
-        if label in PROHIBITED:
-            phone_found = True
-            # Red box for prohibited objects
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 3)
-            cv2.rectangle(frame, (x1, y1-24), (x1+len(label)*11+60, y1), (0, 0, 200), -1)
-            cv2.putText(frame, f"! {label.upper()} {int(conf*100)}%",
-                        (x1+4, y1-6), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (255,255,255), 2)
-            print(f"  ⚠️  DETECTED: {label} at {int(conf*100)}% confidence!")
-        elif label == 'person':
-            # Green box for person
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 200, 0), 2)
-            cv2.putText(frame, f"USER {int(conf*100)}%",
-                        (x1+4, y1-6), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0,255,0), 2)
-
-    # Status text on screen
-    status = "PHONE DETECTED!" if phone_found else "Looking for objects..."
-    color  = (0, 0, 255) if phone_found else (200, 200, 200)
-    cv2.putText(frame, status, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
-    cv2.putText(frame, "Press Q to quit", (10, frame.shape[0]-10),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (150,150,150), 1)
-
-    cv2.imshow("YOLO Phone Detection Test", frame)
-
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
-
-cap.release()
-cv2.destroyAllWindows()
-print("Done.")
+import argparse
+import json
+import os
+import sys
+import time
+
+from detection_rules import CONF_OBJECT, CONF_PERSON, PROHIBITED_CLASSES, frame_labels
+from eval_corpus import EVAL_CLASSES, load_corpus, score
+from frame_decode import decode_image
+
+CUSTOM_WEIGHTS = 'runs/detect/custom_proctor/weights/best.pt'
+
+
+def default_runs():
+    weights = ['yolo11n.pt']
+    if os.path.exists(CUSTOM_WEIGHTS):
+        weights.append(CUSTOM_WEIGHTS)
+    return [('flask-default', weights)]
+
+
+def parse_run(spec):
+    name, _, weights = spec.partition(':')
+    if not weights:
+        raise argparse.ArgumentTypeError(f"--run needs NAME:WEIGHTS, got {spec!r}")
+    return name, weights.split(',')
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def evaluate_run(name, weights, items, args):
+    from ultralytics import YOLO
+
+    print(f"📦 [{name}] loading {', '.join(weights)}")
+    models = [YOLO(w) for w in weights]
+    # Same conf the backend passes to YOLO; frame_labels applies the per-class thresholds
+    infer_conf = min(CONF_OBJECT, CONF_PERSON)
+    warm = decode_image(items[0].load_bytes(), upscale=args.upscale)
+    for m in models:
+        m(warm, verbose=False, conf=infer_conf, imgsz=args.imgsz, device=args.device)
+
+    predictions, truths, latencies = [], [], []
+    for start in range(0, len(items), args.batch):
+        chunk = items[start:start + args.batch]
+        frames = [decode_image(item.load_bytes(), upscale=args.upscale) for item in chunk]
+
+        t0 = time.perf_counter()
+        per_frame = [[] for _ in chunk]
+        for m in models:
+            results = m(frames, verbose=False, conf=infer_conf, imgsz=args.imgsz, device=args.device)
+            for dets, res in zip(per_frame, results):
+                dets.extend((m.names[int(c)], float(p)) for c, p in zip(res.boxes.cls.tolist(), res.boxes.conf.tolist()))
+        elapsed = time.perf_counter() - t0
+
+        latencies.extend([elapsed / len(chunk) * 1000] * len(chunk))
+        for item, dets in zip(chunk, per_frame):
+            predictions.append(frame_labels(dets, CONF_OBJECT, CONF_PERSON, PROHIBITED_CLASSES))
+            truths.append(item.labels)
+
+    return {
+        'weights': weights,
+        'images': len(items),
+        'classes': score(predictions, truths, EVAL_CLASSES),
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 2),
+            'p50': round(percentile(latencies, 0.50), 2),
+            'p95': round(percentile(latencies, 0.95), 2),
+        },
+    }
+
+
+def find_regressions(current, baseline, args):
+    problems = []
+    for name, run in current['runs'].items():
+        base = baseline.get('runs', {}).get(name)
+        if base is None:
+            continue
+        for cls, now in run['classes'].items():
+            before = base['classes'].get(cls)
+            if not before:
+                continue
+            for metric, allowed in (('recall', args.max_recall_drop), ('precision', args.max_precision_drop)):
+                if before[metric] is not None and now[metric] is not None and before[metric] - now[metric] > allowed:
+                    problems.append(f"{name}/{cls}: {metric} {before[metric]:.3f} → {now[metric]:.3f}")
+        p95_before, p95_now = base['latency_ms']['p95'], run['latency_ms']['p95']
+        if p95_before and p95_now > p95_before * (1 + args.max_latency_increase):
+            problems.append(f"{name}: p95 latency {p95_before:.1f}ms → {p95_now:.1f}ms")
+    return problems
+
+
+def print_report(results):
+    for name, run in results['runs'].items():
+        lat = run['latency_ms']
+        print(f"\n🧪 {name}  ({run['images']} images, {lat['mean']}ms mean / {lat['p95']}ms p95 per image)")
+        print(f"   {'class':<18}{'precision':>10}{'recall':>10}{'support':>9}")
+        for cls, m in run['classes'].items():
+            fmt = lambda v: f"{v:.3f}" if v is not None else "  -  "
+            print(f"   {cls:<18}{fmt(m['precision']):>10}{fmt(m['recall']):>10}{m['support']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detection accuracy/latency regression harness")
+    parser.add_argument('--corpus', required=True, help='Folder with media files and labels.json')
+    parser.add_argument('--run', action='append', type=parse_run, help='NAME:WEIGHTS[,WEIGHTS]')
+    parser.add_argument('--batch', type=int, default=8)
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--device', default=None, help='e.g. cpu, 0')
+    parser.add_argument('--output', default='eval_results.json')
+    parser.add_argument('--baseline')
+    parser.add_argument('--write-baseline', action='store_true')
+    parser.add_argument('--no-upscale', dest='upscale', action='store_false',
+                        help='skip the backend\'s LANCZOS upscale of narrow frames')
+    parser.add_argument('--max-recall-drop', type=float, default=0.02)
+    parser.add_argument('--max-precision-drop', type=float, default=0.05)
+    parser.add_argument('--max-latency-increase', type=float, default=0.25, help='fraction of baseline p95')
+    args = parser.parse_args()
+    if args.write_baseline and not args.baseline:
+        parser.error("--write-baseline needs --baseline FILE")
+
+    items = load_corpus(args.corpus)
+    if not items:
+        print("❌ Corpus is empty")
+        return 2
+    print(f"📂 {len(items)} frames from {args.corpus}")
+
+    results = {'corpus': os.path.abspath(args.corpus), 'created': time.time(),
+               'imgsz': args.imgsz, 'batch': args.batch, 'runs': {}}
+    for name, weights in args.run or default_runs():
+        results['runs'][name] = evaluate_run(name, weights, items, args)
+
+    print_report(results)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results written to {args.output}")
+
+    if args.baseline and args.write_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"📌 Baseline saved to {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        problems = find_regressions(results, baseline, args)
+        if problems:
+            print("\n❌ REGRESSIONS vs baseline:")
+            for p in problems:
+                print(f"   • {p}")
+            return 1
+        print("\n✅ No regressions vs baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
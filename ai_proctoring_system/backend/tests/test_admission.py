@@ -0,0 +1,51 @@
+import threading
+import time
+
+from admission import SessionAdmission
+
+
+def enter_async(admission, session, results, name):
+    t = threading.Thread(target=lambda: results.__setitem__(name, admission.enter(session)))
+    t.start()
+    return t
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_first_frame_is_admitted_immediately():
+    a = SessionAdmission()
+    assert a.enter("s1")
+    assert a.enter("s2")                      # other sessions are independent
+    assert a.stats()["in_flight"] == 2
+
+
+def test_newer_frame_supersedes_the_waiting_one():
+    a = SessionAdmission(max_wait=5.0)
+    assert a.enter("s")
+    results = {}
+    second = enter_async(a, "s", results, "second")
+    wait_for(lambda: a.stats()["waiting"] == 1)
+    third = enter_async(a, "s", results, "third")
+    second.join(2.0)
+    assert results["second"] is False          # released without waiting for the running frame
+
+    a.exit("s")
+    third.join(2.0)
+    assert results["third"] is True
+    a.exit("s")
+    stats = a.stats()
+    assert (stats["admitted"], stats["superseded"], stats["in_flight"]) == (2, 1, 0)
+
+
+def test_waiter_times_out():
+    a = SessionAdmission(max_wait=0.05)
+    assert a.enter("s")
+    assert a.enter("s") is False
+    assert a.stats()["timed_out"] == 1
+    a.exit("s")
+    assert a.enter("s")                        # slot was released cleanly
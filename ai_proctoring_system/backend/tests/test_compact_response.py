@@ -0,0 +1,54 @@
+import pytest
+
+import compact_response as cr
+
+PROHIBITED = {'cell phone', 'book'}
+
+
+def test_negotiate():
+    if cr.msgpack is None:
+        assert cr.negotiate(cr.MSGPACK) is None
+        return
+    assert cr.negotiate(None) is None
+    assert cr.negotiate('application/json') is None
+    assert cr.negotiate('application/msgpack') == 'full'
+    assert cr.negotiate('application/vnd.proctor.delta+msgpack, application/json') == 'delta'
+
+
+def test_compact_keeps_persons_and_prohibited_objects_only():
+    out = cr.compact({
+        "person_count": 1, "violation": True, "status": "ok",
+        "objects": [
+            {"name": "person", "accuracy": 0.91, "box": [1.4, 2, 30, 40]},
+            {"name": "cell phone", "accuracy": 0.5},              # trusted client object: no box
+            {"name": "chair", "accuracy": 0.8, "box": [0, 0, 5, 5]},
+        ],
+        "violation_details": {"object": "cell phone", "confidence": 0.5, "msg": "PROHIBITED"},
+    }, PROHIBITED)
+    assert out['p'] == 1 and out['v'] is True and out['s'] == "ok"
+    assert out['o'] == [['person', 91, 1, 2, 30, 40], ['cell phone', 50]]
+    assert out['d'] == {'o': 'cell phone', 'c': 50, 'm': 'PROHIBITED'}
+
+
+def test_delta_sends_changes_after_an_ack():
+    state = {}
+    first = cr.delta(state, {'p': 1, 'v': False, 's': 'ok'}, ack=None)
+    assert first == {'p': 1, 'v': False, 's': 'ok', 'n': 1, 'f': True}
+
+    second = cr.delta(state, {'p': 1, 'v': True}, ack=1)
+    assert second == {'v': True, 'x': ['s'], 'n': 2, 'b': 1}
+
+
+def test_delta_without_matching_ack_resends_in_full():
+    state = {}
+    cr.delta(state, {'p': 1}, ack=None)
+    cr.delta(state, {'p': 2}, ack=1)
+    # The client never applied seq 2
+    third = cr.delta(state, {'p': 2}, ack=1)
+    assert third == {'p': 2, 'n': 3, 'f': True}
+
+
+def test_encode_round_trip():
+    msgpack = pytest.importorskip("msgpack")
+    payload = cr.delta({}, cr.compact({"person_count": 0, "objects": []}, PROHIBITED), None)
+    assert msgpack.unpackb(cr.encode(payload), raw=False) == payload
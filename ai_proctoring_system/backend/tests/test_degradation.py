@@ -0,0 +1,59 @@
+import time
+
+from degradation import DegradationController
+
+LEVELS = [{"name": "full"}, {"name": "reduced"}, {"name": "sampled"}]
+
+
+def controller(**kwargs):
+    opts = dict(high_depth=3, low_depth=1, degrade_hold=0.0, recover_hold=0.0)
+    opts.update(kwargs)
+    return DegradationController(LEVELS, **opts)
+
+
+def test_depth_over_high_degrades_one_level_per_evaluation_and_stops_at_the_bottom():
+    c = controller()
+    tokens = [c.enter() for _ in range(4)]
+    assert c.level == 1                     # the 4th request crossed high_depth
+    for _ in range(5):
+        tokens.append(c.enter())
+    assert c.level == len(LEVELS) - 1
+    assert c.current()["name"] == "sampled"
+
+
+def test_degrade_hold_limits_steps():
+    c = controller(degrade_hold=60.0)
+    c._changed_at = 0                       # long enough ago for the first step
+    for _ in range(10):
+        c.enter()
+    assert c.level == 1
+    assert c.transitions == 1
+
+
+def test_between_thresholds_the_level_holds():
+    c = controller()
+    tokens = [c.enter() for _ in range(4)]
+    assert c.level == 1
+    c.exit(tokens.pop())                    # 3 in flight: neither overloaded nor calm
+    c.exit(tokens.pop())                    # 2 in flight
+    assert c.level == 1
+
+
+def test_calm_recovers_after_the_hold():
+    c = controller(recover_hold=30.0)
+    tokens = [c.enter() for _ in range(4)]
+    while tokens:
+        c.exit(tokens.pop())
+    assert c.level == 1                     # calm, but not for recover_hold yet
+    c._calm_since = c._changed_at = time.time() - 31
+    c.enter()
+    assert c.level == 0
+
+
+def test_high_p95_latency_degrades():
+    c = controller()
+    now = time.time()
+    c._samples.extend((now, 5.0) for _ in range(10))
+    c._changed_at = now - 1
+    c._evaluate(now)
+    assert c.level == 1
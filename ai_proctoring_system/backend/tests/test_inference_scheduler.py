@@ -0,0 +1,81 @@
+import threading
+import time
+
+from inference_scheduler import InferenceScheduler
+
+
+def test_classify():
+    klass, urgency = InferenceScheduler.classify(no_face_remaining=2, timeout=10, risk=0, staleness=0)
+    assert klass == 'critical' and abs(urgency - 0.4) < 1e-9
+    assert InferenceScheduler.classify(10, 10, 80, 0)[0] == 'critical'
+    assert InferenceScheduler.classify(10, 10, 50, 0)[0] == 'elevated'
+    assert InferenceScheduler.classify(4, 10, 0, 0)[0] == 'elevated'
+    assert InferenceScheduler.classify(10, 10, 0, 30) == ('normal', 0.2)
+
+
+def queue_waiters(sched, waiters, order):
+    """Start one thread per (name, exam, class, urgency) and wait until all are queued."""
+    threads = []
+    for name, exam, klass, urgency in waiters:
+        def run(name=name, exam=exam, klass=klass, urgency=urgency):
+            if sched.acquire(exam, klass, urgency, timeout=5.0):
+                order.append(name)
+                sched.release()
+        t = threading.Thread(target=run)
+        t.start()
+        threads.append(t)
+        deadline = time.monotonic() + 2.0
+        while len(sched._waiting) < len(threads):
+            assert time.monotonic() < deadline
+            time.sleep(0.002)
+    return threads
+
+
+def test_waiters_are_granted_by_class_then_urgency():
+    sched = InferenceScheduler(slots=1)
+    assert sched.acquire("e", 'normal', 0.0)
+    order = []
+    threads = queue_waiters(sched, [("normal", "e", 'normal', 0.9), ("elevated", "e", 'elevated', 0.1),
+                                    ("critical-low", "e", 'critical', 0.2), ("critical-high", "e", 'critical', 0.8)],
+                            order)
+    sched.release()
+    for t in threads:
+        t.join(5.0)
+    assert order == ["critical-high", "critical-low", "elevated", "normal"]
+    assert sched.stats()["in_flight"] == 0
+
+
+def test_exam_over_quota_yields_to_in_quota_exam():
+    sched = InferenceScheduler(slots=1, burst_seconds=2.0, min_rate=0.5)   # one token per exam
+    assert sched.acquire("busy", 'normal', 0.0)                             # spends busy's token
+    order = []
+    threads = queue_waiters(sched, [("busy-critical", "busy", 'critical', 1.0),
+                                    ("other-normal", "other", 'normal', 0.0)], order)
+    sched.release()
+    for t in threads:
+        t.join(5.0)
+    # Work-conserving: the over-quota exam still runs, just after the in-quota one
+    assert order == ["other-normal", "busy-critical"]
+    assert sched.granted["over_quota"] >= 1
+
+
+def test_acquire_times_out():
+    sched = InferenceScheduler(slots=1)
+    assert sched.acquire("e", 'normal', 0.0)
+    assert sched.acquire("e", 'critical', 1.0, timeout=0.05) is False
+    assert sched._waiting == []
+    sched.release()
+    assert sched.acquire("e", 'normal', 0.0)
+
+
+def test_stats_is_read_only_and_release_prunes_idle_exams():
+    sched = InferenceScheduler(slots=1, max_exams=2)
+    for exam in ("a", "b"):
+        assert sched.acquire(exam, 'normal', 0.0)
+        sched.release()
+    assert sched.acquire("c", 'normal', 0.0)
+    # Over max_exams, but stats() only reports
+    assert set(sched.stats()["exams"]) == {"a", "b", "c"}
+    assert set(sched.stats()["exams"]) == {"a", "b", "c"}
+    sched.release()
+    assert sched.stats()["exams"] == {}
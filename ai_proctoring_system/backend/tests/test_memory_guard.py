@@ -0,0 +1,52 @@
+import memory_guard
+from memory_guard import MemoryGuard, deep_size
+
+
+def sessions(store):
+    return [(key, seen, {"state": size}) for key, (seen, size) in store.items()]
+
+
+def test_deep_size_counts_nested_containers():
+    flat = deep_size([])
+    assert deep_size([b"x" * 1000]) > flat + 1000
+    assert deep_size({"a": [b"x" * 1000]}) > 1000
+
+
+def test_evicts_oldest_idle_sessions_until_under_target(monkeypatch):
+    monkeypatch.setattr(memory_guard, 'rss_bytes', lambda: 1200)
+    guard = MemoryGuard(limit_bytes=1000, target=0.85, min_idle=60)
+    store = {f"s{i}": (i, 100) for i in range(8)}
+    store["active"] = (990, 5000)
+    evicted = []
+
+    def evict(keys):
+        evicted.extend(keys)
+        for k in keys:
+            store.pop(k)
+
+    report = guard.check(sessions(store), evict, now=1000)
+    # 1200 - 850 = 350 bytes to free: the four least recently seen idle sessions
+    assert evicted == ["s0", "s1", "s2", "s3"]
+    assert report["evicted"] == {"this_check": 4, "total": 4}
+
+
+def test_sticky_rss_does_not_keep_evicting(monkeypatch):
+    monkeypatch.setattr(memory_guard, 'rss_bytes', lambda: 1200)      # RSS never comes down
+    guard = MemoryGuard(limit_bytes=1000, target=0.85, min_idle=0)
+    store = {f"s{i}": (i, 100) for i in range(8)}
+
+    def evict(keys):
+        for k in keys:
+            store.pop(k)
+
+    guard.check(sessions(store), evict, now=100)
+    assert len(store) == 4
+    for _ in range(3):
+        report = guard.check(sessions(store), evict, now=100)
+        assert report["evicted"]["this_check"] == 0
+        assert report["estimated_bytes"] == 800
+    assert len(store) == 4
+
+    store.update({f"n{i}": (50, 100) for i in range(4)})           # new sessions grow accounted bytes
+    guard.check(sessions(store), evict, now=100)
+    assert len(store) < 8
@@ -0,0 +1,50 @@
+from model_registry import ModelRegistry
+
+
+class FakeModel:
+    def __init__(self, name):
+        self.name = name
+
+
+def registry():
+    r = ModelRegistry(loader=lambda paths: (FakeModel(paths["base"]), None), warmup=lambda models: None,
+                      evaluate=lambda models, frame, level: [], prohibited={'cell phone'})
+    r.load_initial({"base": "v1.pt"})
+    return r
+
+
+def shadowing(r, paths):
+    candidate = r._load(paths)
+    r.candidate, r.status = candidate, "awaiting_promote"
+    return candidate
+
+
+def test_promote_swaps_once():
+    r = registry()
+    old = r.active
+    candidate = shadowing(r, {"base": "v2.pt"})
+    assert r.promote()
+    assert r.active is candidate and old.retired and old.base is None
+    # A racing second promote (or auto-promote) must not retire the set now serving
+    assert r._swap(candidate) is False
+    assert r.promote() is False
+    assert r.active.base.name == "v2.pt"
+    assert r.swaps == 1
+
+
+def test_in_use_weights_are_freed_by_the_last_user():
+    r = registry()
+    with r.use() as models:
+        shadowing(r, {"base": "v2.pt"})
+        r.promote()
+        assert models.retired and models.base is not None   # still pinned by this request
+    assert models.base is None
+
+
+def test_abort_discards_the_candidate():
+    r = registry()
+    candidate = shadowing(r, {"base": "v2.pt"})
+    assert r.abort()
+    assert r.candidate is None and r.status == "idle" and candidate.base is None
+    assert r.active.base.name == "v1.pt"
+    assert r._swap(candidate) is False
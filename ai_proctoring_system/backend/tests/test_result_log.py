@@ -0,0 +1,54 @@
+import numpy as np
+
+from result_log import ResultLog
+
+
+def test_round_trip_across_segments(tmp_path):
+    log = ResultLog(str(tmp_path), segment_rows=3, flush_interval=0)
+    for i in range(7):
+        log.append("exam/1", f"s{i % 2}", 100.0 + i, 1, i == 3, {'cell phone': 0.62, 'chair': 0.9}, 40 + i)
+    log.close()
+
+    cols, index = log.load("exam/1")
+    assert index["exam_id"] == "exam/1"
+    assert index["segments"] == ["seg-000001", "seg-000002", "seg-000003"]
+    assert list(cols["ts"]) == [100.0 + i for i in range(7)]
+    assert list(cols["session"]) == [0, 1, 0, 1, 0, 1, 0]
+    assert list(cols["movement"]) == [0, 0, 0, 1, 0, 0, 0]
+    assert list(cols["risk"]) == list(range(40, 47))
+    assert set(cols["conf"][:, log.class_index('cell phone')]) == {62}
+    assert cols["conf"].sum() == 62 * 7                # unknown labels are not stored
+
+
+def test_writers_sharing_a_root_merge_the_index(tmp_path):
+    a = ResultLog(str(tmp_path), flush_interval=0)
+    b = ResultLog(str(tmp_path), flush_interval=0)
+    a.append("e", "s1", 1.0, 1, False, {}, 0)
+    b.append("e", "s2", 2.0, 1, False, {}, 0)
+    a.append("e", "s3", 3.0, 1, False, {}, 0)
+    b.append("e", "s1", 4.0, 1, False, {}, 0)
+    a.close()
+    b.close()
+
+    cols, index = a.load("e")
+    assert index["sessions"] == {"s1": 0, "s2": 1, "s3": 2}
+    assert len(index["segments"]) == 2
+    names = {sid: name for name, sid in index["sessions"].items()}
+    rows = sorted((float(t), names[int(s)]) for t, s in zip(cols["ts"], cols["session"]))
+    assert rows == [(1.0, "s1"), (2.0, "s2"), (3.0, "s3"), (4.0, "s1")]
+
+
+def test_sustained_runs(tmp_path):
+    log = ResultLog(str(tmp_path), flush_interval=0)
+    phone = {'cell phone': 0.8}
+    for t in range(0, 10):                             # s1: phone for 9 s straight
+        log.append("e", "s1", float(t), 1, False, phone, 60)
+    for t in (0, 1, 2, 20, 21):                        # s2: two short runs split by a gap
+        log.append("e", "s2", float(t), 1, False, phone, 60)
+    log.flush()
+
+    idx = log.class_index('cell phone')
+    runs = log.sustained("e", lambda c: c['conf'][:, idx] > 50, min_seconds=5, max_gap=6.0)
+    assert [(r["session"], r["seconds"], r["frames"]) for r in runs] == [("s1", 9.0, 10)]
+    assert log.sustained("missing", lambda c: np.ones(len(c['ts']), bool), 1) == []
+    log.close()
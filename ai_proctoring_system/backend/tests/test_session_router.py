@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("flask")
+pytest.importorskip("flask_cors")
+
+from session_router import HashRing, SessionRouter  # noqa: E402
+
+NODES = [f"http://127.0.0.1:{5011 + i}" for i in range(3)]
+KEYS = [f"student{i}:exam" for i in range(2000)]
+
+
+def test_ring_is_deterministic_and_spreads_keys():
+    ring = HashRing(NODES, vnodes=100)
+    owners = [ring.node_for(k) for k in KEYS]
+    assert owners == [HashRing(reversed(NODES), vnodes=100).node_for(k) for k in KEYS]
+    counts = {n: owners.count(n) for n in NODES}
+    assert min(counts.values()) > len(KEYS) / len(NODES) * 0.6
+    assert HashRing([]).node_for("x") is None
+
+
+def test_adding_a_node_only_moves_keys_onto_it():
+    old = HashRing(NODES)
+    new = old.with_nodes(NODES + ["http://127.0.0.1:5099"])
+    moved = [k for k in KEYS if old.node_for(k) != new.node_for(k)]
+    assert moved
+    assert all(new.node_for(k) == "http://127.0.0.1:5099" for k in moved)
+    assert len(moved) < len(KEYS) / 2
+
+
+def test_removing_a_node_only_moves_its_keys():
+    old = HashRing(NODES)
+    new = old.with_nodes(NODES[1:])
+    for k in KEYS:
+        if old.node_for(k) != NODES[0]:
+            assert new.node_for(k) == old.node_for(k)
+
+
+def test_begin_refuses_a_session_whose_migration_outlasts_the_wait():
+    router = SessionRouter(NODES, move_wait=0.05)
+    router._moving["s"] = threading.Event()
+    assert router.begin("s") == (False, None)
+    assert "s" not in router._inflight
+
+    router._moving.pop("s").set()
+    pinned, node = router.begin("s")
+    assert pinned and node == router.ring.node_for("s")
+    router.end("s")
+    assert router._inflight == {}
@@ -0,0 +1,69 @@
+import random
+
+from timer_wheel import TimerWheel
+
+
+class Clock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def wheel(**kwargs):
+    clock = Clock()
+    return TimerWheel(on_expire=lambda keys: None, tick=1.0, clock=clock, **kwargs), clock
+
+
+def test_expires_on_the_deadline_tick():
+    w, clock = wheel()
+    w.arm("a", 5)
+    assert w.advance(5.0) == []
+    assert w.advance(6.0) == ["a"]
+    assert len(w) == 0
+
+
+def test_rearm_and_cancel():
+    w, clock = wheel()
+    w.arm("a", 5)
+    w.arm("b", 5)
+    clock.now = 3.0
+    w.arm("a", 5)                        # face seen again: pushed back
+    w.cancel("b")
+    assert w.advance(6.0) == []
+    assert w.advance(9.0) == ["a"]
+
+
+def test_cascades_through_levels():
+    w, clock = wheel(slots=4, levels=3)
+    due = {"near": 2, "mid": 9, "far": 40, "beyond": 100}      # top level covers 64 ticks
+    for key, seconds in due.items():
+        w.arm(key, seconds)
+    fired = {}
+    for t in range(1, 120):
+        for key in w.advance(float(t)):
+            fired[key] = t
+    assert fired == {key: seconds + 1 for key, seconds in due.items()}
+
+
+def test_matches_brute_force():
+    rng = random.Random(7)
+    w, clock = wheel(slots=8, levels=2)
+    deadlines = {}
+    for step in range(400):
+        clock.now = float(step)
+        for _ in range(rng.randint(0, 3)):
+            key = rng.randrange(50)
+            if rng.random() < 0.2:
+                w.cancel(key)
+                deadlines.pop(key, None)
+            else:
+                seconds = rng.uniform(0, 150)
+                w.arm(key, seconds)
+                deadlines[key] = int(clock.now + seconds) + 1
+        expired = w.advance(float(step + 1))
+        expected = sorted(k for k, d in deadlines.items() if d <= step + 1)
+        assert sorted(expired) == expected
+        for k in expected:
+            del deadlines[k]
@@ -0,0 +1,87 @@
+from tracking import SessionTracker, iou, new_tracked
+
+
+def det(name, box, conf=0.9):
+    return {"name": name, "accuracy": conf, "box": box}
+
+
+def tracker(**kwargs):
+    return SessionTracker({'person': 0.75, '*': 0.15}, **kwargs)
+
+
+def test_iou():
+    assert iou([0, 0, 10, 10], [0, 0, 10, 10]) == 1.0
+    assert iou([0, 0, 10, 10], [20, 20, 30, 30]) == 0.0
+    assert abs(iou([0, 0, 10, 10], [5, 0, 15, 10]) - 1 / 3) < 1e-9
+
+
+def test_matching_keeps_ids_and_only_within_a_label():
+    t = tracker()
+    first = [det("person", [0, 0, 100, 200]), det("cell phone", [150, 150, 170, 190])]
+    created = t.update(first, 0.0, (640, 480))
+    assert [c.id for c in created] == [1, 2]
+
+    second = [det("cell phone", [152, 151, 172, 191]), det("person", [4, 2, 104, 202]),
+              det("book", [0, 0, 100, 200])]       # overlaps the person, different label
+    created = t.update(second, 1.0)
+    assert [d["track"] for d in second] == [2, 1, 3]
+    assert [c.id for c in created] == [3]
+
+
+def test_unmatched_tracks_expire_after_max_misses():
+    t = tracker(max_misses=1)
+    t.update([det("cell phone", [0, 0, 10, 10])], 0.0)
+    t.update([], 1.0)
+    assert len(t.tracks) == 1
+    t.update([], 2.0)
+    assert t.tracks == []
+
+
+def test_max_tracks_keeps_the_most_confident():
+    t = tracker(max_tracks=2)
+    dets = [det("book", [i * 50, 0, i * 50 + 20, 20], conf) for i, conf in enumerate((0.3, 0.9, 0.6))]
+    created = t.update(dets, 0.0)
+    assert sorted(tr.conf for tr in t.tracks) == [0.6, 0.9]
+    assert len(created) == 2
+
+
+def test_predict_propagates_velocity():
+    t = tracker(detect_every=10)
+    t.update([det("cell phone", [0, 0, 10, 10])], 0.0, (640, 480))
+    t.update([det("cell phone", [5, 0, 15, 10])], 1.0)
+    (obj,) = t.predict(2.0)
+    assert obj["predicted"] and obj["track"] == 1
+    assert obj["box"][0] > 5                      # moved on in the direction of travel
+
+
+def test_decayed_tracks_are_dropped_and_force_detection():
+    t = tracker(detect_every=100, decay=0.9)
+    t.update([det("person", [0, 0, 100, 200], 0.8)], 0.0, (640, 480))
+    assert t.should_detect(0.0)                     # 0.8 * 0.9 < 0.75: re-detect rather than trust it
+    assert t.predict(1.0) == []                     # and a propagated copy no longer counts
+    assert t.tracks == []
+
+
+def test_should_detect_on_cadence_and_motion():
+    t = tracker(detect_every=3, redetect_motion=0.05)
+    assert t.should_detect(None)                    # no tracks yet
+    t.update([det("cell phone", [0, 0, 10, 10])], 0.0, (640, 480))
+    assert not t.should_detect(0.01)
+    assert t.should_detect(0.2)
+    t.predict(0.1)
+    assert not t.should_detect(0.01)
+    t.predict(0.2)
+    assert t.should_detect(0.01)                    # third frame since the last detection
+
+
+def test_new_tracked_reports_every_new_prohibited_object():
+    t = tracker()
+    t.update([det("book", [300, 300, 360, 380])], 0.0, (640, 480))
+    frame = [det("cell phone", [10, 10, 30, 50]), det("book", [302, 301, 362, 381]),
+             det("person", [100, 0, 200, 300])]
+    created = t.update(frame, 1.0)
+    new_ids = {c.id for c in created}
+    # The phone comes before the already-tracked book, so a last-object summary would miss it
+    found = new_tracked(frame, new_ids, {"cell phone", "book"}, 0.5)
+    assert [o["name"] for o in found] == ["cell phone"]
+    assert new_tracked(frame, new_ids, {"cell phone", "book"}, 0.95) == []
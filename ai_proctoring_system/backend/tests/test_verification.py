@@ -0,0 +1,70 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from verification import ClientVerifier, average_hash  # noqa: E402
+
+PROHIBITED = {'cell phone', 'book'}
+
+
+class FixedRandom:
+    def __init__(self, value):
+        self.value = value
+
+    def random(self):
+        return self.value
+
+
+def frame():
+    img = np.zeros((120, 160, 3), dtype=np.uint8)
+    img[:, :80] = 255
+    return img
+
+
+def report(faces=1, objects=()):
+    return {"faces": faces, "objects": [{"name": n, "confidence": 0.7} for n in objects]}
+
+
+def test_decide_trusts_a_plain_report_unless_sampled():
+    v = ClientVerifier(PROHIBITED, base_rate=0.2, rng=FixedRandom(0.99))
+    vstate = {"last_verified": 1000.0}
+    assert v.decide(vstate, report(), "00ff00ff00ff00ff", now=1001.0) == (False, "trusted")
+    assert v.decide(vstate, report(), "00ff00ff00ff00ff", now=1002.0) == (True, "repeated_hash")
+    assert v.decide(vstate, {"faces": "1"}, "0" * 16, now=1003.0) == (True, "invalid_report")
+    assert v.decide(vstate, report(), "1" * 16, now=1100.0) == (True, "stale")
+    sampled = ClientVerifier(PROHIBITED, base_rate=0.2, rng=FixedRandom(0.1))
+    assert sampled.decide({"last_verified": 1000.0}, report(), "2" * 16, now=1001.0) == (True, "sampled")
+
+
+def test_check_flags_each_kind_of_disagreement():
+    v = ClientVerifier(PROHIBITED, strike_limit=10)
+    img = frame()
+    good = average_hash(img)
+    assert v.check({}, report(), good, img, 1, ['person']) == []
+    assert v.check({}, report(), good, img, 2, ['person', 'person']) == ["persons_hidden"]
+    assert v.check({}, report(faces=1), good, img, 0, []) == ["faces_claimed"]
+    assert v.check({}, report(), good, img, 1, ['person', 'cell phone']) == ["objects_hidden"]
+    assert v.check({}, report(objects=['cell phone']), good, img, 1, ['cell phone']) == []
+    flipped = f"{int(good, 16) ^ (2 ** 64 - 1):016x}"
+    assert v.check({}, report(), flipped, img, 1, []) == ["hash_mismatch"]
+
+
+def test_strikes_escalate_to_full_inference():
+    v = ClientVerifier(PROHIBITED, strike_limit=2, strike_window=300, escalate_seconds=600)
+    img, vstate = frame(), {}
+    v.check(vstate, report(), average_hash(img), img, 0, [], now=1000.0)
+    assert vstate.get("escalated_until", 0) <= 1000.0
+    v.check(vstate, report(), average_hash(img), img, 0, [], now=1010.0)
+    assert vstate["escalated_until"] == 1610.0
+    assert v.decide(vstate, report(), "3" * 16, now=1020.0) == (True, "escalated")
+    assert v.stats()["escalations"] == 1
+
+
+def test_detections_have_no_empty_boxes():
+    v = ClientVerifier(PROHIBITED)
+    objects = v.detections({"faces": 1, "objects": [{"name": "cell phone", "confidence": 0.7, "box": [1, 2, 3, 4]},
+                                                    {"name": "book", "box": []}]})
+    assert objects == [{"name": "person", "accuracy": 1.0},
+                       {"name": "cell phone", "accuracy": 0.7, "box": [1, 2, 3, 4]},
+                       {"name": "book", "accuracy": 1.0}]
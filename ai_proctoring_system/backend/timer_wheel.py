@@ -0,0 +1,112 @@
+"""
+Hierarchical timer wheel for per-session deadlines (the no-face timeout).
+
+Every session holds one deadline. arm() (called on each face-present frame)
+moves the session's key from one slot set to another: O(1) regardless of how
+many sessions exist. A single thread advances the wheel every `tick` seconds;
+level 0 has `slots` buckets of one tick each, and each higher level covers
+`slots` times the span of the one below, cascading down as time approaches.
+Idle ticks touch one empty set, so 100k armed sessions cost nothing until
+they expire.
+
+Everything that expires within one tick is handed to `on_expire` as a single
+batch, outside the wheel's lock.
+"""
+import threading
+import time
+
+
+class TimerWheel:
+    def __init__(self, on_expire, tick=0.5, slots=64, levels=3, clock=time.monotonic):
+        self.on_expire = on_expire
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.clock = clock
+        self._wheels = [[set() for _ in range(slots)] for _ in range(levels)]
+        self._where = {}                  # key → (due_tick, level, slot)
+        self._current = int(clock() / tick)
+        self._lock = threading.Lock()
+        self.fired = 0
+        self.batches = 0
+
+    # ─── Arm / cancel ───────────────────────────────────────────────────────
+    def _place(self, key, due):
+        level = 0
+        span = 1
+        while level < self.levels - 1 and due // span - self._current // span >= self.slots:
+            level += 1
+            span *= self.slots
+        # Beyond the top level's range: park in its furthest slot and re-cascade from there
+        if due // span - self._current // span >= self.slots:
+            slot = (self._current // span + self.slots - 1) % self.slots
+        else:
+            slot = (due // span) % self.slots
+        self._wheels[level][slot].add(key)
+        self._where[key] = (due, level, slot)
+
+    def arm(self, key, seconds):
+        """(Re)set `key` to expire `seconds` from now."""
+        due = int((self.clock() + seconds) / self.tick) + 1
+        with self._lock:
+            old = self._where.get(key)
+            if old:
+                self._wheels[old[1]][old[2]].discard(key)
+            self._place(key, max(due, self._current + 1))
+
+    def cancel(self, key):
+        with self._lock:
+            old = self._where.pop(key, None)
+            if old:
+                self._wheels[old[1]][old[2]].discard(key)
+
+    def __len__(self):
+        return len(self._where)
+
+    # ─── Advance ────────────────────────────────────────────────────────────
+    def advance(self, now=None):
+        """Move the wheel up to `now`; returns the keys that expired."""
+        target = int((now if now is not None else self.clock()) / self.tick)
+        expired = []
+        with self._lock:
+            while self._current < target:
+                self._current += 1
+                # Cascade higher levels whose bucket boundary we just crossed, top first
+                span = self.slots ** (self.levels - 1)
+                for level in range(self.levels - 1, 0, -1):
+                    if self._current % span == 0:
+                        bucket = self._wheels[level][(self._current // span) % self.slots]
+                        moving = list(bucket)
+                        bucket.clear()
+                        for key in moving:
+                            self._place(key, self._where[key][0])
+                    span //= self.slots
+                bucket = self._wheels[0][self._current % self.slots]
+                for key in list(bucket):
+                    if self._where[key][0] <= self._current:
+                        bucket.discard(key)
+                        del self._where[key]
+                        expired.append(key)
+        return expired
+
+    def run(self):
+        """Tick forever, dispatching each tick's expirations as one batch."""
+        while True:
+            time.sleep(self.tick)
+            expired = self.advance()
+            if not expired:
+                continue
+            self.fired += len(expired)
+            self.batches += 1
+            try:
+                self.on_expire(expired)
+            except Exception as e:
+                print(f"⚠️ Timer expiry handler failed: {e}")
+
+    def start(self):
+        threading.Thread(target=self.run, name='timer-wheel', daemon=True).start()
+        return self
+
+    def stats(self):
+        return {"armed": len(self._where), "fired": self.fired, "batches": self.batches,
+                "tick": self.tick, "range_seconds": self.tick * self.slots ** self.levels}
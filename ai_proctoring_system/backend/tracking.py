@@ -0,0 +1,173 @@
+"""
+Per-session detect-and-track for the detect endpoint.
+
+Full detection runs every `detect_every` frames; frames in between propagate
+the existing tracks with a constant-velocity model instead of running YOLO.
+Detection runs early when the frame changed a lot, when a track's decayed
+confidence falls below its threshold or when a track drifts out of frame; a
+track that decays below its threshold without being re-detected (e.g. no
+inference slot in time) is dropped rather than propagated forever.
+
+Detections are matched to tracks greedily by IoU (same label only), so an
+object keeps its track id across frames and the backend can record one
+violation per object instead of one per frame. A session holds at most
+`max_tracks` tracks and a track survives `max_misses` detection rounds without
+a match, which keeps memory and matching cost per session bounded.
+"""
+
+
+def new_tracked(objects, new_tracks, labels, min_conf):
+    """Objects of `labels` (at >= min_conf) whose track was created in this detection round."""
+    return [o for o in objects
+            if o["name"] in labels and o["accuracy"] >= min_conf and o.get("track") in new_tracks]
+
+
+def iou(a, b):
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, ix2 - ix1) * max(0.0, iy2 - iy1)
+    if inter <= 0:
+        return 0.0
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+class Track:
+    __slots__ = ('id', 'label', 'conf', 'box', 'vx', 'vy', 'updated', 'misses', 'age')
+
+    def __init__(self, track_id, label, conf, box, now):
+        self.id = track_id
+        self.label = label
+        self.conf = conf
+        self.box = [float(v) for v in box]
+        self.vx = self.vy = 0.0       # centre velocity, px/s
+        self.updated = now
+        self.misses = 0
+        self.age = 0                  # frames predicted since the last match
+
+    def predicted_box(self, now):
+        dt = now - self.updated
+        dx, dy = self.vx * dt, self.vy * dt
+        x1, y1, x2, y2 = self.box
+        return [x1 + dx, y1 + dy, x2 + dx, y2 + dy]
+
+    def correct(self, conf, box, now, smoothing=0.5):
+        dt = now - self.updated
+        if dt > 0:
+            cx_old, cy_old = (self.box[0] + self.box[2]) / 2, (self.box[1] + self.box[3]) / 2
+            cx_new, cy_new = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+            self.vx = smoothing * self.vx + (1 - smoothing) * (cx_new - cx_old) / dt
+            self.vy = smoothing * self.vy + (1 - smoothing) * (cy_new - cy_old) / dt
+        self.box = [float(v) for v in box]
+        self.conf = conf
+        self.updated = now
+        self.misses = 0
+        self.age = 0
+
+
+class SessionTracker:
+    def __init__(self, thresholds, detect_every=3, match_iou=0.3, max_tracks=16, max_misses=2,
+                 decay=0.9, redetect_motion=0.05):
+        self.thresholds = thresholds      # label → min confidence for a track to count
+        self.detect_every = max(1, detect_every)
+        self.match_iou = match_iou
+        self.max_tracks = max_tracks
+        self.max_misses = max_misses
+        self.decay = decay
+        self.redetect_motion = redetect_motion
+
+        self.tracks = []
+        self.next_id = 1
+        self.since_detect = 0
+        self.frame_size = None
+
+    def _threshold(self, label):
+        return self.thresholds.get(label, self.thresholds.get('*', 0.0))
+
+    def should_detect(self, changed):
+        """Decide before running models whether this frame needs full detection."""
+        if self.since_detect + 1 >= self.detect_every or not self.tracks:
+            return True
+        if changed is not None and changed > self.redetect_motion:
+            return True
+        for t in self.tracks:
+            if t.misses == 0 and t.conf * self.decay ** (t.age + 1) < self._threshold(t.label):
+                return True
+        return False
+
+    def update(self, detections, now, frame_size=None):
+        """
+        Full-detection frame: match [{"name", "accuracy", "box"}] to tracks.
+        Annotates each matched detection with "track" and returns the tracks created now.
+        """
+        self.since_detect = 0
+        self.frame_size = frame_size or self.frame_size
+
+        pairs = []
+        for di, det in enumerate(detections):
+            for ti, t in enumerate(self.tracks):
+                if t.label == det["name"]:
+                    overlap = iou(t.predicted_box(now), det["box"])
+                    if overlap >= self.match_iou:
+                        pairs.append((overlap, di, ti))
+        pairs.sort(reverse=True)
+
+        used_d, used_t = set(), set()
+        for _, di, ti in pairs:
+            if di in used_d or ti in used_t:
+                continue
+            used_d.add(di)
+            used_t.add(ti)
+            det = detections[di]
+            self.tracks[ti].correct(det["accuracy"], det["box"], now)
+            det["track"] = self.tracks[ti].id
+
+        for ti, t in enumerate(self.tracks):
+            if ti not in used_t:
+                t.misses += 1
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+
+        created = []
+        for di, det in enumerate(detections):
+            if di in used_d:
+                continue
+            t = Track(self.next_id, det["name"], det["accuracy"], det["box"], now)
+            self.next_id += 1
+            det["track"] = t.id
+            created.append(t)
+        self.tracks.extend(created)
+
+        if len(self.tracks) > self.max_tracks:
+            # Keep the currently visible, most confident tracks
+            self.tracks.sort(key=lambda t: (t.misses, -t.conf))
+            del self.tracks[self.max_tracks:]
+            kept = {id(t) for t in self.tracks}
+            created = [t for t in created if id(t) in kept]
+        return created
+
+    def predict(self, now):
+        """In-between frame: propagated boxes of visible tracks as detection dicts."""
+        self.since_detect += 1
+        objects = []
+        expired = []
+        w, h = self.frame_size or (None, None)
+        for t in self.tracks:
+            if t.misses:
+                continue
+            t.age += 1
+            conf = t.conf * self.decay ** t.age
+            if conf < self._threshold(t.label):
+                # Decayed below its threshold without a fresh detection: the track is gone
+                expired.append(t)
+                self.since_detect = self.detect_every
+                continue
+            x1, y1, x2, y2 = t.predicted_box(now)
+            if w and (x2 < 0 or y2 < 0 or x1 > w or y1 > h):
+                self.since_detect = self.detect_every   # drifted away: detect next frame
+                continue
+            objects.append({"name": t.label, "accuracy": round(conf, 2),
+                            "box": [round(x1), round(y1), round(x2), round(y2)],
+                            "track": t.id, "predicted": True})
+        if expired:
+            self.tracks = [t for t in self.tracks if t not in expired]
+        return objects
@@ -0,0 +1,152 @@
+"""
+Client-report verification for /proctor/detect.
+
+Clients that already run detection locally (MediaPipe faces, head pose, in-
+browser objects) send their findings with each frame:
+
+    "client_report": {"faces": 1, "head_pose": {"yaw": 4.2, "pitch": -3.0},
+                      "objects": [{"name": "cell phone", "confidence": 0.71}]},
+    "frame_hash": "c3e1f0f8f0e0c0c0"     # 64-bit average hash of the frame, hex
+
+Most frames are answered from the report without running YOLO. A risk-weighted
+random sample (plus any frame that looks off: bad report, repeated hash, long
+time since the last check) gets full server inference, and the report is
+compared with the server's result. A report about a different image (hash
+mismatch), one that hides persons/objects the server sees or one that claims
+faces the server does not see is a strike; too
+many strikes escalate the session to full inference for a while.
+
+Per-session verification state is a plain dict kept in the backend's session
+state, so it is dropped together with the session.
+"""
+import random
+import time
+from collections import deque
+
+import cv2
+
+
+def average_hash(frame):
+    """8x8 average hash of a BGR frame as 16 hex chars (what the client computes)."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (8, 8), interpolation=cv2.INTER_AREA)
+    bits = (small > small.mean()).flatten()
+    return f"{int(''.join('1' if b else '0' for b in bits), 2):016x}"
+
+
+def hamming(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+def valid_report(report, frame_hash):
+    if not isinstance(report, dict) or not isinstance(frame_hash, str) or len(frame_hash) != 16:
+        return False
+    try:
+        int(frame_hash, 16)
+    except ValueError:
+        return False
+    faces = report.get('faces')
+    objects = report.get('objects', [])
+    return (isinstance(faces, int) and 0 <= faces < 20 and isinstance(objects, list)
+            and all(isinstance(o, dict) and isinstance(o.get('name'), str) for o in objects))
+
+
+class ClientVerifier:
+    def __init__(self, prohibited, base_rate=0.2, risk_rate=0.6, max_unverified=30.0,
+                 hash_tolerance=10, strike_limit=2, strike_window=300.0, escalate_seconds=600.0,
+                 yaw_warn=45, pitch_warn=35, rng=None):
+        self.prohibited = prohibited
+        self.base_rate = base_rate
+        self.risk_rate = risk_rate
+        self.max_unverified = max_unverified
+        self.hash_tolerance = hash_tolerance
+        self.strike_limit = strike_limit
+        self.strike_window = strike_window
+        self.escalate_seconds = escalate_seconds
+        self.yaw_warn = yaw_warn
+        self.pitch_warn = pitch_warn
+        self.rng = rng or random.Random()
+        self.counts = {"trusted": 0, "verified": 0, "agreed": 0, "strikes": 0, "escalations": 0}
+
+    def report_risk(self, report):
+        """0..1: how much a wrong answer for this report would matter."""
+        if report.get('faces') != 1:
+            return 1.0
+        if any(o['name'] in self.prohibited for o in report.get('objects', [])):
+            return 1.0
+        pose = report.get('head_pose') or {}
+        if abs(pose.get('yaw', 0)) > self.yaw_warn or abs(pose.get('pitch', 0)) > self.pitch_warn:
+            return 0.5
+        return 0.0
+
+    def decide(self, vstate, report, frame_hash, now=None):
+        """Before any decode → (run_server_inference, reason)."""
+        now = now or time.time()
+        hashes = vstate.setdefault("hashes", deque(maxlen=5))
+        last_verified = vstate.setdefault("last_verified", 0.0)
+        try:
+            if vstate.get("escalated_until", 0) > now:
+                return True, "escalated"
+            if not valid_report(report, frame_hash):
+                return True, "invalid_report"
+            if now - last_verified > self.max_unverified:
+                return True, "stale"
+            if frame_hash in hashes:
+                return True, "repeated_hash"     # frozen or replayed feed
+            if self.rng.random() < self.base_rate + self.risk_rate * self.report_risk(report):
+                return True, "sampled"
+            self.counts["trusted"] += 1
+            return False, "trusted"
+        finally:
+            if isinstance(frame_hash, str):
+                hashes.append(frame_hash)
+
+    def check(self, vstate, report, frame_hash, frame, person_count, labels, now=None):
+        """After server inference: compare with the report, record strikes. Returns disagreements."""
+        now = now or time.time()
+        vstate["last_verified"] = now
+        self.counts["verified"] += 1
+        if not valid_report(report, frame_hash):
+            problems = ["invalid_report"]
+        else:
+            problems = []
+            if hamming(average_hash(frame), frame_hash) > self.hash_tolerance:
+                problems.append("hash_mismatch")
+            if person_count > max(1, report['faces']):
+                problems.append("persons_hidden")
+            if report['faces'] > person_count:
+                problems.append("faces_claimed")     # e.g. a client that always sends faces: 1
+            client_labels = {o['name'] for o in report.get('objects', [])}
+            if any(l in self.prohibited and l not in client_labels for l in labels):
+                problems.append("objects_hidden")
+
+        if not problems:
+            self.counts["agreed"] += 1
+            return problems
+
+        strikes = vstate.setdefault("strikes", deque())
+        strikes.append(now)
+        while strikes and now - strikes[0] > self.strike_window:
+            strikes.popleft()
+        self.counts["strikes"] += 1
+        if len(strikes) >= self.strike_limit and vstate.get("escalated_until", 0) <= now:
+            vstate["escalated_until"] = now + self.escalate_seconds
+            self.counts["escalations"] += 1
+            print(f"🚩 Client reports failed verification ({', '.join(problems)}) — full inference for "
+                  f"{int(self.escalate_seconds)}s")
+        return problems
+
+    def detections(self, report):
+        """Client report → detections in the backend's own object format."""
+        # Faces come without a box; an object carries one only if the client sent a usable one
+        objects = [{"name": "person", "accuracy": 1.0} for _ in range(report['faces'])]
+        for o in report.get('objects', []):
+            obj = {"name": o['name'], "accuracy": round(float(o.get('confidence', 1.0)), 2)}
+            box = o.get('box')
+            if isinstance(box, list) and len(box) == 4 and all(isinstance(v, (int, float)) for v in box):
+                obj["box"] = box
+            objects.append(obj)
+        return objects
+
+    def stats(self):
+        return dict(self.counts)
@@ -1,28 +1,169 @@
+"""
+Consolidate the codebase into one Markdown file.
+
+Incremental: a manifest next to the output records path/mtime/size/hash and
+where each file's section sits in the output. On later runs only new or
+changed files are read; unchanged sections are copied straight from the
+previous output. Reads run in a thread pool, the output is streamed in order,
+and binary or oversized files are skipped with a note.
+
+Usage:
+    python consolidate_code.py                    # root = this script's folder
+    python consolidate_code.py --root path/to/ai_proctoring_system --full
+"""
+import argparse
+import hashlib
+import json
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-files_to_include = []
 exclude = ['node_modules', 'dist', '.venv', 'brain', '.gemini', '__pycache__', '.git']
 extensions = ('.js', '.jsx', '.py', '.sql', '.css', '.md')
+OUTPUT_NAME = 'AI_Proctoring_System_Codebase.md'
+HEADER = "# AI Proctoring System - Full Codebase Documentation\n\n"
+MANIFEST_VERSION = 1
 
-root_dir = r'c:\Users\JEEVANESWARAN\Downloads\exam proctoring\ai_proctoring_system'
-output_file = os.path.join(root_dir, 'AI_Proctoring_System_Codebase.md')
 
-with open(output_file, 'w', encoding='utf-8') as outfile:
-    outfile.write("# AI Proctoring System - Full Codebase Documentation\n\n")
+def collect_files(root_dir, output_file):
+    """All files to include, in a stable order."""
+    skip = {os.path.abspath(output_file), os.path.abspath(__file__)}
+    found = []
     for root, dirs, files in os.walk(root_dir):
         # In-place modification of dirs to skip excluded directories
-        dirs[:] = [d for d in dirs if d not in exclude]
-        for name in files:
-            if name.endswith(extensions) and name != 'AI_Proctoring_System_Codebase.md' and name != 'consolidate_code.py':
-                path = os.path.join(root, name)
-                outfile.write(f"### File: {path}\n")
-                ext = os.path.splitext(name)[1].replace('.', '')
-                outfile.write(f"```{ext}\n")
-                try:
-                    with open(path, 'r', encoding='utf-8') as infile:
-                        outfile.write(infile.read())
-                except Exception as e:
-                    outfile.write(f"// Error reading file: {e}\n")
-                outfile.write("\n```\n\n")
-
-print(f"Documentation generated at {output_file}")
+        dirs[:] = sorted(d for d in dirs if d not in exclude)
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            if name.endswith(extensions) and os.path.abspath(path) not in skip:
+                found.append(path)
+    return found
+
+
+def render_section(path, body):
+    ext = os.path.splitext(path)[1].replace('.', '')
+    return f"### File: {path}\n```{ext}\n{body}\n```\n\n".encode('utf-8')
+
+
+def read_file(path, size, max_bytes):
+    """Read one file → (sha1, rendered section bytes, skipped?)."""
+    if size > max_bytes:
+        return None, render_section(path, f"// Skipped: file is {size} bytes (limit {max_bytes})"), True
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except Exception as e:
+        return None, render_section(path, f"// Error reading file: {e}"), True
+
+    digest = hashlib.sha1(data).hexdigest()
+    if b'\0' in data[:8192]:
+        return digest, render_section(path, "// Skipped: binary file"), True
+    try:
+        text = data.decode('utf-8')
+    except UnicodeDecodeError:
+        return digest, render_section(path, "// Skipped: not valid UTF-8 (binary?)"), True
+    return digest, render_section(path, text), False
+
+
+def load_manifest(manifest_file, output_file):
+    try:
+        with open(manifest_file, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # Only trust section offsets if the output is the one the manifest describes
+    if (manifest.get('version') != MANIFEST_VERSION or not os.path.exists(output_file)
+            or os.path.getsize(output_file) != manifest.get('output_size')):
+        return {}
+    return manifest.get('files', {})
+
+
+def consolidate(root_dir, output_file, manifest_file, workers=8, max_bytes=1024 * 1024, full=False):
+    old = {} if full else load_manifest(manifest_file, output_file)
+    paths = collect_files(root_dir, output_file)
+
+    plan = []     # (path, stat, reuse_entry or None)
+    for path in paths:
+        st = os.stat(path)
+        entry = old.get(path)
+        unchanged = entry and entry['mtime'] == st.st_mtime_ns and entry['size'] == st.st_size
+        plan.append((path, st, entry if unchanged else None))
+
+    stats = {'files': len(plan), 'reused': 0, 'read': 0, 'skipped': 0}
+    new_files = {}
+    tmp_file = output_file + '.tmp'
+    old_out = open(output_file, 'rb') if old else None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, open(tmp_file, 'wb') as out:
+        out.write(HEADER.encode('utf-8'))
+        pending = deque()
+
+        def submit(item):
+            path, st, entry = item
+            future = None if entry else pool.submit(read_file, path, st.st_size, max_bytes)
+            pending.append((path, st, entry, future))
+
+        items = iter(plan)
+        # Keep a bounded window of reads in flight so memory stays flat
+        for item in items:
+            submit(item)
+            if len(pending) >= workers * 4:
+                break
+
+        while pending:
+            path, st, entry, future = pending.popleft()
+            next_item = next(items, None)
+            if next_item is not None:
+                submit(next_item)
+
+            if future is None:
+                old_out.seek(entry['offset'])
+                section, digest, skipped = old_out.read(entry['length']), entry['sha1'], entry['skipped']
+                stats['reused'] += 1
+            else:
+                digest, section, skipped = future.result()
+                prev = old.get(path)
+                if digest and prev and prev.get('sha1') == digest and old_out is not None:
+                    # Touched but not modified: keep the existing section
+                    old_out.seek(prev['offset'])
+                    section = old_out.read(prev['length'])
+                stats['read'] += 1
+            stats['skipped'] += skipped
+
+            new_files[path] = {
+                'mtime': st.st_mtime_ns, 'size': st.st_size, 'sha1': digest,
+                'offset': out.tell(), 'length': len(section), 'skipped': skipped,
+            }
+            out.write(section)
+        output_size = out.tell()
+
+    if old_out is not None:
+        old_out.close()
+    os.replace(tmp_file, output_file)
+
+    with open(manifest_file + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'output_size': output_size, 'files': new_files}, f)
+    os.replace(manifest_file + '.tmp', manifest_file)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consolidate the codebase into one Markdown file")
+    parser.add_argument('--root', default=os.path.dirname(os.path.abspath(__file__)),
+                        help='Folder to scan (default: the folder containing this script)')
+    parser.add_argument('--output', help=f'Output file (default: <root>/{OUTPUT_NAME})')
+    parser.add_argument('--manifest', help='Manifest file (default: <output>.manifest.json)')
+    parser.add_argument('--workers', type=int, default=8, help='Parallel file reads')
+    parser.add_argument('--max-bytes', type=int, default=1024 * 1024, help='Skip files larger than this')
+    parser.add_argument('--full', action='store_true', help='Ignore the manifest and rebuild everything')
+    args = parser.parse_args()
+
+    output_file = args.output or os.path.join(args.root, OUTPUT_NAME)
+    manifest_file = args.manifest or output_file + '.manifest.json'
+    stats = consolidate(args.root, output_file, manifest_file, args.workers, args.max_bytes, args.full)
+
+    print(f"Documentation generated at {output_file}")
+    print(f"  {stats['files']} files: {stats['read']} read, {stats['reused']} reused, {stats['skipped']} skipped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+-- VIOLATION LOGS: PARTITIONING, INDEXES AND PER-EXAM ROLLUPS
+-- Run this in your Supabase SQL Editor after 00-02. Safe to run more than once.
+--
+-- violation_logs is written at frame rate by the standalone monitor and read by
+-- teacher dashboards grouped per exam and student. This script:
+--   * rebuilds violation_logs as a table partitioned by month on "timestamp"
+--     (the table's time column), with a composite (exam_id, student_id, "timestamp") index
+--   * adds violation_rollups: one row per (exam, student) with counts and max risk,
+--     kept current by a statement-level trigger, so dashboards read a few rows
+--     instead of scanning raw events
+-- Benchmark: database/benchmark_violation_logs.sql
+
+-- 1. The monitor and frontend already write risk_score; make sure the column exists
+ALTER TABLE violation_logs ADD COLUMN IF NOT EXISTS risk_score integer DEFAULT 0;
+
+-- 2. Helper that creates the monthly partition containing a given day
+CREATE OR REPLACE FUNCTION public.ensure_violation_logs_partition(day date)
+RETURNS void AS $$
+DECLARE
+    month_start date := date_trunc('month', day)::date;
+    part_name   text := 'violation_logs_' || to_char(month_start, 'YYYY_MM');
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS public.%I PARTITION OF public.violation_logs FOR VALUES FROM (%L) TO (%L)',
+        part_name, month_start, (month_start + interval '1 month')::date
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Maintenance only (migrations, pg_cron); not callable through the API roles
+REVOKE EXECUTE ON FUNCTION public.ensure_violation_logs_partition(date) FROM public, anon, authenticated;
+
+-- 3. Swap the plain table for a partitioned one (skipped if already partitioned)
+DO $$
+DECLARE
+    first_month date;
+    m date;
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = 'violation_logs' AND c.relnamespace = 'public'::regnamespace
+    ) THEN
+        RAISE NOTICE 'violation_logs is already partitioned';
+        RETURN;
+    END IF;
+
+    ALTER TABLE public.violation_logs RENAME TO violation_logs_legacy;
+    -- Index names are schema-wide; free up the primary key's name for the new table
+    ALTER INDEX IF EXISTS public.violation_logs_pkey RENAME TO violation_logs_legacy_pkey;
+
+    CREATE TABLE public.violation_logs (
+      id uuid DEFAULT uuid_generate_v4() NOT NULL,
+      exam_id uuid REFERENCES exams(id),
+      student_id uuid REFERENCES profiles(id),
+      violation_type text NOT NULL,
+      risk_score integer DEFAULT 0,
+      "timestamp" timestamp WITH time zone DEFAULT timezone('utc'::text, now()) NOT NULL,
+      snapshot_url text,
+      PRIMARY KEY (id, "timestamp")
+    ) PARTITION BY RANGE ("timestamp");
+
+    -- Catch-all so an insert never fails for a month nobody created yet
+    CREATE TABLE public.violation_logs_default PARTITION OF public.violation_logs DEFAULT;
+
+    -- Partitions for the existing data plus the next three months
+    SELECT date_trunc('month', coalesce(min("timestamp"), now()))::date
+      INTO first_month FROM public.violation_logs_legacy;
+    m := first_month;
+    WHILE m <= (date_trunc('month', now()) + interval '3 months')::date LOOP
+        PERFORM public.ensure_violation_logs_partition(m);
+        m := (m + interval '1 month')::date;
+    END LOOP;
+
+    INSERT INTO public.violation_logs (id, exam_id, student_id, violation_type, risk_score, "timestamp", snapshot_url)
+    SELECT id, exam_id, student_id, violation_type, coalesce(risk_score, 0), "timestamp", snapshot_url
+    FROM public.violation_logs_legacy;
+
+    DROP TABLE public.violation_logs_legacy;
+END $$;
+
+-- 4. Indexes (created on the parent, inherited by every partition)
+CREATE INDEX IF NOT EXISTS violation_logs_exam_student_ts_idx
+    ON violation_logs (exam_id, student_id, "timestamp");
+-- Realtime subscription in ExamPage filters on student_id
+CREATE INDEX IF NOT EXISTS violation_logs_student_ts_idx
+    ON violation_logs (student_id, "timestamp");
+
+-- 5. RLS (policies do not survive the table swap)
+ALTER TABLE violation_logs ENABLE ROW LEVEL SECURITY;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_policies WHERE tablename = 'violation_logs' AND policyname = 'Teachers and Admins can view logs') THEN
+        CREATE POLICY "Teachers and Admins can view logs" ON violation_logs FOR SELECT USING (
+            auth.uid() IN (SELECT id FROM profiles WHERE role IN ('teacher', 'admin'))
+            OR auth.uid() = student_id
+        );
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_policies WHERE tablename = 'violation_logs' AND policyname = 'Students can insert logs (system generated)') THEN
+        CREATE POLICY "Students can insert logs (system generated)" ON violation_logs FOR INSERT WITH CHECK (
+            auth.uid() = student_id
+        );
+    END IF;
+END $$;
+
+-- 6. Keep Supabase Realtime working: publish partition rows under the parent's name
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_publication WHERE pubname = 'supabase_realtime') THEN
+        ALTER PUBLICATION supabase_realtime SET (publish_via_partition_root = true);
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_publication_tables
+            WHERE pubname = 'supabase_realtime' AND schemaname = 'public' AND tablename = 'violation_logs'
+        ) THEN
+            ALTER PUBLICATION supabase_realtime ADD TABLE violation_logs;
+        END IF;
+    END IF;
+END $$;
+
+-- 7. Per-exam / per-student rollup table
+CREATE TABLE IF NOT EXISTS violation_rollups (
+  exam_id uuid NOT NULL,
+  student_id uuid NOT NULL,
+  violation_count bigint NOT NULL DEFAULT 0,
+  max_risk integer NOT NULL DEFAULT 0,
+  first_violation_at timestamp WITH time zone,
+  last_violation_at timestamp WITH time zone,
+  PRIMARY KEY (exam_id, student_id)
+);
+
+ALTER TABLE violation_rollups ENABLE ROW LEVEL SECURITY;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_policies WHERE tablename = 'violation_rollups' AND policyname = 'Teachers and Admins can view rollups') THEN
+        CREATE POLICY "Teachers and Admins can view rollups" ON violation_rollups FOR SELECT USING (
+            auth.uid() IN (SELECT id FROM profiles WHERE role IN ('teacher', 'admin'))
+            OR auth.uid() = student_id
+        );
+    END IF;
+END $$;
+
+-- 8. Incremental maintenance: one upsert per (exam, student) per INSERT statement
+CREATE OR REPLACE FUNCTION public.apply_violation_rollups()
+RETURNS trigger AS $$
+BEGIN
+  INSERT INTO public.violation_rollups AS r
+         (exam_id, student_id, violation_count, max_risk, first_violation_at, last_violation_at)
+  SELECT exam_id, student_id, count(*), max(coalesce(risk_score, 0)), min("timestamp"), max("timestamp")
+  FROM new_rows
+  WHERE exam_id IS NOT NULL AND student_id IS NOT NULL
+  GROUP BY exam_id, student_id
+  ON CONFLICT (exam_id, student_id) DO UPDATE SET
+    violation_count    = r.violation_count + excluded.violation_count,
+    max_risk           = greatest(r.max_risk, excluded.max_risk),
+    first_violation_at = least(r.first_violation_at, excluded.first_violation_at),
+    last_violation_at  = greatest(r.last_violation_at, excluded.last_violation_at);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public, pg_temp;
+
+DROP TRIGGER IF EXISTS violation_logs_rollup ON violation_logs;
+CREATE TRIGGER violation_logs_rollup
+  AFTER INSERT ON violation_logs
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION public.apply_violation_rollups();
+
+-- 9. Batch rebuild (backfill now; rerun after bulk deletes or retention drops)
+CREATE OR REPLACE FUNCTION public.rebuild_violation_rollups(only_exam uuid DEFAULT NULL)
+RETURNS void AS $$
+BEGIN
+  DELETE FROM public.violation_rollups WHERE only_exam IS NULL OR exam_id = only_exam;
+  INSERT INTO public.violation_rollups
+         (exam_id, student_id, violation_count, max_risk, first_violation_at, last_violation_at)
+  SELECT exam_id, student_id, count(*), max(coalesce(risk_score, 0)), min("timestamp"), max("timestamp")
+  FROM public.violation_logs
+  WHERE exam_id IS NOT NULL AND student_id IS NOT NULL
+    AND (only_exam IS NULL OR exam_id = only_exam)
+  GROUP BY exam_id, student_id;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public, pg_temp;
+
+-- SECURITY DEFINER and rewrites every exam's rollups: keep it away from client roles
+REVOKE EXECUTE ON FUNCTION public.rebuild_violation_rollups(uuid) FROM public, anon, authenticated;
+
+SELECT public.rebuild_violation_rollups();
+
+-- 10. Schedule future partitions (uses pg_cron when the extension is enabled;
+--     otherwise call ensure_violation_logs_partition() from any monthly job)
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.schedule(
+            'violation-logs-partitions',
+            '0 0 1 * *',
+            $job$SELECT public.ensure_violation_logs_partition((now() + interval '2 months')::date)$job$
+        );
+    END IF;
+END $$;
@@ -0,0 +1,7 @@
+-- Scheduling fields read by backend/capacity_planner.py to warm inference
+-- workers before an exam starts. Both are optional; safe to run more than once.
+alter table exams
+add column if not exists starts_at timestamp with time zone,
+add column if not exists expected_students integer;
+
+create index if not exists exams_starts_at_idx on exams (starts_at);
@@ -0,0 +1,168 @@
+-- BENCHMARK: violation_logs before/after 03_violation_logs_partitioning.sql
+-- Run against a LOCAL Postgres (not Supabase production):
+--
+--   createdb proctor_bench
+--   psql -d proctor_bench -v rows=2000000 -v exams=50 -v students=400 -f benchmark_violation_logs.sql
+--
+-- Everything lives in the scratch schema vl_bench, which is dropped and
+-- recreated on every run. Both layouts get the same synthetic events:
+--   plain        → the original table (no secondary indexes, no partitions)
+--   partitioned  → monthly partitions, composite index, trigger-maintained rollups
+-- and the same dashboard queries are timed against each.
+
+\set ON_ERROR_STOP on
+\if :{?rows}
+\else
+  \set rows 2000000
+\endif
+\if :{?exams}
+\else
+  \set exams 50
+\endif
+\if :{?students}
+\else
+  \set students 400
+\endif
+
+DROP SCHEMA IF EXISTS vl_bench CASCADE;
+CREATE SCHEMA vl_bench;
+SET search_path = vl_bench, public;
+
+-- ─── Synthetic ids ─────────────────────────────────────────────────────────
+CREATE TABLE exam_ids AS
+  SELECT row_number() OVER () AS n, gen_random_uuid() AS id FROM generate_series(1, :exams);
+CREATE TABLE student_ids AS
+  SELECT row_number() OVER () AS n, gen_random_uuid() AS id FROM generate_series(1, :students);
+
+-- ─── Layout A: original table ──────────────────────────────────────────────
+CREATE TABLE plain (
+  id uuid DEFAULT gen_random_uuid() PRIMARY KEY,
+  exam_id uuid,
+  student_id uuid,
+  violation_type text NOT NULL,
+  risk_score integer DEFAULT 0,
+  "timestamp" timestamptz NOT NULL DEFAULT now(),
+  snapshot_url text
+);
+
+-- ─── Layout B: partitioned + indexed + rollups ─────────────────────────────
+CREATE TABLE partitioned (
+  id uuid DEFAULT gen_random_uuid() NOT NULL,
+  exam_id uuid,
+  student_id uuid,
+  violation_type text NOT NULL,
+  risk_score integer DEFAULT 0,
+  "timestamp" timestamptz NOT NULL DEFAULT now(),
+  snapshot_url text,
+  PRIMARY KEY (id, "timestamp")
+) PARTITION BY RANGE ("timestamp");
+CREATE TABLE partitioned_default PARTITION OF partitioned DEFAULT;
+
+DO $$
+DECLARE m date := date_trunc('month', now() - interval '6 months')::date;
+BEGIN
+  WHILE m <= date_trunc('month', now())::date LOOP
+    EXECUTE format('CREATE TABLE vl_bench.%I PARTITION OF vl_bench.partitioned FOR VALUES FROM (%L) TO (%L)',
+                   'partitioned_' || to_char(m, 'YYYY_MM'), m, (m + interval '1 month')::date);
+    m := (m + interval '1 month')::date;
+  END LOOP;
+END $$;
+
+CREATE INDEX ON partitioned (exam_id, student_id, "timestamp");
+CREATE INDEX ON partitioned (student_id, "timestamp");
+
+CREATE TABLE rollups (
+  exam_id uuid NOT NULL,
+  student_id uuid NOT NULL,
+  violation_count bigint NOT NULL DEFAULT 0,
+  max_risk integer NOT NULL DEFAULT 0,
+  first_violation_at timestamptz,
+  last_violation_at timestamptz,
+  PRIMARY KEY (exam_id, student_id)
+);
+
+CREATE FUNCTION apply_rollups() RETURNS trigger AS $$
+BEGIN
+  INSERT INTO vl_bench.rollups AS r
+  SELECT exam_id, student_id, count(*), max(risk_score), min("timestamp"), max("timestamp")
+  FROM new_rows WHERE exam_id IS NOT NULL AND student_id IS NOT NULL
+  GROUP BY exam_id, student_id
+  ON CONFLICT (exam_id, student_id) DO UPDATE SET
+    violation_count    = r.violation_count + excluded.violation_count,
+    max_risk           = greatest(r.max_risk, excluded.max_risk),
+    first_violation_at = least(r.first_violation_at, excluded.first_violation_at),
+    last_violation_at  = greatest(r.last_violation_at, excluded.last_violation_at);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER partitioned_rollup AFTER INSERT ON partitioned
+  REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION apply_rollups();
+
+-- ─── Load ──────────────────────────────────────────────────────────────────
+CREATE TABLE events AS
+  SELECT e.id AS exam_id, s.id AS student_id,
+         (ARRAY['PROHIBITED OBJECT: MOBILE PHONE detected', 'FACE: Not visible in frame',
+                'GAZE SHIFT: Looking Left', 'ALERT: Multiple persons detected'])[1 + (g % 4)] AS violation_type,
+         (ARRAY[20, 40, 60, 70])[1 + (g % 4)] AS risk_score,
+         now() - (random() * interval '180 days') AS ts
+  FROM generate_series(1, :rows) AS g
+  JOIN exam_ids e ON e.n = 1 + (g % :exams)
+  JOIN student_ids s ON s.n = 1 + ((g / :exams) % :students);
+
+\timing on
+\echo '── load: plain'
+INSERT INTO plain (exam_id, student_id, violation_type, risk_score, "timestamp")
+  SELECT exam_id, student_id, violation_type, risk_score, ts FROM events;
+\echo '── load: partitioned (+ indexes + rollup trigger)'
+INSERT INTO partitioned (exam_id, student_id, violation_type, risk_score, "timestamp")
+  SELECT exam_id, student_id, violation_type, risk_score, ts FROM events;
+\echo '── frame-rate style inserts: 2000 single-row statements into each layout'
+DO $$ DECLARE i int; BEGIN
+  FOR i IN 1..2000 LOOP
+    INSERT INTO vl_bench.plain (exam_id, student_id, violation_type, risk_score)
+    SELECT e.id, s.id, 'GAZE SHIFT: Looking Right', 40 FROM vl_bench.exam_ids e, vl_bench.student_ids s WHERE e.n = 1 AND s.n = 1;
+  END LOOP;
+END $$;
+DO $$ DECLARE i int; BEGIN
+  FOR i IN 1..2000 LOOP
+    INSERT INTO vl_bench.partitioned (exam_id, student_id, violation_type, risk_score)
+    SELECT e.id, s.id, 'GAZE SHIFT: Looking Right', 40 FROM vl_bench.exam_ids e, vl_bench.student_ids s WHERE e.n = 1 AND s.n = 1;
+  END LOOP;
+END $$;
+\timing off
+
+ANALYZE plain;
+ANALYZE partitioned;
+ANALYZE rollups;
+
+SELECT id AS bench_exam FROM exam_ids WHERE n = 1 \gset
+SELECT id AS bench_student FROM student_ids WHERE n = 1 \gset
+
+-- ─── Dashboard queries ─────────────────────────────────────────────────────
+\echo '── ViewResults: per-student counts and max risk for one exam — plain scan'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT student_id, count(*), max(risk_score) FROM plain
+WHERE exam_id = :'bench_exam' GROUP BY student_id;
+
+\echo '── ViewResults: same numbers from violation_rollups'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT student_id, violation_count, max_risk FROM rollups WHERE exam_id = :'bench_exam';
+
+\echo '── StudentPerformance: one student in one exam, last 7 days — plain'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT * FROM plain
+WHERE exam_id = :'bench_exam' AND student_id = :'bench_student' AND "timestamp" > now() - interval '7 days'
+ORDER BY "timestamp" DESC;
+
+\echo '── StudentPerformance: same query — partitioned + composite index (prunes to one partition)'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT * FROM partitioned
+WHERE exam_id = :'bench_exam' AND student_id = :'bench_student' AND "timestamp" > now() - interval '7 days'
+ORDER BY "timestamp" DESC;
+
+\echo '── Sanity: rollups agree with raw events'
+SELECT (SELECT sum(violation_count) FROM rollups) AS rollup_total,
+       (SELECT count(*) FROM partitioned) AS raw_total;
+
+\echo 'Done. DROP SCHEMA vl_bench CASCADE; when finished.'
@@ -43,6 +43,25 @@ function drawRoundRect(ctx, x, y, w, h, r, strokeColor, fillColor) {
     ctx.stroke()
 }
 
+// 8x8 average hash of the captured frame (16 hex chars), matches verification.average_hash on the server
+function averageHash(sourceCanvas) {
+    const small = document.createElement('canvas')
+    small.width = 8
+    small.height = 8
+    const ctx = small.getContext('2d')
+    ctx.drawImage(sourceCanvas, 0, 0, 8, 8)
+    const px = ctx.getImageData(0, 0, 8, 8).data
+    const gray = []
+    for (let i = 0; i < px.length; i += 4) gray.push(0.299 * px[i] + 0.587 * px[i + 1] + 0.114 * px[i + 2])
+    const mean = gray.reduce((a, b) => a + b, 0) / gray.length
+    let hex = ''
+    for (let i = 0; i < 64; i += 4) {
+        const nibble = gray.slice(i, i + 4).reduce((n, g) => (n << 1) | (g > mean ? 1 : 0), 0)
+        hex += nibble.toString(16)
+    }
+    return hex
+}
+
 function drawLabel(ctx, text, x, y, bgColor) {
     ctx.font = 'bold 11px monospace'
     const w = ctx.measureText(text).width + 10
@@ -53,7 +72,7 @@ function drawLabel(ctx, text, x, y, bgColor) {
 }
 
 // ─── Main Component ───────────────────────────────────────────────────────────
-const WebcamProctor = ({ onViolation, videoRef }) => {
+const WebcamProctor = ({ onViolation, videoRef, examId, studentId }) => {
     const overlayCanvasRef = useRef(null)   // Drawn-on canvas (face + object boxes)
     const captureCanvasRef = useRef(null)   // Hidden canvas for frame capture
     const faceLandmarkerRef = useRef(null)
@@ -64,6 +83,7 @@ const WebcamProctor = ({ onViolation, videoRef }) => {
     const isSendingRef = useRef(false)
     const lastWarnTimeRef = useRef({})
     const yoloBoxesRef = useRef([])   // Boxes from last YOLO response
+    const localReportRef = useRef({ faces: 0, head_pose: { yaw: 0, pitch: 0 }, objects: [] })  // Latest MediaPipe findings
 
     const [status, setStatus] = useState('loading')
     const [backendOnline, setBackendOnline] = useState(false)
@@ -253,11 +273,21 @@ const WebcamProctor = ({ onViolation, videoRef }) => {
                     'Content-Type': 'application/json',
                     'bypass-tunnel-reminder': 'true'
                 },
-                body: JSON.stringify({ image: screenshot }),
+                body: JSON.stringify({
+                    image: screenshot,
+                    // Groups this session's results under its exam (live proctor feed, result log)
+                    exam_id: examId,
+                    student_id: studentId,
+                    // Used by the server's verification mode; ignored otherwise
+                    client_report: localReportRef.current,
+                    frame_hash: averageHash(captureCanvasRef.current)
+                }),
                 signal: AbortSignal.timeout(20000)
             })
             if (!res.ok) return
             const data = await res.json()
+            // A newer frame from this session replaced this one on the server
+            if (data.superseded) return
 
             // Update YOLO boxes ref so the next canvas draw picks them up
             if (data.objects) {
@@ -291,7 +321,7 @@ const WebcamProctor = ({ onViolation, videoRef }) => {
         } finally {
             isSendingRef.current = false
         }
-    }, [backendOnline, captureFrame, warnWithCooldown])
+    }, [backendOnline, captureFrame, warnWithCooldown, examId, studentId])
 
     // ─── 7. Local MediaPipe inference + canvas drawing ────────────────
     const runLocalInference = useCallback(() => {
@@ -302,6 +332,7 @@ const WebcamProctor = ({ onViolation, videoRef }) => {
         try {
             const results = landmarker.detectForVideo(video, Date.now())
             const faces = results.faceLandmarks
+            localReportRef.current = { ...localReportRef.current, faces: faces ? faces.length : 0 }
 
             if (!faces || faces.length === 0) {
                 setFaceStatus('searching')
@@ -357,6 +388,7 @@ const WebcamProctor = ({ onViolation, videoRef }) => {
             const nose = lm[1], leftEye = lm[33], rightEye = lm[263]
             const yaw = (nose.x - (leftEye.x + rightEye.x) / 2) * 500
             const pitch = (nose.y - (leftEye.y + rightEye.y) / 2) * 500
+            localReportRef.current.head_pose = { yaw: Math.round(yaw), pitch: Math.round(pitch) }
 
             if (Math.abs(yaw) > HEAD_YAW_WARN) {
                 const dir = yaw > 0 ? 'LOOKING RIGHT' : 'LOOKING LEFT'
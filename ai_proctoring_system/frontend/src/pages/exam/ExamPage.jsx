@@ -370,7 +370,7 @@ const ExamPage = () => {
                             <Camera className="h-3 w-3 text-orange-500" />
                             <span className="text-[9px] font-black uppercase tracking-widest text-gray-500 dark:text-gray-400">Secure Visual Pipeline</span>
                         </div>
-                        <WebcamProctor onViolation={handleViolation} videoRef={videoRef} />
+                        <WebcamProctor onViolation={handleViolation} videoRef={videoRef} examId={examId} studentId={user?.id} />
                     </div>
 
                     <div className="bg-gray-900 rounded-[32px] p-6 text-white shadow-2xl overflow-hidden relative flex-1 flex flex-col min-h-[250px]">